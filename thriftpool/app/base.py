@@ -7,12 +7,13 @@ from threading import RLock
 from gaffer.manager import Manager
 
 from thriftworker.utils.decorators import cached_property
-from thriftworker.utils.imports import instantiate
+from thriftworker.utils.imports import instantiate, symbol_by_name
 from thriftworker.app import ThriftWorker
 
 from thriftpool.app.config import Configuration
 from thriftpool.exceptions import RegistrationError
 from thriftpool.utils.mixin import SubclassMixin
+from thriftpool.utils.structures import AggregatedView
 
 from ._state import set_current_app
 
@@ -46,12 +47,33 @@ class ThriftPool(SubclassMixin):
     #: Worker controller class.
     worker_cls = 'thriftpool.controllers.worker:WorkerController'
 
+    #: Acceptor of worker's connections.
+    acceptor_cls = 'thriftpool.components.worker.acceptors:Acceptor'
+
     #: Specify daemonizing behavior.
     daemon_cls = 'thriftpool.app.daemon:Daemon'
 
+    #: Name of worker pool served by this process.
+    pool = None
+
     #: Store active requests here.
     request_stack_cls = 'thriftpool.request.stack:RequestStack'
 
+    #: Answer requests that exceed their deadlines.
+    deadlines_cls = 'thriftpool.request.deadline:Deadlines'
+
+    #: Limit executed and queued requests of services.
+    admissions_cls = 'thriftpool.request.admission:Admissions'
+
+    #: Count outstanding requests of connections.
+    inflight_cls = 'thriftpool.request.inflight:InFlight'
+
+    #: Store latency histograms of handler methods here.
+    histograms_cls = 'thriftpool.request.histograms:Histograms'
+
+    #: Write binary access log with this class.
+    access_log_cls = 'thriftpool.request.access_log:AccessLog'
+
     def __init__(self):
         self._finalized = False
         self._finalize_mutex = RLock()
@@ -119,6 +141,23 @@ class ThriftPool(SubclassMixin):
                 self.slots.register(**params)
             self._finalized = True
 
+    def pool_config(self, pool):
+        """Return configuration of given worker pool, settings that pool
+        doesn't override are taken from application configuration.
+
+        """
+        config = AggregatedView(self.config.POOLS.get(pool) or {})
+        config.add_default(self.config)
+        return config
+
+    def use_pool(self, pool):
+        """Serve only slots of given worker pool with its settings. Must
+        be called in worker before it starts.
+
+        """
+        self.config.update(self.config.POOLS.get(pool) or {})
+        self.pool = pool
+
     @cached_property
     def protocol_factory(self):
         """Create handler instance."""
@@ -126,9 +165,12 @@ class ThriftPool(SubclassMixin):
 
     @cached_property
     def thriftworker(self):
-        return ThriftWorker(port_range=self.config.SERVICE_PORT_RANGE,
-                            protocol_factory=self.protocol_factory,
-                            pool_size=self.config.CONCURRENCY)
+        thriftworker = ThriftWorker(
+            port_range=self.config.SERVICE_PORT_RANGE,
+            protocol_factory=self.protocol_factory,
+            pool_size=self.config.CONCURRENCY)
+        thriftworker.acceptor_cls = self.acceptor_cls
+        return thriftworker
 
     @property
     def loop(self):
@@ -188,3 +230,62 @@ class ThriftPool(SubclassMixin):
     def request_stack(self):
         """Store current requests."""
         return instantiate(self.request_stack_cls)
+
+    @cached_property
+    def deadlines(self):
+        """Watcher of request deadlines."""
+        return instantiate(self.deadlines_cls, self.get_deadline,
+                           self.has_deadlines, self.protocol_factory)
+
+    def get_deadline(self, service_name, method_name):
+        """Return deadline (in seconds) of given method or :const:`None`."""
+        deadlines = self.config.REQUEST_DEADLINES
+        for key in ('{0}::{1}'.format(service_name, method_name),
+                    service_name):
+            if key in deadlines:
+                return deadlines[key]
+        return self.config.REQUEST_DEADLINE
+
+    def has_deadlines(self, service_name):
+        """May any method of given service have deadline?"""
+        if self.config.REQUEST_DEADLINE is not None:
+            return True
+        prefix = '{0}::'.format(service_name)
+        return any(key == service_name or key.startswith(prefix)
+                   for key in self.config.REQUEST_DEADLINES)
+
+    @cached_property
+    def admissions(self):
+        """Counters and limits of requests of each service."""
+        return instantiate(self.admissions_cls, self.get_request_limits,
+                           symbol_by_name(self.config.OVERLOAD_EXCEPTION_CLS))
+
+    def get_request_limits(self, service_name):
+        """Return maximum number of active and queued requests of given
+        service, :const:`None` means unlimited.
+
+        """
+        limits = self.config.REQUEST_LIMITS.get(service_name) or {}
+        return (limits.get('MAX_ACTIVE_REQUESTS',
+                           self.config.MAX_ACTIVE_REQUESTS),
+                limits.get('MAX_QUEUED_REQUESTS',
+                           self.config.MAX_QUEUED_REQUESTS))
+
+    @cached_property
+    def inflight(self):
+        """Outstanding requests of each connection."""
+        return instantiate(self.inflight_cls)
+
+    @cached_property
+    def histograms(self):
+        """Latency histograms of handler methods."""
+        return instantiate(self.histograms_cls)
+
+    @cached_property
+    def access_log(self):
+        """Binary access log or :const:`None` if it's disabled."""
+        path = self.config.ACCESS_LOG
+        if path is None:
+            return None
+        return instantiate(self.access_log_cls, path,
+                           buffer_size=self.config.ACCESS_LOG_BUFFER_SIZE)
@@ -12,26 +12,154 @@ DEFAULT_SETTINGS = dict(
     DEFAULT_WORKER_LOG_FMT="[%(asctime)s %(levelname)s] [%(process)d] %(message)s",
     LOGGING_LEVEL=logging.DEBUG,
     LOG_REQUESTS=False,
+    #: Which part of requests should be logged.
+    LOG_REQUESTS_SAMPLE_RATE=1.0,
+    #: Log only requests that took longer (in milliseconds).
+    LOG_REQUESTS_SLOWER_THAN=None,
+    #: How many logged requests can wait for writing, others are dropped.
+    LOG_REQUESTS_QUEUE_SIZE=10000,
+    #: Maximum length of logged argument or result.
+    LOG_REQUESTS_REPR_LIMIT=1024,
+    #: Path to binary access log, it's disabled by default.
+    ACCESS_LOG=None,
+    #: How many bytes of access log worker can buffer before writing.
+    ACCESS_LOG_BUFFER_SIZE=64 * 1024,
+    #: How often (in seconds) worker should write buffered access log.
+    ACCESS_LOG_FLUSH_INTERVAL=1.0,
     LOG_TORNADO_REQUESTS=False,
     LOG_FILE=None,
     LOG_FORCE_COLORIZED=False,
     REDIRECT_STDOUT=True,
     SLOTS=[],
+    #: Settings of dedicated worker pools by pool name, for example
+    #: ``{'batch': {'WORKERS': 2, 'CONCURRENCY': 8, 'WORKER_TTL': 3600}}``.
+    #: Slot registered with ``pool='batch'`` is served only by workers of
+    #: this pool, slots without pool are served by default pool.
+    POOLS={},
     PROCESS_NAME='thriftpool',
     MODULES=[],
     PROTOCOL_FACTORY_CLS='thrift.protocol.TBinaryProtocol'
                          ':TBinaryProtocolAcceleratedFactory',
     SERVICE_PORT_RANGE=(10000, 20000),
     WORKER_TYPE='sync',
+    #: How workers are started: ``exec`` runs new interpreter for each
+    #: worker, ``fork`` forks them from process with preloaded modules.
+    WORKER_START_METHOD='exec',
     WORKERS=1,
+    #: Start serving when given number of workers of each pool are ready,
+    #: others keep starting in background. All workers by default.
+    WORKERS_READY=None,
+    #: How often (in seconds) manager asks starting worker whether its
+    #: handlers are ready to serve.
+    WORKER_READY_INTERVAL=0.5,
+    #: Files with requests replayed to services before worker gets
+    #: clients, by service name. Requests are stored as framed transport
+    #: sends them: four-byte length and message.
+    WARMUP_CORPUS={},
+    #: How many times warm-up requests are replayed.
+    WARMUP_ROUNDS=1,
+    #: How long (in seconds) request may take since its receipt, not
+    #: limited by default. Client of request that exceeds deadline gets
+    #: application exception, handler isn't interrupted and its result
+    #: is dropped.
+    REQUEST_DEADLINE=None,
+    #: Deadlines of services and methods, keys are service names or
+    #: ``Service::method``, e.g. ``{'Batch': 30, 'Batch::ping': 0.1}``.
+    REQUEST_DEADLINES={},
+    #: How many requests of one service worker may execute concurrently,
+    #: not limited by default. Requests over limit are rejected without
+    #: calling handler.
+    MAX_ACTIVE_REQUESTS=None,
+    #: Reject request when more than given number of requests of the same
+    #: service wait for execution, not limited by default.
+    MAX_QUEUED_REQUESTS=None,
+    #: Limits of specific services, e.g.
+    #: ``{'Batch': {'MAX_ACTIVE_REQUESTS': 2, 'MAX_QUEUED_REQUESTS': 10}}``.
+    REQUEST_LIMITS={},
+    #: Exception returned to rejected client, created with type and message
+    #: like :class:`thrift.Thrift.TApplicationException`.
+    OVERLOAD_EXCEPTION_CLS='thrift.Thrift:TApplicationException',
     WORKER_TTL=None,
+    #: Restart worker which resident memory exceeds given number of
+    #: megabytes.
+    WORKER_MAX_RSS=None,
+    #: Restart worker after given number of served requests.
+    WORKER_MAX_REQUESTS=None,
     WORKER_REAP_DELAY=60.0,
+    #: Which part of limits and of delay between restarts is randomized,
+    #: so workers don't restart at the same time.
+    WORKER_REAP_JITTER=0.1,
+    #: How long (in seconds) stopped worker may finish its connections.
+    WORKER_DRAIN_TIMEOUT=30.0,
+    #: How long (in seconds) draining worker waits for clients to close
+    #: idle connections before closing them itself.
+    WORKER_DRAIN_GRACE=1.0,
+    #: How often (in seconds) manager checks that worker is drained.
+    WORKER_DRAIN_INTERVAL=0.1,
+    #: How many workers may be replaced at once on reload by SIGHUP.
+    WORKER_RELOAD_CONCURRENCY=1,
+    #: Pin workers to CPUs: ``core`` pins each worker to single core,
+    #: ``node`` pins it to all cores of NUMA node, workers are distributed
+    #: round-robin. Disabled by default.
+    WORKER_CPU_AFFINITY=None,
+    #: Change number of workers by their load between ``MIN_WORKERS``
+    #: and ``MAX_WORKERS``, both default to ``WORKERS``.
+    AUTOSCALE=False,
+    MIN_WORKERS=None,
+    MAX_WORKERS=None,
+    #: How often (in seconds) load of workers should be measured.
+    AUTOSCALE_INTERVAL=1.0,
+    #: How many last measurements are averaged.
+    AUTOSCALE_WINDOW=10,
+    #: Add worker when busy part of workers' threads reaches this value.
+    AUTOSCALE_UP_THRESHOLD=0.8,
+    #: Remove worker when busy part of workers' threads drops to this value.
+    AUTOSCALE_DOWN_THRESHOLD=0.3,
+    #: Add worker when answers wait for dispatching longer (in
+    #: milliseconds), disabled by default.
+    AUTOSCALE_LATENCY=None,
+    #: Add worker when this number of connections wait in accept queues
+    #: of pool's listeners, disabled by default. Queues of workers' own
+    #: sockets in ``reuseport`` listen mode aren't measured.
+    AUTOSCALE_BACKLOG=None,
+    #: How long (in seconds) to wait after change before adding worker.
+    AUTOSCALE_UP_COOLDOWN=10.0,
+    #: How long (in seconds) to wait after change before removing worker.
+    AUTOSCALE_DOWN_COOLDOWN=60.0,
     CONCURRENCY=1,
     TORNADO_ENDPOINTS=[],
     #: How long we should wait for process initialization.
     PROCESS_START_TIMEOUT=60.0,
+    #: How long (in seconds) old manager should wait for new one to
+    #: start on hot upgrade.
+    UPGRADE_TIMEOUT=120.0,
     #: How long we should wait for process termination.
     PROCESS_STOP_TIMEOUT=60.0,
+    #: Codec used to pass messages between manager and workers.
+    RPC_CODEC='thriftpool.rpc.codecs:PickleCodec',
+    #: How long (in seconds) manager should wait for worker's answer.
+    RPC_TIMEOUT=30.0,
+    #: Where to create shared memory regions with worker's metrics, by
+    #: default ``/dev/shm`` is used if exists, temporary directory otherwise.
+    METRICS_DIR=None,
+    #: How often (in seconds) worker should publish metrics.
+    METRICS_INTERVAL=1.0,
+    #: How many counters and timers can be published by one worker.
+    METRICS_CAPACITY=1024,
+    #: How long (in seconds) merged statistics of workers should be cached.
+    STATS_CACHE_TTL=1.0,
+    #: How workers listen services: ``inherit`` shares manager's socket
+    #: with all workers, ``reuseport`` makes each worker listen own socket
+    #: with ``SO_REUSEPORT`` and lets kernel distribute connections.
+    LISTEN_MODE='inherit',
+    #: Pause accepting in workers that are busier than least loaded one,
+    #: ignored in ``reuseport`` mode.
+    ACCEPT_BALANCING=False,
+    #: How often (in seconds) load of workers should be checked.
+    ACCEPT_BALANCE_INTERVAL=0.1,
+    #: How many in-flight requests worker may have above least loaded
+    #: worker before it stops accepting new connections.
+    ACCEPT_BALANCE_THRESHOLD=2,
 )
 
 
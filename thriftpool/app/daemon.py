@@ -34,7 +34,10 @@ class Daemon(object):
         """Start new worker."""
         self.on_start()
         if self.pidfile is not None:
-            self.pidlock = create_pidlock(self.pidfile)
+            # New manager takes over lock of manager it upgrades.
+            self.pidlock = create_pidlock(
+                self.pidfile,
+                replace=getattr(self.controller, 'predecessor', None))
         if self.daemonize:
             receivers = collect_excluded_fds.send(sender=self)
             excluded = [receiver[1] for receiver in receivers if receiver[1]]
@@ -63,7 +63,15 @@ class Logging(object):
     def setup_request_logging(self):
         """Setup system to log requests."""
         logger = logging.getLogger('thriftpool.requests')
-        self.request_logger = RequestLogger(logger, self.colored)
+        config = self.app.config
+        self.request_logger = RequestLogger(
+            logger, self.colored,
+            sample_rate=config.LOG_REQUESTS_SAMPLE_RATE,
+            slow_threshold=config.LOG_REQUESTS_SLOWER_THAN,
+            queue_size=config.LOG_REQUESTS_QUEUE_SIZE,
+            repr_limit=config.LOG_REQUESTS_REPR_LIMIT,
+            hub=self.app.hub,
+            counter=self.app.thriftworker.counters['requests_log_dropped'])
         self.request_logger.setup()
 
     def setup_tornado_logger(self):
@@ -55,7 +55,8 @@ class ThriftService(namedtuple('ThriftService', ('service_name',
     def Processor(self):
         """Create safe processor."""
         cls = symbol_by_name(self.processor_cls)
-        attrs = dict(__module__=cls.__module__)
+        attrs = dict(__module__=cls.__module__,
+                     _service_name=self.service_name)
         return type(cls.__name__, (ProcessorMixin, cls), attrs)
 
     @cached_property
@@ -64,8 +65,11 @@ class ThriftService(namedtuple('ThriftService', ('service_name',
         return self.Processor(self.wrapped_handler)
 
 
-class Slot(namedtuple('Slot', 'name listener service')):
-    """Combine service and listener together."""
+class Slot(namedtuple('Slot', 'name listener service pool')):
+    """Combine service and listener together. Slot is served by workers
+    of given pool, :const:`None` stands for default pool.
+
+    """
 
     def __hash__(self):
         return hash(self.__class__) ^ hash(self.name)
@@ -79,6 +83,28 @@ class Slot(namedtuple('Slot', 'name listener service')):
         else:
             initialize()
 
+    def warmup(self):
+        """Let handler warm up its caches before it gets requests."""
+        handler = self.service.handler
+        try:
+            warmup = handler.warmup
+        except AttributeError:
+            pass
+        else:
+            warmup()
+
+    def ready(self):
+        """Is handler ready to serve requests? Handler may define
+        ``ready`` method that returns :const:`False` until it warms up.
+
+        """
+        handler = self.service.handler
+        try:
+            ready = handler.ready
+        except AttributeError:
+            return True
+        return bool(ready())
+
     def stop(self):
         handler = self.service.handler
         try:
@@ -120,6 +146,15 @@ class Repository(set):
         """Check that given service registered in repository."""
         return name in self._names
 
+    @property
+    def pools(self):
+        """Return names of worker pools used by slots."""
+        return set(slot.pool for slot in self)
+
+    def in_pool(self, pool):
+        """Return repository of slots served by given pool."""
+        return self.__class__(slot for slot in self if slot.pool == pool)
+
     def register(self, name, processor_cls, handler_cls, **opts):
         """Register new service in repository."""
         # Create listener.
@@ -131,5 +166,5 @@ class Repository(set):
                                processor_cls=processor_cls,
                                handler_cls=handler_cls)
         # Create slot itself.
-        slot = Slot(name, listener, service)
+        slot = Slot(name, listener, service, opts.get('pool'))
         self.add(slot)
@@ -1,14 +1,22 @@
 from __future__ import absolute_import
 
 import argparse
+import os
+import signal
+import time
+from datetime import datetime
 
 from six import with_metaclass, iteritems
 
 from thriftworker.utils.decorators import cached_property
 
-from thriftpool.bin.base import BaseCommand
+from thriftpool.bin.base import BaseCommand, Option, Error
 from thriftpool.bin.thriftpoold import ManagerCommand
+from thriftpool.request import histograms as outcomes
+from thriftpool.request.access_log import AccessLogReader, OK, STATUSES
+from thriftpool.request.histograms import Histogram
 from thriftpool.utils.mixin import SubclassMixin
+from thriftpool.utils.platforms import PIDLock
 
 
 def indent(t, indent=0):
@@ -89,7 +97,8 @@ class SubCommandMeta(type):
         klass = (super(SubCommandMeta, cls)
                  .__new__(cls, name, bases, attributes))
         if not is_abstract:
-            UmbrellaCommand.subcommand_classes[klass.__name__.lower()] = klass
+            name = attributes.get('command_name') or klass.__name__.lower()
+            UmbrellaCommand.subcommand_classes[name] = klass
         return klass
 
 
@@ -123,6 +132,116 @@ class list_slots(abstract):
             self.out(self.format_slot(slot) + '\n')
 
 
+def parse_time(value):
+    """Parse unix timestamp or local time in ISO format."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S',
+                '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return time.mktime(datetime.strptime(value, fmt).timetuple())
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError('bad time {0!r}'.format(value))
+
+
+class access_log(abstract):
+    """Analyze binary access log."""
+
+    command_name = 'access-log'
+
+    args = 'path'
+
+    options = (
+        Option('path', help='Path to access log'),
+        Option('--method', help='Show only given method, in'
+               ' "Service::method" format or only name of method',
+               action='store'),
+        Option('--since', help='Show requests served after given time',
+               action='store', type=parse_time),
+        Option('--until', help='Show requests served before given time',
+               action='store', type=parse_time),
+        Option('--slower-than', help='Show requests that took longer'
+               ' (in ms)', action='store', type=float),
+        Option('--records', help='Print records instead of summary',
+               action='store_true'),
+    )
+
+    def format_record(self, reader, record):
+        return '{0} {1:d} {2} {3} {4:.3f}ms {5:d}b {6:d}b'.format(
+            datetime.fromtimestamp(record.timestamp).isoformat(),
+            record.pid, reader.name(record.method_id),
+            STATUSES.get(record.status, record.status),
+            record.duration / 1e3, record.request_size,
+            record.response_size)
+
+    def summarize(self, reader, records):
+        """Aggregate records by method."""
+        histograms = {}
+        for record in records:
+            try:
+                histogram = histograms[record.method_id]
+            except KeyError:
+                histogram = histograms[record.method_id] = Histogram()
+            histogram.record(record.duration / 1e6, outcomes.OK
+                             if record.status == OK else outcomes.ERROR)
+        rows = [(reader.name(ident), histogram.to_dict())
+                for ident, histogram in iteritems(histograms)]
+        return sorted(rows, key=lambda row: -row[1]['count'])
+
+    def run(self, *args, **options):
+        try:
+            reader = AccessLogReader(options['path'])
+            records = reader.filter(method=options['method'],
+                                    since=options['since'],
+                                    until=options['until'],
+                                    slower_than=options['slower_than'])
+            if options['records']:
+                for record in records:
+                    self.out(self.format_record(reader, record))
+                return
+            rows = self.summarize(reader, records)
+        except (OSError, IOError) as exc:
+            raise Error(str(exc))
+        white = self.colored.white
+        self.out(white('{0:<40} {1:>10} {2:>8} {3:>10} {4:>10} {5:>10}'
+                       ' {6:>10}'.format('method', 'count', 'errors',
+                                         'mean', 'p50', 'p99', 'max')))
+        for name, data in rows:
+            self.out('{0:<40} {1:>10d} {2:>8d} {3:>10.3f} {4:>10.3f}'
+                     ' {5:>10.3f} {6:>10.3f}'.format(
+                         name, data['count'], data['outcomes'][outcomes.ERROR],
+                         data['mean'], data['p50'], data['p99'],
+                         data['max']))
+
+
+class upgrade(abstract):
+    """Start new manager that replaces running one without closing
+    listeners."""
+
+    args = 'pid_file'
+
+    options = (
+        Option('pid_file', help='Path to PID file of running manager'),
+    )
+
+    def run(self, *args, **options):
+        try:
+            pid = PIDLock(options['pid_file']).read()
+        except (OSError, IOError, ValueError) as exc:
+            raise Error(str(exc))
+        if pid is None:
+            raise Error('PID file {0!r} not found'
+                        .format(options['pid_file']))
+        try:
+            os.kill(pid, signal.SIGUSR2)
+        except OSError as exc:
+            raise Error("Can't signal manager {0}: {1}".format(pid, exc))
+        self.out('Upgrade of manager {0} requested.'.format(pid))
+
+
 class manager(abstract, ManagerCommand):
     """Run manager daemon. Same as `thriftpoold`."""
 
@@ -15,6 +15,12 @@ class ManagerCommand(BaseCommand):
     options = (
         Option('--log-request', help='Log all incoming requests',
                action='store_true'),
+        Option('--log-request-sample-rate',
+               help='Which part of incoming requests should be logged',
+               action='store', type=float),
+        Option('--log-request-slower-than',
+               help='Log only requests that took longer (in ms)',
+               action='store', type=float),
         Option('-c', '--concurrency', help='Set concurrency level',
                action='store', type=int),
         Option('-w', '--workers', help='Set workers count',
@@ -34,6 +40,12 @@ class ManagerCommand(BaseCommand):
                action='store', type=str, nargs='*'),
         Option('--foreground', help='Don not detach from console',
                action='store_true'),
+        Option('--listen-mode', help='How workers should listen services',
+               action='store', type=str, choices=['inherit', 'reuseport']),
+        Option('--start-method', help='How workers should be started',
+               action='store', type=str, choices=['exec', 'fork']),
+        Option('--access-log', help='Write binary access log to given file',
+               action='store'),
         Option('--endpoint', help='Which address tornado should listen?',
                action='store', type=str, nargs='*'),
     )
@@ -60,9 +72,18 @@ class ManagerCommand(BaseCommand):
 
         pid_file = normalize_path(options.get('pid_file', None))
         log_file = normalize_path(options.get('log_file', None))
+        access_log = normalize_path(options.get('access_log', None))
 
         app.config.LOG_REQUESTS = options.get('log_request', False)
+        if options.get('log_request_sample_rate') is not None:
+            app.config.LOG_REQUESTS_SAMPLE_RATE = \
+                options['log_request_sample_rate']
+        if options.get('log_request_slower_than') is not None:
+            app.config.LOG_REQUESTS_SLOWER_THAN = \
+                options['log_request_slower_than']
         app.config.LOG_FILE = log_file
+        if access_log is not None:
+            app.config.ACCESS_LOG = access_log
 
         if options['workers']:
             app.config.WORKERS = options['workers']
@@ -70,6 +91,10 @@ class ManagerCommand(BaseCommand):
             app.config.CONCURRENCY = options['concurrency']
         if options['worker_type']:
             app.config.WORKER_TYPE = options['worker_type']
+        if options.get('listen_mode'):
+            app.config.LISTEN_MODE = options['listen_mode']
+        if options.get('start_method'):
+            app.config.WORKER_START_METHOD = options['start_method']
         if options['modules']:
             modules = list(app.config.MODULES)
             modules.extend(options['modules'])
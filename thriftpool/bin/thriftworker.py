@@ -1,9 +1,11 @@
 from __future__ import absolute_import
 
+import os
 import sys
 
 from thriftpool.bin.base import BaseCommand
-from thriftpool.utils.serializers import StreamSerializer
+from thriftpool.utils.handshake import Handshake, STAGE_RECEIVED, \
+    STAGE_INITIALIZED
 
 
 class Unbuffered(object):
@@ -27,8 +29,11 @@ class WorkerCommand(BaseCommand):
 
     def run(self, *args, **options):
         stream_fd = sys.stderr.fileno() + 1
-        app = StreamSerializer().decode_from_stream(stream_fd)
+        app, pool = Handshake().decode_from_stream(stream_fd)
+        os.write(stream_fd, STAGE_RECEIVED)
+        app.use_pool(pool)
         controller = app.WorkerController(stream_fd)
+        os.write(stream_fd, STAGE_INITIALIZED)
         controller.start()
 
 
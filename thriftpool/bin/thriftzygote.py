@@ -0,0 +1,45 @@
+from __future__ import absolute_import
+
+import os
+import signal
+import socket
+
+from thriftpool.bin.base import BaseCommand
+from thriftpool.bin.thriftworker import main as worker_main
+from thriftpool.utils.platforms import close_fds
+from thriftpool.utils.serializers import StreamSerializer
+from thriftpool.utils.zygote import Zygote, ZYGOTE_FDS_ENV
+
+
+def adopt_socket(fd, family):
+    sock = socket.fromfd(fd, family, socket.SOCK_STREAM)
+    os.close(fd)
+    return sock
+
+
+class ZygoteCommand(BaseCommand):
+    """Preload application and fork ThriftPool workers."""
+
+    def run(self, *args, **options):
+        control_fd, listener_fd = \
+            [int(fd) for fd in os.environ.pop(ZYGOTE_FDS_ENV).split(',')]
+        app = StreamSerializer().decode_from_stream(control_fd)
+        # Manager handles interruption, workers are stopped by it.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Import everything that worker needs.
+        app.loader.preload_modules()
+        app.WorkerController.Namespace(app=app).load_modules()
+        control = adopt_socket(control_fd, socket.AF_UNIX)
+        listener = adopt_socket(listener_fd, socket.AF_UNIX)
+        control.sendall(b'1')
+        Zygote(control, listener, worker_main).serve()
+
+
+def main():
+    # Manager's descriptors are inherited, keep only zygote's sockets.
+    close_fds([int(fd) for fd in os.environ[ZYGOTE_FDS_ENV].split(',')])
+    ZygoteCommand().execute()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,13 +22,12 @@ class Acceptors(LogsMixin):
     def start(self):
         """Start all registered listeners."""
         slots = self.app.slots
-        broker = self.processes.broker
         for listener in self.listeners:
             slot = slots[listener.name]
             listener.start()
             listener_started.send(self, listener=listener, slot=slot,
                                   app=self.app)
-            broker.spawn(lambda proxy: proxy.start_acceptor(listener.name))
+            self.processes.start_listener(listener)
             self._info("Starting listener on '%s:%d' for service '%s'.",
                        listener.host, listener.port, listener.name)
         listeners_started.send(self, app=self.app)
@@ -36,14 +35,13 @@ class Acceptors(LogsMixin):
     def stop(self):
         """Stop all registered listeners."""
         slots = self.app.slots
-        broker = self.processes.broker
         for listener in self.listeners:
             slot = slots[listener.name]
             self._info("Stopping listening on '%s:%d', service '%s'.",
                        listener.host, listener.port, listener.name)
             listener_stopped.send(self, listener=listener, slot=slot,
                                   app=self.app)
-            broker.spawn(lambda proxy: proxy.stop_acceptor(listener.name))
+            self.processes.stop_listener(listener)
             listener.stop()
         listeners_stopped.send(self, app=self.app)
 
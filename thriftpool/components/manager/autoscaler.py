@@ -0,0 +1,228 @@
+"""Change number of workers by their load."""
+from __future__ import absolute_import
+
+import logging
+from collections import deque
+
+from pyuv import Timer
+from six import iteritems, itervalues
+
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+from thriftworker.utils.decorators import cached_property
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.utils.metrics import merge_stats
+from thriftpool.utils.mixin import LogsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class Autoscaler(LogsMixin, LoopMixin):
+    """Periodically measure how busy workers are: number of in-flight and
+    queued requests per unit of concurrency, time that answers wait for
+    dispatching and connections that wait in accept queues. Add worker when average load over window exceeds upper
+    threshold and drain least loaded worker when it drops below lower one.
+    Gap between thresholds and cooldowns after each change prevent
+    flapping. Each pool of workers is scaled separately by its settings.
+
+    """
+
+    def __init__(self, app, processes, reloader=None):
+        self.app = app
+        self.processes = processes
+        self.reloader = reloader
+        #: Measured loads by pool.
+        self.samples = {}
+        #: When pool was changed last time.
+        self.changed = {}
+        self._timers = {}
+        super(Autoscaler, self).__init__()
+
+    @property
+    def enabled(self):
+        return any(factory.config.AUTOSCALE
+                   for factory in itervalues(self.processes.factories))
+
+    @staticmethod
+    def bounds(config):
+        """Return minimal and maximal number of workers in pool."""
+        return (config.MIN_WORKERS if config.MIN_WORKERS is not None
+                else config.WORKERS,
+                config.MAX_WORKERS if config.MAX_WORKERS is not None
+                else config.WORKERS)
+
+    @property
+    def interval(self):
+        return self.app.config.AUTOSCALE_INTERVAL
+
+    @property
+    def window(self):
+        """How many samples are averaged."""
+        return max(1, self.app.config.AUTOSCALE_WINDOW)
+
+    def loads(self, pool):
+        """Return load of each serving worker of given pool, one means
+        that all its threads are busy.
+
+        """
+        processes = self.processes
+        concurrency = float(processes.factories[pool].config.CONCURRENCY)
+        loads = {}
+        for process_id in processes.members(pool):
+            if process_id in processes.draining:
+                continue
+            gauges = processes.read_gauges(process_id)
+            if gauges is not None:
+                loads[process_id] = \
+                    (gauges['active'] + gauges['queued']) / concurrency
+        return loads
+
+    def latency(self, pool):
+        """Return mean time (in milliseconds) that answers of given pool
+        waited for dispatching since previous call.
+
+        """
+        processes = self.processes
+        total = count = 0
+        timers = {}
+        for process_id in processes.members(pool):
+            metrics = processes.read_metrics(process_id)
+            if metrics is None:
+                continue
+            stats = merge_stats(itervalues(metrics['dispatching_timers']))
+            timers[process_id] = stats['sum'], stats['count']
+            last_sum, last_count = self._timers.get(process_id, (0.0, 0))
+            total += stats['sum'] - last_sum
+            count += stats['count'] - last_count
+        self._timers.update(timers)
+        return total / count if count > 0 else 0.0
+
+    def backlog(self, pool):
+        """Return number of connections that wait in accept queues of
+        listeners of given pool. In ``reuseport`` listen mode workers
+        accept from own sockets, which queues aren't measured.
+
+        """
+        total = 0
+        for listener in self.processes.listeners_of(pool):
+            queued = listener.queued
+            if queued is not None:
+                total += queued
+        return total
+
+    @staticmethod
+    def _busy(config, load, latency, backlog):
+        return load >= config.AUTOSCALE_UP_THRESHOLD or \
+            (config.AUTOSCALE_LATENCY is not None
+             and latency >= config.AUTOSCALE_LATENCY) or \
+            (config.AUTOSCALE_BACKLOG is not None
+             and backlog >= config.AUTOSCALE_BACKLOG)
+
+    @staticmethod
+    def _idle(config, load, latency, backlog):
+        return load <= config.AUTOSCALE_DOWN_THRESHOLD and \
+            (config.AUTOSCALE_LATENCY is None
+             or latency < config.AUTOSCALE_LATENCY) and \
+            (config.AUTOSCALE_BACKLOG is None
+             or backlog < config.AUTOSCALE_BACKLOG)
+
+    def _cooled(self, pool, cooldown):
+        changed = self.changed.get(pool)
+        return changed is None or \
+            self.loop.now() - changed >= cooldown * 1000
+
+    def _changed(self, pool):
+        self.changed[pool] = self.loop.now()
+        self.samples.pop(pool, None)
+
+    def _grow(self, pool, reason):
+        self._info('Add worker to pool %s, %s.', pool or 'default', reason)
+        self.processes.grow(pool)
+        self._changed(pool)
+
+    def _shrink(self, pool, loads, reason):
+        process_id = min(loads, key=loads.get)
+        self._info('Drain worker %d of pool %s, %s.',
+                   process_id, pool or 'default', reason)
+        self.processes.shrink(process_id)
+        self._changed(pool)
+
+    def scale_pool(self, pool):
+        """Add or remove worker of given pool if needed."""
+        config = self.processes.factories[pool].config
+        loads = self.loads(pool)
+        if not loads:
+            return
+        samples = self.samples.get(pool)
+        if samples is None:
+            samples = self.samples[pool] = deque(maxlen=self.window)
+        samples.append(sum(itervalues(loads)) / len(loads))
+        latency = self.latency(pool)
+        backlog = self.backlog(pool)
+        size = self.processes.sizes[pool]
+        min_workers, max_workers = self.bounds(config)
+        if size < min_workers:
+            self._grow(pool, 'pool smaller than {0:d}'.format(min_workers))
+        elif size > max_workers:
+            self._shrink(pool, loads,
+                         'pool larger than {0:d}'.format(max_workers))
+        elif len(samples) < self.window:
+            return
+        else:
+            load = sum(samples) / len(samples)
+            reason = 'load {0:.2f}, latency {1:.1f} ms, backlog {2:d}' \
+                .format(load, latency, backlog)
+            if size < max_workers \
+                    and self._busy(config, load, latency, backlog) \
+                    and self._cooled(pool, config.AUTOSCALE_UP_COOLDOWN):
+                self._grow(pool, reason)
+            elif size > min_workers \
+                    and self._idle(config, load, latency, backlog) \
+                    and self._cooled(pool, config.AUTOSCALE_DOWN_COOLDOWN):
+                self._shrink(pool, loads, reason)
+
+    def scale(self):
+        """Add or remove workers if needed."""
+        processes = self.processes
+        if processes.draining or not processes.is_ready() or \
+                (self.reloader is not None and self.reloader.reloading):
+            # Pool is changing now, measure it later.
+            return
+        for process_id in set(self._timers).difference(processes):
+            del self._timers[process_id]
+        for pool, factory in list(iteritems(processes.factories)):
+            if factory.config.AUTOSCALE:
+                self.scale_pool(pool)
+
+    def _loop_cb(self, handle):
+        self.scale()
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    @in_loop
+    def start(self):
+        if not self.enabled:
+            return
+        self._timer.start(self._loop_cb, self.interval, self.interval)
+
+    @in_loop
+    def stop(self):
+        del self._timer
+        self.samples.clear()
+
+
+class AutoscalerComponent(StartStopComponent):
+
+    name = 'manager.autoscaler'
+    requires = ('loop', 'processes', 'reloader')
+
+    def create(self, parent):
+        return Autoscaler(parent.app, parent.processes, parent.reloader)
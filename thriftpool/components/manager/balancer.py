@@ -0,0 +1,165 @@
+"""Distribute connections across workers by their load."""
+from __future__ import absolute_import
+
+import logging
+import time
+
+from pyuv import Timer
+from six import iteritems
+
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+from thriftworker.utils.decorators import cached_property
+
+from thriftpool.utils.mixin import LogsMixin
+from thriftpool.components.base import StartStopComponent
+
+logger = logging.getLogger(__name__)
+
+
+def overloaded(loads, threshold):
+    """Return set of workers which load exceeds load of least loaded worker
+    more than given threshold.
+
+    :param loads: dictionary that maps process id to number of in-flight
+        requests
+
+    """
+    if len(loads) < 2:
+        return set()
+    least = min(loads.values())
+    return set(pid for pid, load in iteritems(loads)
+               if load - least > threshold)
+
+
+class Balancer(LogsMixin, LoopMixin):
+    """All workers accept connections from the same listening socket, so
+    kernel wakes any of them regardless of how busy it is. Periodically
+    compare number of in-flight requests reported by workers and pause
+    acceptors of workers that are far busier than least loaded one, so new
+    connections go to workers that can serve them sooner. Workers are
+    compared only with workers of the same pool. Paused worker is paused
+    again only when its gauges show that it resumed accepting itself.
+
+    """
+
+    def __init__(self, app, listeners, processes):
+        self.app = app
+        self.listeners = listeners
+        self.processes = processes
+        #: Time when each paused worker was paused last time.
+        self.paused = {}
+        super(Balancer, self).__init__()
+
+    @property
+    def enabled(self):
+        # Connections queued to paused worker's own socket would wait.
+        return self.app.config.ACCEPT_BALANCING and \
+            not self.processes.reuse_port
+
+    @property
+    def interval(self):
+        return self.app.config.ACCEPT_BALANCE_INTERVAL
+
+    @property
+    def threshold(self):
+        return self.app.config.ACCEPT_BALANCE_THRESHOLD
+
+    def gauges(self, pool):
+        """Return gauges of each ready worker of given pool."""
+        processes = self.processes
+        result = {}
+        for pid in processes.members(pool):
+            if pid not in processes.broker or pid in processes.draining:
+                continue
+            gauges = processes.read_gauges(pid)
+            if gauges is not None:
+                result[pid] = gauges
+        return result
+
+    def _toggle(self, pid, method):
+        """Call given acceptor method of worker for all started listeners
+        of its pool.
+
+        """
+        names = [listener.name for listener
+                 in self.processes.listeners_of(self.processes.pool_of(pid))
+                 if listener.started]
+        if not names:
+            return
+
+        def inner_toggle(proxy):
+            for name in names:
+                getattr(proxy, method)(name)
+
+        self.processes.broker[pid].spawn(inner_toggle)
+
+    def balance(self):
+        """Pause overloaded workers and resume others."""
+        gauges, loads, overloaded_pids = {}, {}, set()
+        for pool in self.processes.factories:
+            pool_gauges = self.gauges(pool)
+            pool_loads = dict((pid, item['active'] + item['queued'])
+                              for pid, item in iteritems(pool_gauges))
+            gauges.update(pool_gauges)
+            loads.update(pool_loads)
+            overloaded_pids |= overloaded(pool_loads, self.threshold)
+        paused = self.paused
+        # Forget about exited workers.
+        for pid in set(paused) - set(loads):
+            del paused[pid]
+        for pid in set(paused) - overloaded_pids:
+            self._debug('Resume accepting in worker %d, load %d.',
+                        pid, loads[pid])
+            self._toggle(pid, 'start_acceptor')
+            del paused[pid]
+        now = time.time()
+        for pid in overloaded_pids:
+            paused_at = paused.get(pid)
+            if paused_at is None:
+                self._debug('Pause accepting in worker %d, load %d.',
+                            pid, loads[pid])
+            elif gauges[pid]['accepting'] and \
+                    gauges[pid]['updated'] > paused_at:
+                # Worker resumes acceptors itself when its queue drains.
+                self._debug('Pause accepting in worker %d again, load %d.',
+                            pid, loads[pid])
+            else:
+                continue
+            self._toggle(pid, 'stop_acceptor')
+            paused[pid] = now
+
+    def _loop_cb(self, handle):
+        try:
+            self.balance()
+        except Exception as exc:
+            self._exception(exc)
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    @in_loop
+    def start(self):
+        if not self.enabled:
+            return
+        self._timer.start(self._loop_cb, self.interval, self.interval)
+
+    @in_loop
+    def stop(self):
+        del self._timer
+        self.paused.clear()
+
+
+class BalancerComponent(StartStopComponent):
+
+    name = 'manager.balancer'
+    requires = ('loop', 'listeners', 'processes', 'acceptors')
+
+    def create(self, parent):
+        return Balancer(parent.app, parent.listeners, parent.processes)
@@ -1,19 +1,121 @@
 """Contains component that hold listener pool."""
 from __future__ import absolute_import
 
+import errno
+import fcntl
 import logging
+import os
+import socket
+
+from pyuv import Pipe
+
+from thriftworker.exceptions import BindError
+from thriftworker.listener import Listener
+from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.other import get_addresses_from_pool
 
 from thriftpool.components.base import StartStopComponent
+from thriftpool.utils.platforms import reuseport_socket, accept_queue
 
 logger = logging.getLogger(__name__)
 
 
+class InheritableListener(Listener):
+    """Listener that can adopt socket bound by previous manager."""
+
+    #: Was socket inherited from previous manager?
+    inherited = False
+
+    #: Should socket listen or only reserve address?
+    listening = True
+
+    #: Lowest descriptor passed to workers. Inherited sockets get low
+    #: numbers and would be overwritten by worker's streams on spawn.
+    min_channel_fd = 64
+
+    @cached_property
+    def channel(self):
+        fd = fcntl.fcntl(self.socket.fileno(), fcntl.F_DUPFD,
+                         self.min_channel_fd)
+        pipe = Pipe(self.loop)
+        pipe.open(fd)
+        return pipe
+
+    @property
+    def queued(self):
+        """Return number of connections that wait in accept queue or
+        :const:`None` if socket doesn't listen or platform doesn't report
+        it.
+
+        """
+        if not (self.started and self.listening):
+            return None
+        queue = accept_queue(self.socket)
+        return queue[0] if queue is not None else None
+
+    def adopt(self, fd):
+        """Use given bound socket instead of creating new one."""
+        sock = socket.fromfd(fd, socket.AF_INET, socket.SOCK_STREAM)
+        os.close(fd)
+        self.socket = sock
+        self.inherited = True
+
+    def _bind(self):
+        """Bind socket to first free address from pool."""
+        sock = self.socket
+        for address in get_addresses_from_pool(self.name, self.address,
+                                               self.app.port_range):
+            try:
+                sock.bind(address)
+            except socket.error as exc:
+                if exc.errno != errno.EADDRINUSE:
+                    raise
+            else:
+                return
+        raise BindError("Service {0!r} can't bind to address {1!r}"
+                        .format(self.name, self.address))
+
+    @in_loop
+    def start(self):
+        """Bind listener to given port if socket wasn't inherited."""
+        if not self.inherited:
+            self._bind()
+        if self.listening:
+            self.socket.listen(self.backlog)
+        self.started = True
+
+
+class ReusePortListener(InheritableListener):
+    """Only reserve address for workers. Socket is bound but never listens,
+    so kernel doesn't route connections to it, each worker binds own
+    socket to the same address instead.
+
+    """
+
+    listening = False
+
+    @cached_property
+    def socket(self):
+        return reuseport_socket()
+
+    @in_loop
+    def stop(self):
+        self.socket.close()
+        self.started = False
+
+
 class ListenersComponent(StartStopComponent):
 
     name = 'manager.listeners'
 
     def create(self, parent):
-        listeners = parent.listeners = parent.app.thriftworker.listeners
+        thriftworker = parent.app.thriftworker
+        listeners = parent.listeners = thriftworker.listeners
+        listeners.Listener = thriftworker.subclass_with_self(
+            ReusePortListener
+            if parent.app.config.LISTEN_MODE == 'reuseport'
+            else InheritableListener)
         for slot in parent.app.slots:
             name, host, port, backlog = slot.name, slot.listener.host, \
                 slot.listener.port, slot.listener.backlog
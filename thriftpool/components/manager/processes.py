@@ -1,13 +1,17 @@
 """Manage process pool."""
 from __future__ import absolute_import
 
+import errno
 import logging
 import sys
 import os
+import tempfile
+from functools import partial
 
+from gaffer.error import ProcessNotFound
 from gaffer.process import ProcessConfig
 from pyuv import Pipe
-from six import iteritems
+from six import iteritems, itervalues
 
 from thriftworker.utils.loop import in_loop, loop_delegate
 from thriftworker.utils.decorators import cached_property
@@ -16,7 +20,11 @@ from thriftworker.utils.mixin import LoopMixin
 from thriftpool.components.base import StartStopComponent
 from thriftpool.components.utils import Waiter
 from thriftpool.rpc.broker import Broker
-from thriftpool.utils.serializers import StreamSerializer
+from thriftpool.signals import worker_spawned, worker_lost, \
+    worker_ready, worker_exited
+from thriftpool.utils.handshake import Handshake, STAGES, STAGE_STARTED
+from thriftpool.utils.metrics import MetricsRegion
+from thriftpool.utils.platforms import get_cpu_set
 
 logger = logging.getLogger(__name__)
 
@@ -57,8 +65,8 @@ class ManagerMixin(object):
 class ProcessFactory(ManagerMixin, LoopMixin):
     """Encapsulate process creation logic."""
 
-    #: Specify which serializer should we use.
-    Serializer = StreamSerializer
+    #: Specify how application is passed to worker.
+    Handshake = Handshake
 
     #: Name of session to use.
     session_name = 'thriftpool'
@@ -69,12 +77,23 @@ class ProcessFactory(ManagerMixin, LoopMixin):
     #: specify worker initialization string
     initialize_script = 'from thriftpool.bin.thriftworker import main; main();'
 
-    def __init__(self, app, broker, setup_callback=None, teardown_callback=None):
+    #: Streams created for worker besides standard ones.
+    custom_streams = ['handshake', 'incoming', 'outgoing']
+
+    def __init__(self, app, broker, setup_callback=None, teardown_callback=None,
+                 zygote=None, pool=None, spawn_callback=None):
         self.app = app
         self.broker = broker
-        self.serializers = self.Serializer()
+        self.zygote = zygote
+        self.pool = pool
+        #: Configuration of workers pool.
+        self.config = app.pool_config(pool)
+        if pool is not None:
+            self.job_name = '{0}-{1}'.format(self.job_name, pool)
+        self.handshake = self.Handshake()
         self.setup_callback = setup_callback
         self.teardown_callback = teardown_callback
+        self.spawn_callback = spawn_callback
         super(ProcessFactory, self).__init__()
 
     @property
@@ -92,16 +111,22 @@ class ProcessFactory(ManagerMixin, LoopMixin):
 
     def create_config(self, channels):
         """Create worker's process configuration."""
-        config = self.app.config
+        config = self.config
+        if self.zygote is not None:
+            # Launcher passes all its streams and channels to worker.
+            args = self.zygote.launcher_args(
+                3 + len(self.custom_streams) + len(channels))
+        else:
+            args = ['-c', '{0}'.format(self.command)]
         return ProcessConfig(
             name=self.job_name,
             cmd=sys.executable,
-            args=['-c', '{0}'.format(self.command)],
+            args=args,
             env=dict(os.environ, IS_WORKER='1'),
             numprocesses=config.WORKERS,
             redirect_input=True,
             redirect_output=['out', 'err'],
-            custom_streams=['handshake', 'incoming', 'outgoing'],
+            custom_streams=self.custom_streams,
             custom_channels=channels,
             graceful_timeout=config.PROCESS_STOP_TIMEOUT,
         )
@@ -141,26 +166,36 @@ class ProcessFactory(ManagerMixin, LoopMixin):
 
     def _do_handshake(self, process):
         """Transfer main application to worker."""
-        # Pass application to created process.
+        # Pass application and name of pool to created process.
         stream = process.streams['handshake']
-        stream.write(self.serializers.encode_with_length(self.app))
-
-        def handshake_done(*args):
-            stream.unsubscribe(handshake_done)
-            # Process exited and we will do same.
-            if not process.active:
+        stream.write(self.handshake.encode(self.app, self.pool))
+
+        def handshake_progress(evtype, msg):
+            # Worker reports each startup stage with one byte.
+            for stage in msg['data']:
+                logger.debug('Worker %d: %s.', process.pid,
+                             STAGES.get(stage, repr(stage)))
+                if stage != STAGE_STARTED:
+                    continue
+                stream.unsubscribe(handshake_progress)
+                # Process exited and we will do same.
+                if not process.active:
+                    return
+                self.broker.register(process, callback=self.setup_callback)
                 return
-            self.broker.register(process, callback=self.setup_callback)
 
         # Wait for worker answer.
-        stream.subscribe(handshake_done)
+        stream.subscribe(handshake_progress)
 
     def _handle_spawn(self, pid, os_pid, **kwargs):
         """Handle spawn event here."""
         logger.info('Worker %d spawned with pid %d.', pid, os_pid)
         process = self.manager.get_process(pid)
+        process.pool = self.pool
         self._setup_io_redirect(process)
         self._do_handshake(process)
+        if self.spawn_callback is not None:
+            self.spawn_callback(process)
 
     def _on_event(self, evtype, msg):
         """Handle process events."""
@@ -180,6 +215,19 @@ class ProcessFactory(ManagerMixin, LoopMixin):
             .bind_all(self._on_event)
         manager.start_job(self.process_name)
 
+    def scale(self, n):
+        """Change number of processes in pool by given amount."""
+        return self.manager.scale(self.process_name, n)
+
+    def retire(self, pid):
+        """Stop process and shrink pool, so it isn't respawned."""
+        try:
+            self.manager.stop_process(pid)
+        except ProcessNotFound:
+            return False
+        self.scale(-1)
+        return True
+
     def teardown(self):
         """Teardown bootstrapper. Remove processes from manager."""
         self.manager.unload(self.job_name, sessionid=self.session_name)
@@ -194,19 +242,46 @@ class ProcessManager(ManagerMixin, LoopMixin):
     #: Which class should be used to pass commands to processes.
     Broker = Broker
 
+    #: Which class should be used to share metrics with processes.
+    Region = MetricsRegion
+
     #: How worker process should be named.
     name_template = '[thriftworker-{0}] -c {1.CONCURRENCY} -k {1.WORKER_TYPE}'
 
+    #: How file with worker's metrics should be named.
+    metrics_template = 'thriftpool-{0}-{1}.metrics'
+
     def __init__(self, app, listeners, controller):
         self.app = app
         self.listeners = listeners
         self.controller = controller
 
         broker = self.broker = self.Broker(self.app)
-        self.factory = self.Factory(self.app, broker,
-            setup_callback=self.setup_cb, teardown_callback=self.teardown_cb)
+        zygote = getattr(controller, 'zygote', None)
+        #: Factories of worker pools by pool name, slots without pool are
+        #: served by default pool named :const:`None`.
+        self.factories = {}
+        for pool in (self.app.slots.pools or [None]):
+            self.factories[pool] = self.Factory(self.app, broker,
+                setup_callback=self.setup_cb,
+                teardown_callback=self.teardown_cb,
+                spawn_callback=self.spawn_cb,
+                zygote=zygote, pool=pool)
 
         self._bootstrapped = {}
+        self._regions = {}
+        self._retired = set()
+        self._cpu_slots = {}
+        self.draining = set()
+        self._stopping = False
+        self._serving = False
+
+        #: How many initialized workers exited while pool was running.
+        self.restarts = 0
+
+        #: How many workers each pool should have.
+        self.sizes = {pool: factory.config.WORKERS
+                      for pool, factory in iteritems(self.factories)}
 
         self._start_waiter = Waiter(
             timeout=self.app.config.PROCESS_START_TIMEOUT)
@@ -223,30 +298,286 @@ class ProcessManager(ManagerMixin, LoopMixin):
         """Return registered process."""
         return self._bootstrapped.get(process_id)
 
+    def pool_of(self, process_id):
+        """Return name of pool given process belongs to."""
+        return self._bootstrapped[process_id].pool
+
+    def config_of(self, process_id):
+        """Return configuration of pool given process belongs to."""
+        return self.factories[self.pool_of(process_id)].config
+
+    def members(self, pool):
+        """Return processes of given pool."""
+        return [process_id for process_id, process
+                in iteritems(self._bootstrapped) if process.pool == pool]
+
+    def listeners_of(self, pool):
+        """Return listeners of slots served by given pool."""
+        slots = self.app.slots
+        return [listener for listener in self.listeners
+                if slots[listener.name].pool == pool]
+
+    def _sleep(self, seconds):
+        """Suspend current greenlet."""
+        hub = self.app.hub
+        waiter = hub.Waiter()
+        hub.call_later(seconds, waiter.switch, None)
+        waiter.get()
+
+    def drain(self, process_id, callback):
+        """Ask process to stop accepting connections and to finish
+        existed ones, call given callback when process is drained or
+        ``WORKER_DRAIN_TIMEOUT`` expired.
+
+        """
+        if process_id not in self._bootstrapped \
+                or process_id in self.draining:
+            return
+        if process_id not in self.broker:
+            callback()
+            return
+        self.draining.add(process_id)
+        config = self.app.config
+        interval = config.WORKER_DRAIN_INTERVAL
+
+        def inner_drain(proxy):
+            started = self.loop.now()
+            grace = started + config.WORKER_DRAIN_GRACE * 1000
+            deadline = started + config.WORKER_DRAIN_TIMEOUT * 1000
+            try:
+                remaining = proxy.drain()
+                while remaining and self.loop.now() < deadline:
+                    self._sleep(interval)
+                    # Give clients a chance to close connections
+                    # themselves, closing idle ones may race with request.
+                    remaining = proxy.drain(
+                        close_idle=self.loop.now() >= grace)
+            except Exception as exc:
+                logger.warning('Can\'t drain worker %d: %s', process_id, exc)
+            else:
+                if remaining:
+                    logger.warning('Worker %d not drained, %d connections'
+                                   ' left.', process_id, remaining)
+                else:
+                    logger.info('Worker %d drained.', process_id)
+            finally:
+                self.draining.discard(process_id)
+                self.broker.unregister(process_id)
+                callback()
+
+        self.broker[process_id].spawn(inner_drain)
+
     def eliminate(self, process_id):
-        """Unregister and stop process."""
+        """Drain and stop process, pool spawns new one instead."""
         process = self[process_id]
         if process is None:
             return
-        self.broker.unregister(process_id)
-        process.stop()
+
+        def stop():
+            if process.active:
+                process.stop()
+
+        self.drain(process_id, stop)
+
+    def retire(self, process_id):
+        """Drain and stop process which replacement already works.
+        Unlike :meth:`eliminate` pool shrinks, so process isn't respawned.
+
+        """
+        if process_id not in self._bootstrapped:
+            return
+        factory = self.factories[self.pool_of(process_id)]
+
+        def stop():
+            if factory.retire(process_id):
+                self._retired.add(process_id)
+
+        self.drain(process_id, stop)
+
+    def discard(self, process_id, pool):
+        """Stop process of given pool that isn't needed anymore and shrink
+        pool. Unlike :meth:`retire` process isn't drained, so it shouldn't
+        serve requests yet.
+
+        """
+        if self.factories[pool].retire(process_id):
+            self._retired.add(process_id)
+
+    @property
+    def metrics_dir(self):
+        """Directory where metrics regions are created."""
+        directory = self.app.config.METRICS_DIR
+        if directory is None:
+            directory = '/dev/shm' if os.path.isdir('/dev/shm') \
+                else tempfile.gettempdir()
+        return directory
+
+    def _create_region(self, process_id):
+        """Create metrics region for given process."""
+        self._remove_region(process_id)
+        path = os.path.join(self.metrics_dir,
+                            self.metrics_template.format(os.getpid(), process_id))
+        region = self._regions[process_id] = \
+            self.Region.create(path, self.app.config.METRICS_CAPACITY)
+        return region
+
+    def _remove_region(self, process_id):
+        """Close and remove metrics region of given process."""
+        region = self._regions.pop(process_id, None)
+        if region is None:
+            return
+        region.close()
+        try:
+            os.unlink(region.path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+    def read_metrics(self, process_id):
+        """Return metrics published by given process or :const:`None`."""
+        region = self._regions.get(process_id)
+        if region is None:
+            return None
+        return region.read()
+
+    def read_gauges(self, process_id):
+        """Return load gauges published by given process or
+        :const:`None`.
+
+        """
+        region = self._regions.get(process_id)
+        if region is None:
+            return None
+        return region.read_gauges()
+
+    @property
+    def reuse_port(self):
+        """Do workers listen own sockets or inherit manager's one?"""
+        return self.app.config.LISTEN_MODE == 'reuseport'
+
+    def enable_acceptor(self, proxy, listener):
+        """Make worker accept connections of given started listener."""
+        if self.reuse_port:
+            proxy.listen_acceptor(listener.name,
+                                  (listener.host, listener.port),
+                                  listener.backlog)
+        proxy.start_acceptor(listener.name)
+
+    def _spawn_for(self, listener, run):
+        """Run given function for each worker that serves listener."""
+        for process_id in self.members(self.app.slots[listener.name].pool):
+            if process_id in self.broker:
+                self.broker[process_id].spawn(run)
+
+    def start_listener(self, listener):
+        """Make workers of listener's pool accept its connections."""
+        self._spawn_for(listener,
+                        partial(self.enable_acceptor, listener=listener))
+
+    def stop_listener(self, listener):
+        """Make workers of listener's pool stop accepting connections."""
+        self._spawn_for(listener,
+                        lambda proxy: proxy.stop_acceptor(listener.name))
 
     def is_ready(self):
         """Are all workers started or not?"""
-        return len(self) >= self.app.config.WORKERS
+        return all(len(self.members(pool)) >= size
+                   for pool, size in iteritems(self.sizes))
+
+    def scale(self, pool, n):
+        """Change number of processes in given pool by given amount."""
+        return self.factories[pool].scale(n)
+
+    def grow(self, pool):
+        """Add one more worker to given pool."""
+        self.sizes[pool] += 1
+        self.scale(pool, 1)
+
+    def shrink(self, process_id):
+        """Remove given worker from its pool."""
+        if process_id not in self._bootstrapped \
+                or process_id in self.draining:
+            return
+        self.sizes[self.pool_of(process_id)] -= 1
+        self.retire(process_id)
+
+    def _pin(self, proxy, process_id):
+        """Pin process to CPUs of first free slot."""
+        mode = self.app.config.WORKER_CPU_AFFINITY
+        if mode is None:
+            return
+        used = set(itervalues(self._cpu_slots))
+        index = self._cpu_slots[process_id] = \
+            next(i for i in range(len(used) + 1) if i not in used)
+        try:
+            proxy.set_cpu_affinity(get_cpu_set(mode, index))
+        except Exception as exc:
+            logger.error('Can\'t pin worker %d to CPUs: %s', process_id, exc)
+
+    def _probe(self, proxy, process):
+        """Wait until handlers of process are ready. Process that isn't
+        ready in time is stopped, so pool starts new one.
+
+        """
+        config = self.app.config
+        deadline = self.loop.now() + config.PROCESS_START_TIMEOUT * 1000
+        while process.active and not self._stopping:
+            try:
+                if proxy.probe():
+                    return True
+            except Exception as exc:
+                logger.warning('Can\'t probe worker %d: %s', process.pid, exc)
+            if self.loop.now() >= deadline:
+                logger.error('Worker %d not ready after %.1f seconds,'
+                             ' restart it.', process.pid,
+                             config.PROCESS_START_TIMEOUT)
+                process.stop()
+                break
+            self._sleep(config.WORKER_READY_INTERVAL)
+        return False
+
+    def is_serving(self):
+        """Are enough workers of each pool ready to serve?"""
+        for pool, size in iteritems(self.sizes):
+            needed = self.factories[pool].config.WORKERS_READY
+            needed = size if needed is None else min(needed, size)
+            if len(self.members(pool)) < needed:
+                return False
+        return True
 
     def setup_cb(self, proxy, process):
+        config = self.factories[process.pool].config
+        listeners = self.listeners_of(process.pool)
+
         # Change name of process.
-        name = self.name_template.format(process.pid, self.app.config)
+        name = self.name_template.format(process.pid, config)
         proxy.change_title(name)
 
-        # Register acceptors in remote process.
-        proxy.register_acceptors({i: listener.name
-            for i, listener in iteritems(self.listeners.enumerated)})
+        # Keep worker's caches on the same cores.
+        self._pin(proxy, process.pid)
+
+        # Share metrics through memory instead of rpc.
+        try:
+            region = self._create_region(process.pid)
+        except (OSError, IOError) as exc:
+            logger.error('Can\'t create metrics region for worker %d: %s',
+                         process.pid, exc)
+        else:
+            proxy.attach_metrics(region.path)
+
+        # Register acceptors in remote process, it gets channels of its
+        # pool's listeners in the same order.
+        if not self.reuse_port:
+            proxy.register_acceptors({i: listener.name
+                for i, listener in enumerate(listeners)})
 
-        for listener in self.listeners:
+        # Don't give connections to worker until its handlers are ready.
+        if not self._probe(proxy, process):
+            return
+
+        for listener in listeners:
             if listener.started:
-                proxy.start_acceptor(listener.name)
+                self.enable_acceptor(proxy, listener)
 
         # Set startup time for process.
         process.startup_time = self.loop.now()
@@ -254,24 +585,51 @@ class ProcessManager(ManagerMixin, LoopMixin):
         # Notify about process initialization.
         self._bootstrapped[process.pid] = process
         logger.info('Worker %d initialized.', process.pid)
+        worker_ready.send(sender=self, process_id=process.pid)
         if self.is_ready():
             self.ready_cb()
+        elif self.is_serving():
+            self.serving_cb()
+
+    def spawn_cb(self, process):
+        worker_spawned.send(sender=self, process_id=process.pid,
+                            pool=process.pool)
 
     def teardown_cb(self, pid):
         try:
             self._bootstrapped.pop(pid)
         except KeyError:
-            pass
+            worker_lost.send(sender=self, process_id=pid)
+        else:
+            if not self._stopping and pid not in self._retired:
+                self.restarts += 1
+            worker_exited.send(sender=self, process_id=pid)
+        self._retired.discard(pid)
+        self._cpu_slots.pop(pid, None)
+        self._remove_region(pid)
 
     def ready_cb(self, *args):
         logger.info('Workers initialization done.')
+        self.serving_cb()
+
+    def serving_cb(self, *args):
+        if self._serving:
+            return
+        self._serving = True
+        if not self.is_ready():
+            logger.info('%d of %d workers ready, start serving.',
+                        len(self), sum(itervalues(self.sizes)))
         self._start_waiter.done()
 
     def start(self):
 
         @loop_delegate
         def async_start():
-            self.factory.setup(self.listeners.channels)
+            for pool, factory in iteritems(self.factories):
+                # Workers bind own sockets, nothing to inherit.
+                channels = [] if self.reuse_port else \
+                    [listener.channel for listener in self.listeners_of(pool)]
+                factory.setup(channels)
 
         async_start()
         self._start_waiter.wait_or_terminate(
@@ -279,7 +637,11 @@ class ProcessManager(ManagerMixin, LoopMixin):
 
     @in_loop
     def stop(self):
-        self.factory.teardown()
+        self._stopping = True
+        for factory in itervalues(self.factories):
+            factory.teardown()
+        for process_id in list(self._regions):
+            self._remove_region(process_id)
 
     def abort(self):
         self._start_waiter.abort()
@@ -288,7 +650,7 @@ class ProcessManager(ManagerMixin, LoopMixin):
 class ProcessManagerComponent(StartStopComponent):
 
     name = 'manager.processes'
-    requires = ('loop', 'gaffer', 'listeners')
+    requires = ('loop', 'gaffer', 'listeners', 'zygote')
 
     def create(self, parent):
         processes = parent.processes = \
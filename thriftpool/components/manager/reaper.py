@@ -2,8 +2,11 @@
 from __future__ import absolute_import
 
 import logging
+import random
 
+import psutil
 from pyuv import Timer
+from six import iteritems, itervalues
 
 from thriftworker.utils.loop import in_loop
 from thriftworker.utils.mixin import LoopMixin
@@ -16,40 +19,127 @@ logger = logging.getLogger(__name__)
 
 
 class Reaper(LogsMixin, LoopMixin):
+    """Recycle workers that live too long, served too many requests or
+    use too much memory. Only worst offender is reaped at once. Limits of
+    each worker are lowered by own random factor and delay after reaping
+    is randomized, so workers started together don't restart together.
+    Limits are taken from configuration of worker's pool.
+
+    """
 
     #: How often (in seconds) we should check for process lifetime?
     resolution = 1.0
 
+    #: Name of counter that holds number of served requests.
+    requests_counter = 'response_served'
+
     def __init__(self, app, processes):
         self.app = app
         self.processes = processes
+        self._factors = {}
         super(Reaper, self).__init__()
 
+    @staticmethod
+    def limits(config):
+        """Return process time to live, maximal resident memory of process
+        in bytes and how many requests process may serve.
+
+        """
+        max_rss = config.WORKER_MAX_RSS
+        return (config.WORKER_TTL,
+                max_rss * 1024 * 1024 if max_rss is not None else None,
+                config.WORKER_MAX_REQUESTS)
+
     @property
-    def ttl(self):
-        """Process time to live."""
-        return self.app.config.WORKER_TTL
+    def jitter(self):
+        return self.app.config.WORKER_REAP_JITTER
 
     @property
     def repeat_delay(self):
         """Prevent to frequent process reaping."""
         return self.app.config.WORKER_REAP_DELAY
 
+    @property
+    def enabled(self):
+        return any(limit is not None
+                   for factory in itervalues(self.processes.factories)
+                   for limit in self.limits(factory.config))
+
+    def _factor(self, process_id):
+        """Return random factor applied to limits of given process."""
+        try:
+            return self._factors[process_id]
+        except KeyError:
+            factor = self._factors[process_id] = \
+                1.0 - random.uniform(0.0, self.jitter)
+            return factor
+
+    def rss(self, process_id):
+        """Return resident memory of given process in bytes."""
+        # Forked worker isn't process spawned by manager, use PID that
+        # worker published itself.
+        gauges = self.processes.read_gauges(process_id)
+        pid = gauges['pid'] if gauges is not None \
+            else self.processes[process_id].os_pid
+        try:
+            return psutil.Process(pid).get_memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    def requests(self, process_id):
+        """Return number of requests served by given process."""
+        metrics = self.processes.read_metrics(process_id)
+        if metrics is None:
+            return None
+        served = metrics['counters'].get(self.requests_counter)
+        return served['count'] if served else 0
+
+    def usage(self, process_id):
+        """Return which part of each limit given process has used, limit
+        is exceeded when part reaches one.
+
+        """
+        process = self.processes[process_id]
+        factor = self._factor(process_id)
+        ttl, max_rss, max_requests = \
+            self.limits(self.processes.config_of(process_id))
+        usage = {}
+        if ttl is not None:
+            lifetime = (self.loop.now() - process.startup_time) / 1000.0
+            usage['lifetime'] = lifetime / (ttl * factor)
+        if max_rss is not None:
+            rss = self.rss(process_id)
+            if rss is not None:
+                usage['memory'] = rss / (max_rss * factor)
+        if max_requests is not None:
+            requests = self.requests(process_id)
+            if requests is not None:
+                usage['requests'] = requests / (max_requests * factor)
+        return usage
+
     def _loop_cb(self, handle):
-        self._timer.repeat = self.resolution
         processes = self.processes
         if not processes.is_ready() or not len(processes):
             # Not process to reap or to early to reap.
             return
-        # Always get first process id.
-        process_id = sorted(processes)[0]
-        lifetime = (self.loop.now() - processes[process_id].startup_time) // 1000
-        if self.ttl > lifetime:
+        for process_id in set(self._factors).difference(processes):
+            del self._factors[process_id]
+        victim, reason, worst = None, None, 1.0
+        for process_id in processes:
+            if process_id in processes.draining:
+                continue
+            for name, part in iteritems(self.usage(process_id)):
+                if part >= worst:
+                    victim, reason, worst = process_id, name, part
+        if victim is None:
             # Time not come, maybe later.
             return
-        self._info('Reap process %d after %d seconds...', process_id, lifetime)
-        processes.eliminate(process_id)
-        self._timer.repeat = self.repeat_delay
+        self._info('Reap process %d, %s limit used by %d%%...',
+                   victim, reason, worst * 100)
+        processes.eliminate(victim)
+        # Loop applies new repeat only after next tick, so restart timer.
+        delay = self.repeat_delay * (1.0 + random.uniform(0.0, self.jitter))
+        handle.start(self._loop_cb, delay, self.resolution)
 
     @cached_property
     def _timer(self):
@@ -62,7 +152,7 @@ class Reaper(LogsMixin, LoopMixin):
 
     @in_loop
     def start(self):
-        if self.ttl is None:
+        if not self.enabled:
             return
         self._timer.start(self._loop_cb, self.repeat_delay, self.resolution)
 
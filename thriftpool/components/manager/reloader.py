@@ -0,0 +1,206 @@
+"""Replace all workers without reducing number of serving ones."""
+from __future__ import absolute_import
+
+import logging
+from collections import defaultdict, OrderedDict
+
+from pyuv import Timer
+from six import iteritems, itervalues
+
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+from thriftworker.utils.decorators import cached_property
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.signals import worker_spawned, worker_lost, \
+    worker_ready, worker_exited
+from thriftpool.utils.mixin import LogsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class Reloader(LogsMixin, LoopMixin):
+    """Rolling reload of workers. Pool is grown by one process, when new
+    worker is initialized one of old workers is stopped gracefully, so
+    number of serving workers never drops below configured one. Not more
+    than given number of replacements are started at once. Replacement is
+    started in pool of old worker.
+
+    Pool is shrunk only by stopping replacements spawned for reload, old
+    workers are never stopped before their replacements are ready.
+
+    """
+
+    def __init__(self, app, processes):
+        self.app = app
+        self.processes = processes
+        #: Old workers that are waiting for replacement.
+        self.pending = []
+        #: Old workers which replacements are starting, mapped to process
+        #: identifiers of replacements or :const:`None` until they spawn.
+        self.replacing = OrderedDict()
+        #: Pools of old workers.
+        self.pools = {}
+        #: Processes spawned while reloading that aren't known to be
+        #: replacements yet, by pool.
+        self.unclaimed = defaultdict(list)
+        #: How many replacements should be stopped on spawn, by pool.
+        self.cancelled = defaultdict(int)
+        super(Reloader, self).__init__()
+
+    @property
+    def concurrency(self):
+        return max(1, self.app.config.WORKER_RELOAD_CONCURRENCY)
+
+    @property
+    def timeout(self):
+        """How long to wait for replacement initialization."""
+        return self.app.config.PROCESS_START_TIMEOUT
+
+    @property
+    def in_flight(self):
+        """How many replacements are starting now."""
+        return len(self.replacing)
+
+    @property
+    def reloading(self):
+        return bool(self.pending or self.replacing)
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    @in_loop
+    def reload(self):
+        """Start replacement of all running workers."""
+        if self.reloading:
+            self._info('Reload of workers already in progress.')
+            return
+        self.pending = sorted(self.processes)
+        self.pools = {process_id: self.processes.pool_of(process_id)
+                      for process_id in self.pending}
+        if not self.pending:
+            return
+        self._info('Reload %d workers, %d at once...',
+                   len(self.pending), self.concurrency)
+        self._spawn()
+
+    def _spawn(self):
+        """Grow pool while there are old workers and free slots."""
+        while self.pending and self.in_flight < self.concurrency:
+            old_id = self.pending.pop(0)
+            self.replacing[old_id] = None
+            self.processes.scale(self.pools[old_id], 1)
+        if self.in_flight:
+            self._timer.start(self._on_timeout, self.timeout, 0)
+        else:
+            self._timer.stop()
+            self._info('Reload of workers done.')
+
+    def _drop(self, old_id):
+        """Stop replacement of given old worker, it isn't needed anymore."""
+        pool = self.pools[old_id]
+        process_id = self.replacing.pop(old_id)
+        if process_id is None and self.unclaimed[pool]:
+            process_id = self.unclaimed[pool].pop()
+        if process_id is None:
+            # Replacement isn't spawned yet, stop it when it is.
+            self.cancelled[pool] += 1
+        else:
+            self.processes.discard(process_id, pool)
+
+    def _on_spawned(self, process_id, pool, **kwargs):
+        if self.cancelled[pool]:
+            self.cancelled[pool] -= 1
+            self.processes.discard(process_id, pool)
+            return
+        if not self.replacing:
+            return
+        for old_id, replacement_id in iteritems(self.replacing):
+            if replacement_id is None and self.pools[old_id] == pool:
+                self.replacing[old_id] = process_id
+                return
+        # Pool respawns exited process, it may be replacement or not.
+        self.unclaimed[pool].append(process_id)
+
+    def _on_lost(self, process_id, **kwargs):
+        for pids in itervalues(self.unclaimed):
+            if process_id in pids:
+                pids.remove(process_id)
+                return
+        for old_id, replacement_id in iteritems(self.replacing):
+            if replacement_id == process_id:
+                # Replacement exited before initialization, pool
+                # respawns it.
+                unclaimed = self.unclaimed[self.pools[old_id]]
+                self.replacing[old_id] = \
+                    unclaimed.pop() if unclaimed else None
+                return
+
+    def _on_ready(self, process_id, **kwargs):
+        for pids in itervalues(self.unclaimed):
+            if process_id in pids:
+                pids.remove(process_id)
+        for old_id, replacement_id in iteritems(self.replacing):
+            if replacement_id == process_id:
+                break
+        else:
+            return
+        del self.replacing[old_id]
+        self._info('Worker %d replaced by worker %d, stop it...',
+                   old_id, process_id)
+        self.processes.retire(old_id)
+        self._spawn()
+
+    def _on_exit(self, process_id, **kwargs):
+        if process_id in self.pending:
+            self.pending.remove(process_id)
+        elif process_id in self.replacing:
+            # Old worker exited itself and was respawned by pool, so its
+            # replacement isn't needed anymore.
+            self._drop(process_id)
+        else:
+            return
+        self._spawn()
+
+    def _on_timeout(self, handle):
+        self._error('Replacement of workers not initialized after %.1f'
+                    ' seconds, reload aborted.', self.timeout)
+        for old_id in list(self.replacing):
+            self._drop(old_id)
+        self.pending = []
+
+    @in_loop
+    def start(self):
+        worker_spawned.connect(self._on_spawned, sender=self.processes)
+        worker_lost.connect(self._on_lost, sender=self.processes)
+        worker_ready.connect(self._on_ready, sender=self.processes)
+        worker_exited.connect(self._on_exit, sender=self.processes)
+
+    @in_loop
+    def stop(self):
+        worker_spawned.disconnect(self._on_spawned, sender=self.processes)
+        worker_lost.disconnect(self._on_lost, sender=self.processes)
+        worker_ready.disconnect(self._on_ready, sender=self.processes)
+        worker_exited.disconnect(self._on_exit, sender=self.processes)
+        del self._timer
+        self.pending = []
+        self.replacing.clear()
+        self.pools = {}
+        self.unclaimed.clear()
+        self.cancelled.clear()
+
+
+class ReloaderComponent(StartStopComponent):
+
+    name = 'manager.reloader'
+    requires = ('loop', 'processes')
+
+    def create(self, parent):
+        reloader = parent.reloader = Reloader(parent.app, parent.processes)
+        return reloader
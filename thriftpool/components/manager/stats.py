@@ -0,0 +1,115 @@
+"""Collect statistics from all workers."""
+from __future__ import absolute_import
+
+import logging
+
+from six import iteritems
+
+from thriftworker.utils.mixin import LoopMixin
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.request.admission import merge_admissions
+from thriftpool.request.histograms import merge_histograms
+from thriftpool.utils.metrics import merge_stats
+from thriftpool.utils.mixin import LogsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCollector(LogsMixin, LoopMixin):
+    """Merge counters and timers of all workers. Shared metrics are used
+    when possible, other workers are asked through broker concurrently.
+    Results are cached for ``STATS_CACHE_TTL`` seconds.
+
+    """
+
+    #: Which remote method returns given section.
+    methods = {'counters': 'get_counters',
+               'execution_timers': 'get_execution_timers',
+               'dispatching_timers': 'get_dispatching_timers',
+               'timeouts': 'get_timeouts',
+               'histograms': 'get_histograms',
+               'admissions': 'get_admissions'}
+
+    #: How data of given section should be merged, statistics of counters
+    #: and timers are merged by default.
+    mergers = {'histograms': merge_histograms,
+               'admissions': merge_admissions}
+
+    def __init__(self, app, processes):
+        self.app = app
+        self.processes = processes
+        self._cache = {}
+        super(StatsCollector, self).__init__()
+
+    @property
+    def ttl(self):
+        """How long (in milliseconds) collected data is valid."""
+        return self.app.config.STATS_CACHE_TTL * 1000
+
+    def gather(self, section):
+        """Return section data for every worker as dictionary
+        keyed by process id. Must be called from greenlet.
+
+        """
+        processes = self.processes
+        gathered, missing = {}, []
+        for pid in processes.broker.keys():
+            metrics = processes.read_metrics(pid)
+            if metrics is None or section not in metrics:
+                missing.append(pid)
+            else:
+                gathered[pid] = metrics[section]
+        if missing:
+            results, errors = processes.broker.map(
+                self.methods[section], pids=missing)
+            for pid, exc in iteritems(errors):
+                self._error('Worker %d failed to return %s: %r',
+                            pid, section, exc)
+            gathered.update(results)
+        return gathered
+
+    def merge(self, section, gathered):
+        """Merge data of all workers. Each merged value contains
+        breakdown by workers.
+
+        """
+        merge = self.mergers.get(section, merge_stats)
+        by_key = {}
+        for pid, data in iteritems(gathered):
+            for key, stats in iteritems(data):
+                by_key.setdefault(key, {})[pid] = stats
+        merged = {}
+        for key, workers in iteritems(by_key):
+            stats = merged[key] = merge(workers.values())
+            stats['workers'] = workers
+        return merged
+
+    def collect(self, section):
+        """Return merged section data, use cache if possible. Must be
+        called from greenlet.
+
+        """
+        now = self.loop.now()
+        cached = self._cache.get(section)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        merged = self.merge(section, self.gather(section))
+        self._cache[section] = (self.loop.now() + self.ttl, merged)
+        return merged
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self._cache.clear()
+
+
+class StatsCollectorComponent(StartStopComponent):
+
+    name = 'manager.stats'
+    requires = ('loop', 'processes')
+
+    def create(self, parent):
+        stats = parent.stats = StatsCollector(parent.app, parent.processes)
+        return stats
@@ -16,18 +16,33 @@ logger = logging.getLogger(__name__)
 class TornadoManager(LoopMixin):
     """Start and stop tornado."""
 
-    def __init__(self, app, processes):
+    def __init__(self, app, processes, stats):
         self.app = app
         self.processes = processes
+        self.stats = stats
+        #: Sockets of endpoints inherited from previous manager, by uri.
+        self.inherited = {}
         super(TornadoManager, self).__init__()
 
+    @property
+    def sockets(self):
+        """Return bound sockets of all started endpoints by uri."""
+        if 'handler' not in self.__dict__:
+            return {}
+        sockets = {}
+        for endpoint in self.handler.endpoints:
+            sockets.update(endpoint.sockets)
+        return sockets
+
     @cached_property
     def handler(self):
         endpoints = self.app.config.TORNADO_ENDPOINTS
         return HttpHandler(
             log_function=self.app.log.log_tornado_request,
-            endpoints=[HttpEndpoint(uri=uri) for uri in endpoints],
+            endpoints=[HttpEndpoint(uri=uri, inherited=self.inherited)
+                       for uri in endpoints],
             processes=self.processes,
+            stats=self.stats,
         )
 
     @in_loop
@@ -43,7 +58,9 @@ class TornadoManager(LoopMixin):
 class TornadoComponent(StartStopComponent):
 
     name = 'manager.tornado'
-    requires = ('loop', 'processes')
+    requires = ('loop', 'processes', 'stats')
 
     def create(self, parent):
-        return TornadoManager(parent.app, parent.processes)
+        tornado = parent.tornado = \
+            TornadoManager(parent.app, parent.processes, parent.stats)
+        return tornado
@@ -0,0 +1,233 @@
+"""Replace running manager with new one without closing listeners."""
+from __future__ import absolute_import
+
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+from pyuv import Timer
+from six import iteritems, itervalues
+
+from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.signals import collect_excluded_fds
+from thriftpool.utils.mixin import LogsMixin
+from thriftpool.utils.platforms import close_fds
+
+logger = logging.getLogger(__name__)
+
+#: Environment variable that maps names of listeners to inherited
+#: descriptors, in ``name=fd;name=fd`` format.
+LISTEN_FDS_ENV = 'THRIFTPOOL_LISTEN_FDS'
+
+#: Environment variable that contains PID of manager being upgraded.
+UPGRADE_FROM_ENV = 'THRIFTPOOL_UPGRADE_FROM'
+
+#: How sockets of http endpoints are named, listeners are named by slot.
+ENDPOINT_TEMPLATE = 'http:{0:d}:{1:d}:{2}'
+
+
+def encode_fds(fds):
+    """Encode mapping of names to descriptors for environment."""
+    return ';'.join('{0}={1:d}'.format(name, fd)
+                    for name, fd in sorted(iteritems(fds)))
+
+
+def decode_fds(value):
+    """Decode mapping of names to descriptors from environment."""
+    fds = {}
+    for item in (value or '').split(';'):
+        name, sep, fd = item.rpartition('=')
+        if sep and name:
+            fds[name] = int(fd)
+    return fds
+
+
+#: Entry of new manager, it runs manager command given as arguments.
+SUCCESSOR_SCRIPT = 'from thriftpool.components.manager.upgrade import' \
+    ' exec_successor; exec_successor()'
+
+
+def exec_successor():
+    """Close descriptors that weren't passed to new manager and replace
+    current process with manager command. Descriptors are closed here
+    because old manager is multithreaded and can't safely run code
+    between fork and exec.
+
+    """
+    argv = sys.argv[1:]
+    close_fds(decode_fds(os.environ.get(LISTEN_FDS_ENV)).values())
+    os.execv(argv[0], argv)
+
+
+def manager_command():
+    """Return command line that starts manager with same arguments."""
+    argv = sys.argv
+    if argv and argv[0] not in ('', '-c'):
+        return [sys.executable] + argv
+    return [sys.executable, '-c',
+            'from thriftpool.bin.thriftpoold import main; main()'] + argv[1:]
+
+
+class Upgrader(LogsMixin, LoopMixin):
+    """Hot upgrade of manager. On request start new manager that inherits
+    bound listeners through descriptors and environment. When new manager
+    starts its workers and acceptors it stops old manager, so old workers
+    finish their requests while new ones already accept connections.
+
+    """
+
+    def __init__(self, app, listeners, tornado, controller):
+        self.app = app
+        self.listeners = listeners
+        self.tornado = tornado
+        self.controller = controller
+        self.successor = None
+        self.predecessor = None
+        self._adopted = []
+        super(Upgrader, self).__init__()
+        self._adopt()
+
+    def _adopt(self):
+        """Use listeners passed by previous manager."""
+        fds = decode_fds(os.environ.pop(LISTEN_FDS_ENV, None))
+        predecessor = os.environ.pop(UPGRADE_FROM_ENV, None)
+        if predecessor is not None:
+            self.predecessor = self.controller.predecessor = int(predecessor)
+        for listener in self.listeners:
+            fd = fds.pop(listener.name, None)
+            if fd is None:
+                continue
+            listener.adopt(fd)
+            self._adopted.append(listener)
+            self._info("Inherit listener for service '%s' with fd %d.",
+                       listener.name, fd)
+        for name, fd in sorted(iteritems(fds)):
+            if name.startswith('http:'):
+                _, family, _, uri = name.split(':', 3)
+                sock = socket.fromfd(fd, int(family), socket.SOCK_STREAM)
+                os.close(fd)
+                sock.setblocking(0)
+                self.tornado.inherited.setdefault(uri, []).append(sock)
+                self._adopted.append(sock)
+                self._info("Inherit endpoint 'http://%s' with fd %d.",
+                           uri, fd)
+            else:
+                # Service was removed from new configuration.
+                self._info("Close inherited listener for unknown service"
+                           " '%s'.", name)
+                os.close(fd)
+        if self._adopted:
+            collect_excluded_fds.connect(self._excluded_fds)
+
+    def _excluded_fds(self, **kwargs):
+        """Don't close adopted sockets on daemonization."""
+        return [getattr(item, 'socket', item).fileno()
+                for item in self._adopted]
+
+    def _descriptors(self):
+        """Return descriptors that new manager should inherit."""
+        fds = {listener.name: listener.socket.fileno()
+               for listener in self.listeners if listener.started}
+        for uri, sockets in iteritems(self.tornado.sockets):
+            for index, sock in enumerate(sockets):
+                name = ENDPOINT_TEMPLATE.format(sock.family, index, uri)
+                fds[name] = sock.fileno()
+        return fds
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    @property
+    def timeout(self):
+        return self.app.config.UPGRADE_TIMEOUT
+
+    def upgrade(self):
+        """Start new manager that inherits listeners."""
+        if self.successor is not None and self.successor.poll() is None:
+            self._error('Upgrade already in progress, new manager %d.',
+                        self.successor.pid)
+            return
+        if not self.controller.is_running:
+            return
+        # Sockets are close-on-exec, their duplicates are inherited.
+        # Entry script of new manager closes other inherited descriptors.
+        fds = {name: os.dup(fd)
+               for name, fd in iteritems(self._descriptors())}
+        env = dict(os.environ)
+        env[LISTEN_FDS_ENV] = encode_fds(fds)
+        env[UPGRADE_FROM_ENV] = str(os.getpid())
+        command = manager_command()
+        self._info('Start new manager: %s', ' '.join(command))
+        try:
+            self.successor = subprocess.Popen(
+                [sys.executable, '-c', SUCCESSOR_SCRIPT] + command, env=env)
+        except OSError as exc:
+            self._error("Can't start new manager: %s", exc)
+            return
+        finally:
+            for fd in itervalues(fds):
+                os.close(fd)
+        self._watch_successor()
+
+    @in_loop
+    def _watch_successor(self):
+        """Kill new manager if it isn't ready in time."""
+        successor = self.successor
+
+        def on_timeout(handle):
+            if successor.poll() is None:
+                self._error('New manager %d not ready after %.1f seconds,'
+                            ' upgrade failed.', successor.pid, self.timeout)
+                successor.kill()
+                successor.wait()
+            elif successor.returncode:
+                self._error('New manager %d exited with status %d,'
+                            ' upgrade failed.', successor.pid,
+                            successor.returncode)
+            else:
+                # Daemonized manager detaches from its parent.
+                self._error('New manager detached but not ready after'
+                            ' %.1f seconds.', self.timeout)
+
+        self._timer.start(on_timeout, self.timeout, 0)
+
+    def start(self):
+        if self.predecessor is None:
+            return
+        # Workers and acceptors are started, old manager can leave.
+        self._info('Stop previous manager %d.', self.predecessor)
+        try:
+            os.kill(self.predecessor, signal.SIGTERM)
+        except OSError as exc:
+            self._error("Can't stop previous manager %d: %s",
+                        self.predecessor, exc)
+        self.predecessor = None
+
+    @in_loop
+    def stop(self):
+        del self._timer
+        collect_excluded_fds.disconnect(self._excluded_fds)
+
+
+class UpgraderComponent(StartStopComponent):
+
+    name = 'manager.upgrade'
+    requires = ('loop', 'listeners', 'processes', 'acceptors', 'tornado')
+
+    def create(self, parent):
+        upgrader = parent.upgrader = Upgrader(
+            parent.app, parent.listeners, parent.tornado, parent)
+        return upgrader
@@ -0,0 +1,206 @@
+"""Start process that forks workers with preloaded application."""
+from __future__ import absolute_import
+
+import errno
+import fcntl
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+
+from pyuv import Pipe, Process, StdIO, UV_INHERIT_FD
+
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.components.utils import Waiter
+from thriftpool.exceptions import SystemTerminate
+from thriftpool.utils import launcher
+from thriftpool.utils.mixin import LogsMixin
+from thriftpool.utils.serializers import StreamSerializer
+from thriftpool.utils.zygote import ZYGOTE_FDS_ENV
+
+logger = logging.getLogger(__name__)
+
+
+class Zygote(LogsMixin, LoopMixin):
+    """Zygote imports application once, workers are forked from it on
+    request of launchers spawned instead of them.
+
+    """
+
+    #: Specify zygote initialization string.
+    initialize_script = 'from thriftpool.bin.thriftzygote import main; main();'
+
+    #: How socket for launchers should be named.
+    path_template = 'thriftpool-{0}.zygote'
+
+    def __init__(self, app):
+        self.app = app
+        self.process = None
+        #: Channel connected to zygote, zygote exits when it's closed and
+        #: all workers exited.
+        self.control = None
+        #: Socket where launchers connect, it's kept open while component
+        #: runs, so launchers wait in its backlog while zygote restarts.
+        self.listener = None
+        #: Has zygote preloaded application?
+        self.ready = False
+        #: Is manager stopping, so zygote shouldn't be restarted?
+        self.stopping = False
+        self.path = os.path.join(tempfile.gettempdir(),
+                                 self.path_template.format(os.getpid()))
+        self._start_waiter = Waiter(
+            timeout=self.app.config.PROCESS_START_TIMEOUT)
+        super(Zygote, self).__init__()
+
+    @property
+    def launcher(self):
+        """Path to script that should be spawned instead of worker."""
+        return os.path.abspath(
+            os.path.splitext(launcher.__file__)[0] + '.py')
+
+    def launcher_args(self, count):
+        """Arguments of launcher that passes given number of its
+        descriptors to worker.
+
+        """
+        return [self.launcher, self.path, str(count)]
+
+    def _unlink(self):
+        try:
+            os.unlink(self.path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+    def _listen(self):
+        """Bind socket for launchers, every zygote gets the same one."""
+        self._unlink()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Only zygote should inherit it.
+            fcntl.fcntl(listener.fileno(), fcntl.F_SETFD, fcntl.FD_CLOEXEC)
+            listener.bind(self.path)
+            listener.listen(128)
+        except Exception:
+            listener.close()
+            raise
+        self.listener = listener
+
+    def _close_listener(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        self._unlink()
+
+    @in_loop
+    def _spawn(self):
+        """Start zygote and pass application to it. Zygote is spawned and
+        watched by loop, so nothing here waits for it.
+
+        """
+        control, remote = socket.socketpair()
+        # Channel must not leak to zygote and other children, otherwise
+        # zygote doesn't see when it's closed.
+        control_fd = os.dup(control.fileno())
+        fcntl.fcntl(control_fd, fcntl.F_SETFD, fcntl.FD_CLOEXEC)
+        control.close()
+        channel = Pipe(self.loop)
+        channel.open(control_fd)
+        # Zygote gets standard streams and its sockets as first
+        # descriptors and closes other inherited ones itself.
+        fds = (0, 1, 2, remote.fileno(), self.listener.fileno())
+        env = dict(os.environ)
+        env[ZYGOTE_FDS_ENV] = '3,4'
+        process = Process(self.loop)
+        try:
+            process.spawn(file=sys.executable,
+                          exit_callback=self._on_exit,
+                          args=['-c', self.initialize_script], env=env,
+                          stdio=[StdIO(fd=fd, flags=UV_INHERIT_FD)
+                                 for fd in fds])
+        except Exception:
+            channel.close()
+            raise
+        finally:
+            remote.close()
+        self.process = process
+        self.control = channel
+        self.ready = False
+        channel.start_read(self._on_control)
+        channel.write(StreamSerializer().encode_with_length(self.app))
+
+    def _close_control(self):
+        if self.control is not None:
+            if not self.control.closed:
+                self.control.close()
+            self.control = None
+
+    def _on_control(self, handle, data, error):
+        if data:
+            # Zygote sends one byte when application is preloaded.
+            self.ready = True
+            self._info('Zygote %d started.', self.process.pid)
+            self._start_waiter.done()
+            return
+        # Zygote is exiting, launchers can't start workers anymore.
+        self._close_control()
+
+    def _on_exit(self, handle, exit_status, term_signal):
+        pid = handle.pid
+        handle.close()
+        self._close_control()
+        if self.stopping:
+            return
+        if not self.ready:
+            self._critical('Zygote %d failed to preload application.', pid)
+            self._start_waiter.done()
+            return
+        # Workers of exited zygote are still supervised by their
+        # launchers, only new workers need new zygote.
+        self._error('Zygote %d exited unexpectedly, restart it...', pid)
+        self._spawn()
+
+    def start(self):
+        self._listen()
+        self._spawn()
+        # Fail fast if application can't be preloaded.
+        self._start_waiter.wait_or_terminate(
+            'Timeout happened when starting zygote.')
+        if not self.ready:
+            raise SystemTerminate()
+
+    @in_loop
+    def stop(self):
+        self.stopping = True
+        # Zygote exits when its workers exit.
+        self._close_control()
+        self._close_listener()
+
+    def abort(self):
+        self.stopping = True
+        self._start_waiter.abort()
+        self._close_listener()
+        process = self.process
+        if process is not None and process.active:
+            try:
+                os.kill(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class ZygoteComponent(StartStopComponent):
+
+    name = 'manager.zygote'
+    requires = ('loop',)
+
+    def include_if(self, parent):
+        return parent.app.config.WORKER_START_METHOD == 'fork'
+
+    def create(self, parent):
+        zygote = parent.zygote = Zygote(parent.app)
+        return zygote
@@ -2,11 +2,36 @@ from __future__ import absolute_import
 
 import logging
 
+from thriftworker.transports.framed import FramedAcceptor
+from thriftworker.utils.loop import in_loop
+
 from thriftpool.components.base import StartStopComponent
 
 logger = logging.getLogger(__name__)
 
 
+class Acceptor(FramedAcceptor):
+    """Acceptor that can be stopped for good. Worker resumes all acceptors
+    after overflow, shut down acceptor stays stopped.
+
+    """
+
+    @property
+    def shut_down(self):
+        """Was acceptor shut down?"""
+        return self._poller.closed
+
+    @in_loop
+    def shutdown(self):
+        """Stop accepting new connections for good, existing connections
+        stay open.
+
+        """
+        poller = self._poller
+        if not poller.closed:
+            poller.close()
+
+
 class AcceptorsComponent(StartStopComponent):
 
     name = 'worker.acceptors'
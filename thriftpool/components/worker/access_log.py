@@ -0,0 +1,65 @@
+"""Periodically write buffered access log."""
+from __future__ import absolute_import
+
+import logging
+
+from pyuv import Timer
+
+from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.utils.mixin import LogsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogFlusher(LogsMixin, LoopMixin):
+    """Flush access log buffer every ``ACCESS_LOG_FLUSH_INTERVAL``
+    seconds.
+
+    """
+
+    def __init__(self, app, access_log):
+        self.app = app
+        self.access_log = access_log
+        super(AccessLogFlusher, self).__init__()
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    def _flush(self, handle):
+        try:
+            self.access_log.flush()
+        except (OSError, IOError) as exc:
+            self._error('Can\'t write access log: %s', exc)
+
+    @in_loop
+    def start(self):
+        self.access_log.open()
+        interval = self.app.config.ACCESS_LOG_FLUSH_INTERVAL
+        self._timer.start(self._flush, interval, interval)
+
+    @in_loop
+    def stop(self):
+        del self._timer
+        self.access_log.close()
+
+
+class AccessLogComponent(StartStopComponent):
+
+    name = 'worker.access_log'
+    requires = ('loop', )
+
+    def include_if(self, parent):
+        return parent.app.access_log is not None
+
+    def create(self, parent):
+        return AccessLogFlusher(parent.app, parent.app.access_log)
@@ -0,0 +1,135 @@
+"""Publish worker's metrics to shared memory region."""
+from __future__ import absolute_import
+
+import os
+import logging
+
+from pyuv import Timer
+
+from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.loop import in_loop
+from thriftworker.utils.mixin import LoopMixin
+
+from thriftpool.components.base import StartStopComponent
+from thriftpool.utils.metrics import MetricsRegion
+from thriftpool.utils.mixin import LogsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsPublisher(LogsMixin, LoopMixin):
+    """Periodically write counters and timers to region created by
+    manager.
+
+    """
+
+    Region = MetricsRegion
+
+    def __init__(self, app):
+        self.app = app
+        self.region = None
+        super(MetricsPublisher, self).__init__()
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    @cached_property
+    def _gauges_timer(self):
+        return Timer(self.loop)
+
+    @_gauges_timer.deleter
+    def _gauges_timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    def attach(self, path):
+        """Open region by given path and start publishing."""
+        self.detach()
+        self.region = self.Region.open(path)
+        self._debug('Publish metrics to %r.', path)
+        self.publish()
+        interval = self.app.config.METRICS_INTERVAL
+        self._timer.start(lambda handle: self.publish(), interval, interval)
+        if self.app.config.ACCEPT_BALANCING:
+            # Manager balances connections by load, so keep it fresh.
+            interval = self.app.config.ACCEPT_BALANCE_INTERVAL
+            self._gauges_timer.start(lambda handle: self.publish_gauges(),
+                                     interval, interval)
+
+    def detach(self):
+        """Stop publishing and close region."""
+        del self._timer
+        del self._gauges_timer
+        if self.region is not None:
+            self.region.close()
+            self.region = None
+
+    @property
+    def accepting(self):
+        """Does worker accept new connections?"""
+        return any(acceptor.active
+                   for acceptor in self.app.thriftworker.acceptors)
+
+    def publish_gauges(self):
+        """Write only number of queued and active requests and
+        connections and whether worker accepts connections to region.
+
+        """
+        if self.region is None:
+            return
+        thriftworker = self.app.thriftworker
+        try:
+            self.region.write_gauges(
+                pid=os.getpid(),
+                queued=int(thriftworker.worker.queued),
+                connections=thriftworker.acceptors.connections_number,
+                active=len(self.app.request_stack),
+                accepting=self.accepting)
+        except Exception as exc:
+            self._exception(exc)
+
+    def publish(self):
+        """Write current metrics to region."""
+        if self.region is None:
+            return
+        thriftworker = self.app.thriftworker
+        try:
+            self.region.write(
+                pid=os.getpid(),
+                queued=int(thriftworker.worker.queued),
+                connections=thriftworker.acceptors.connections_number,
+                active=len(self.app.request_stack),
+                accepting=self.accepting,
+                sections=dict(
+                    counters=thriftworker.counters.to_dict(),
+                    execution_timers=thriftworker.execution_timers.to_dict(),
+                    dispatching_timers=
+                    thriftworker.dispatching_timers.to_dict(),
+                    timeouts=thriftworker.timeouts.to_dict()))
+        except Exception as exc:
+            self._exception(exc)
+
+    def start(self):
+        # Publishing starts when manager attaches region.
+        pass
+
+    @in_loop
+    def stop(self):
+        self.publish()
+        self.detach()
+
+
+class MetricsPublisherComponent(StartStopComponent):
+
+    name = 'worker.metrics'
+    requires = ('loop', 'acceptors', 'worker')
+
+    def create(self, parent):
+        metrics = parent.metrics = MetricsPublisher(parent.app)
+        return metrics
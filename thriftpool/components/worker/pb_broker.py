@@ -7,6 +7,7 @@ from pyuv import Pipe
 from gaffer.events import EventEmitter
 
 from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.imports import instantiate
 from thriftworker.utils.loop import in_loop
 from thriftworker.utils.mixin import LoopMixin
 
@@ -84,7 +85,8 @@ class PerspectiveBroker(LogsMixin, LoopMixin):
         return Consumer(self.loop,
                         incoming=self.incoming_stream,
                         outgoing=self.outgoing_stream,
-                        handler=self.controller)
+                        handler=self.controller,
+                        codec=instantiate(self.app.config.RPC_CODEC))
 
     @in_loop
     def start(self):
@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 
 import logging
+from threading import Thread
+
+from six import iteritems
 
 from thriftpool.components.base import StartStopComponent
+from thriftpool.request.warmup import read_frames, replay
 from thriftpool.utils.mixin import LogsMixin
 
 logger = logging.getLogger(__name__)
@@ -10,19 +14,69 @@ logger = logging.getLogger(__name__)
 
 class ServicesManager(LogsMixin):
 
-    def __init__(self, slots, services):
+    def __init__(self, slots, services, corpus=None, rounds=1):
         self.slots = slots
         self.services = services
+        #: Files with recorded requests by service name.
+        self.corpus = corpus or {}
+        self.rounds = rounds
+        self.warming = False
         super(ServicesManager, self).__init__()
 
     def start(self):
         for name in self.services:
             self.slots[name].start()
+        # Warm up in background, worker isn't ready until it finishes.
+        self.warming = True
+        thread = Thread(target=self.warmup, name='warmup')
+        thread.daemon = True
+        thread.start()
+
+    def warmup(self):
+        """Call warm-up hooks of handlers and replay recorded requests."""
+        try:
+            for name in self.services:
+                try:
+                    self.slots[name].warmup()
+                except Exception as exc:
+                    self._error("Warm-up of service '%s' failed: %s",
+                                name, exc)
+            for name, path in iteritems(self.corpus):
+                if name in self.services:
+                    self._replay(name, path)
+        finally:
+            self.warming = False
+
+    def _replay(self, name, path):
+        try:
+            frames = read_frames(path)
+        except (IOError, ValueError) as exc:
+            self._error("Can't read warm-up requests of service '%s': %s",
+                        name, exc)
+            return
+        failed = replay(self.services.create_processor(name), frames,
+                        self.rounds)
+        self._info("Service '%s' warmed up with %d requests, %d failed.",
+                   name, len(frames) * self.rounds, failed)
 
     def stop(self):
         for name in self.services:
             self.slots[name].stop()
 
+    def ready(self):
+        """Are all services warmed up and ready to serve?"""
+        if self.warming:
+            return False
+        for name in self.services:
+            try:
+                if not self.slots[name].ready():
+                    return False
+            except Exception as exc:
+                self._error("Can't check readiness of service '%s': %s",
+                            name, exc)
+                return False
+        return True
+
     def register(self, name, processor):
         self._debug("Register service '%s'.", name)
         self.services.register(name, processor)
@@ -33,8 +87,12 @@ class ServicesComponent(StartStopComponent):
     name = 'worker.services'
 
     def create(self, parent):
-        services = parent.app.thriftworker.services
-        manager = ServicesManager(parent.app.slots, services)
-        for slot in parent.app.slots:
+        app = parent.app
+        services = app.thriftworker.services
+        manager = parent.services = ServicesManager(
+            app.slots, services, corpus=app.config.WARMUP_CORPUS,
+            rounds=app.config.WARMUP_ROUNDS)
+        # Modules of other pools register their slots too, skip them.
+        for slot in app.slots.in_pool(app.pool):
             manager.register(slot.name, slot.service.processor)
         return manager
@@ -13,6 +13,7 @@ from thriftworker.utils.decorators import cached_property
 from thriftworker.utils.loop import in_loop
 
 from thriftpool.components.base import StartStopComponent
+from thriftpool.utils.handshake import STAGE_STARTED
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ class Watchdog(LoopMixin):
     @in_loop
     def start(self):
         self._pipe.start_read(self._on_event)
-        self._pipe.write('x')
+        self._pipe.write(STAGE_STARTED)
 
     @in_loop
     def stop(self):
@@ -13,4 +13,11 @@ class WorkerComponent(StartStopComponent):
     requires = ('loop', 'services')
 
     def create(self, parent):
-        return parent.app.thriftworker.worker
+        app = parent.app
+        worker = app.thriftworker.worker
+        # Count queued requests of each service for admission control and
+        # outstanding requests of each connection for draining, answer
+        # requests that exceed their deadlines.
+        worker.Request = app.deadlines.track(
+            app.inflight.track(app.admissions.Request))
+        return worker
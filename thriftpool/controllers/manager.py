@@ -19,8 +19,14 @@ class ManagerNamespace(Namespace):
             'thriftpool.components.manager.listeners',
             'thriftpool.components.manager.processes',
             'thriftpool.components.manager.acceptors',
+            'thriftpool.components.manager.balancer',
             'thriftpool.components.manager.reaper',
+            'thriftpool.components.manager.reloader',
+            'thriftpool.components.manager.autoscaler',
+            'thriftpool.components.manager.stats',
             'thriftpool.components.manager.tornado',
+            'thriftpool.components.manager.upgrade',
+            'thriftpool.components.manager.zygote',
         ]
 
 
@@ -30,3 +36,26 @@ class ManagerController(Controller):
 
     listeners = None
     processes = None
+    reloader = None
+    stats = None
+    tornado = None
+    upgrader = None
+    zygote = None
+
+    #: PID of manager that is replaced by this one on hot upgrade.
+    predecessor = None
+
+    def register_signal_handler(self):
+        super(ManagerController, self).register_signal_handler()
+        self._signals['SIGUSR2'] = lambda signum, frame: self.on_upgrade()
+
+    def on_hup(self):
+        """Replace workers with new ones."""
+        super(ManagerController, self).on_hup()
+        if self.reloader is not None:
+            self.reloader.reload()
+
+    def on_upgrade(self):
+        """Start new manager which will replace this one."""
+        if self.upgrader is not None:
+            self.upgrader.upgrade()
@@ -1,10 +1,13 @@
 from __future__ import absolute_import
 
+import socket
+from functools import partial
 from logging import getLogger
 
 from six import iteritems
 
-from thriftpool.utils.platforms import set_process_title
+from thriftpool.utils.platforms import set_process_title, reuseport_socket, \
+    set_cpu_affinity
 from thriftpool.components.base import Namespace
 from thriftpool.controllers.base import Controller
 
@@ -16,8 +19,10 @@ class WorkerNamespace(Namespace):
     name = 'worker'
 
     def modules(self):
-        return ['thriftpool.components.worker.acceptors',
+        return ['thriftpool.components.worker.access_log',
+                'thriftpool.components.worker.acceptors',
                 'thriftpool.components.worker.loop',
+                'thriftpool.components.worker.metrics',
                 'thriftpool.components.worker.pb_broker',
                 'thriftpool.components.worker.services',
                 'thriftpool.components.worker.watchdog',
@@ -30,11 +35,17 @@ class WorkerController(Controller):
 
     ignore_interrupt = True
     acceptors = None
+    metrics = None
+    services = None
+
+    #: Was worker asked to drain connections?
+    draining = False
 
     def __init__(self, start_fd):
         self.handshake_fd = start_fd
         self.outgoing_fd = self.handshake_fd + 1
         self.incoming_fd = self.outgoing_fd + 1
+        self._sockets = {}
         super(WorkerController, self).__init__()
 
     def change_title(self, name):
@@ -42,6 +53,15 @@ class WorkerController(Controller):
         self._debug('Change process title to %r.', name)
         set_process_title(name)
 
+    def probe(self):
+        """Are handlers ready to serve requests?"""
+        return self.services.ready()
+
+    def set_cpu_affinity(self, cpus):
+        """Pin worker to given CPUs."""
+        self._debug('Pin process to CPUs %r.', cpus)
+        set_cpu_affinity(cpus)
+
     def register_acceptors(self, descriptors):
         """Register all existed acceptors with given descriptors."""
         acceptors = self.acceptors
@@ -53,15 +73,89 @@ class WorkerController(Controller):
             self._debug('Register acceptor %r with fd %d.', name, fd)
             acceptors.register(fd, name, backlog=slot.listener.backlog)
 
+    def listen_acceptor(self, name, address, backlog):
+        """Listen own socket bound to given address with ``SO_REUSEPORT``
+        and register acceptor for it.
+
+        """
+        if name in self._sockets or self.draining:
+            return
+        sock = reuseport_socket()
+        try:
+            sock.bind(address)
+            sock.listen(backlog)
+        except Exception:
+            sock.close()
+            raise
+        self._sockets[name] = sock
+        self._debug('Listen %r on %s:%d with fd %d.',
+                    name, address[0], address[1], sock.fileno())
+        self.acceptors.register(sock.fileno(), name, backlog=backlog)
+
     def start_acceptor(self, name):
         """Start acceptors by it's name."""
+        if self.draining:
+            return
         self._debug('Start acceptor %r.', name)
         self.acceptors.start_by_name(name)
 
     def stop_acceptor(self, name):
         """Stop acceptors by it's name."""
         self._debug('Stop acceptor %r.', name)
-        self.acceptors.stop_by_name(name)
+        sock = self._sockets.pop(name, None)
+        if sock is None:
+            self.acceptors.stop_by_name(name)
+        else:
+            self.app.hub.callback(partial(self._unlisten, name, sock))
+
+    def _unlisten(self, name, sock):
+        """Stop listening own socket, so kernel routes new connections to
+        other workers instead of queueing them here.
+
+        """
+        for acceptor in self.acceptors:
+            if acceptor.name == name:
+                # Worker resumes all acceptors after overflow, but socket
+                # that doesn't listen is always readable.
+                acceptor.shutdown()
+        sock.shutdown(socket.SHUT_RD)
+
+    def drain(self, close_idle=False):
+        """Stop accepting new connections and close idle ones if asked,
+        connections which requests are executed now are left open until
+        answers are sent. Return number of connections left, worker is
+        drained when nothing left. Manager calls it repeatedly until then.
+
+        """
+        if not self.draining:
+            self._info('Drain connections...')
+            self.draining = True
+            for name in list(self._sockets):
+                self.stop_acceptor(name)
+            self.app.hub.callback(self._stop_accepting)
+        if close_idle:
+            self.app.hub.callback(self._close_idle)
+        return self.acceptors.connections_number
+
+    def _close_idle(self):
+        """Close connections that don't wait for answers. Requests are
+        counted in loop, so it's checked here.
+
+        """
+        inflight = self.app.inflight
+        for acceptor in self.acceptors:
+            for connection in list(acceptor):
+                if connection.is_ready() and inflight.is_idle(connection):
+                    connection.close()
+
+    def _stop_accepting(self):
+        for acceptor in self.acceptors:
+            # Don't resume accepting after overflow.
+            acceptor.shutdown()
+
+    def attach_metrics(self, path):
+        """Start publishing metrics to given shared memory region."""
+        self.metrics.attach(path)
 
     def get_stack(self):
         """Return currently running methods."""
@@ -82,3 +176,11 @@ class WorkerController(Controller):
     def get_timeouts(self):
         """Return timeouts here."""
         return self.app.thriftworker.timeouts.to_dict()
+
+    def get_histograms(self):
+        """Return latency histograms of handler methods."""
+        return self.app.histograms.to_dict()
+
+    def get_admissions(self):
+        """Return active, queued and rejected requests of services."""
+        return self.app.admissions.to_dict()
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
-__all__ = ['SystemTerminate', 'RegistrationError']
+__all__ = ['SystemTerminate', 'RegistrationError', 'CallTimeout',
+           'ChannelClosed', 'DeadlineExceeded']
 
 
 class SystemTerminate(SystemExit):
@@ -13,3 +14,18 @@ class RegistrationError(Exception):
 
 class WrappingError(Exception):
     """Can't wrap given class."""
+
+
+class CallTimeout(Exception):
+    """Remote procedure call wasn't answered in time."""
+
+
+class ChannelClosed(Exception):
+    """Channel was closed before remote procedure call answered."""
+
+
+class DeadlineExceeded(BaseException):
+    """Request wasn't finished before its deadline. Isn't subclass of
+    :class:`Exception`, so handler can't swallow it accidentally.
+
+    """
@@ -26,12 +26,21 @@ DEFAULT_HANDLERS = [
         (r'/', handlers.WelcomeHandler),
         (r'/ping', handlers.PingHandler),
         (r'/version', handlers.VersionHandler),
+        (r'/metrics', handlers.MetricsHandler),
+        (r'/workers', handlers.ClientsHandler),
         (r'/timers', handlers.ClientsHandler),
+        (r'/timers/execution', handlers.AggregatedExecutionTimerHandler),
         (r'/timers/execution/([0-9^/]+)', handlers.ExecutionTimerHandler),
+        (r'/timers/dispatching', handlers.AggregatedDispatchingTimerHandler),
         (r'/timers/dispatching/([0-9^/]+)', handlers.DispatchingTimerHandler),
+        (r'/timers/timeouts', handlers.AggregatedTimeoutHandler),
         (r'/timers/timeouts/([0-9^/]+)', handlers.TimeoutHandler),
-        (r'/counters', handlers.ClientsHandler),
+        (r'/counters', handlers.AggregatedCounterHandler),
         (r'/counters/([0-9^/]+)', handlers.CounterHandler),
+        (r'/histograms', handlers.AggregatedHistogramHandler),
+        (r'/histograms/([0-9^/]+)', handlers.HistogramHandler),
+        (r'/admissions', handlers.AggregatedAdmissionHandler),
+        (r'/admissions/([0-9^/]+)', handlers.AdmissionHandler),
         (r'/stack', handlers.ClientsHandler),
         (r'/stack/([0-9^/]+)', handlers.StackHandler),
 ]
@@ -40,7 +49,7 @@ DEFAULT_HANDLERS = [
 class HttpEndpoint(object):
 
     def __init__(self, uri='127.0.0.1:5000', backlog=128,
-            ssl_options=None):
+            ssl_options=None, inherited=None):
         # uri should be a list
         if isinstance(uri, six.string_types):
             self.uri = uri.split(",")
@@ -48,6 +57,9 @@ class HttpEndpoint(object):
             self.uri = uri
         self.backlog = backlog
         self.ssl_options = ssl_options
+        # sockets bound by previous manager, by uri
+        self.inherited = dict(inherited or {})
+        self.sockets = {}
         self.server = None
         self.loop = None
         self.io_loop = None
@@ -68,9 +80,12 @@ class HttpEndpoint(object):
                 ssl_options=self.ssl_options)
 
         # bind the handler to needed interface
+        self.sockets = {}
         for uri in self.uri:
             addr = parse_address(uri)
-            if isinstance(addr, six.string_types):
+            if uri in self.inherited:
+                sock = self.inherited.pop(uri)
+            elif isinstance(addr, six.string_types):
                 sock = netutil.bind_unix_socket(addr)
             elif is_ipv6(addr[0]):
                 sock = netutil.bind_sockets(addr[1], address=addr[0],
@@ -78,11 +93,11 @@ class HttpEndpoint(object):
             else:
                 sock = netutil.bind_sockets(addr[1], backlog=self.backlog)
 
-            if isinstance(sock, list):
-                for s in sock:
-                    self.server.add_socket(s)
-            else:
-                self.server.add_socket(sock)
+            if not isinstance(sock, list):
+                sock = [sock]
+            for s in sock:
+                self.server.add_socket(s)
+            self.sockets[uri] = sock
 
         # start the server
         self.server.start()
@@ -1,5 +1,10 @@
 from __future__ import absolute_import
 
 from .workers import ClientsHandler, CounterHandler, DispatchingTimerHandler, \
-    ExecutionTimerHandler, TimeoutHandler, StackHandler
+    ExecutionTimerHandler, TimeoutHandler, HistogramHandler, \
+    AdmissionHandler, StackHandler, AggregatedCounterHandler, \
+    AggregatedDispatchingTimerHandler, AggregatedExecutionTimerHandler, \
+    AggregatedTimeoutHandler, AggregatedHistogramHandler, \
+    AggregatedAdmissionHandler
+from .metrics import MetricsHandler
 from .generic import PingHandler, VersionHandler, WelcomeHandler
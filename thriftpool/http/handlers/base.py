@@ -28,6 +28,10 @@ class BaseHandler(RequestHandler):
     def processes(self):
         return self.settings.get('processes')
 
+    @property
+    def stats(self):
+        return self.settings.get('stats')
+
     @asynchronous
     def options(self, *args, **kwargs):
         self.preflight()
@@ -0,0 +1,194 @@
+"""Expose statistics of workers in OpenMetrics text format."""
+from __future__ import absolute_import
+
+from six import iteritems, text_type
+
+from .base import BaseHandler
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def escape(value):
+    """Escape label value, unicode is encoded to UTF-8."""
+    if isinstance(value, text_type):
+        value = value.encode('utf-8')
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n') \
+        .replace('"', '\\"')
+
+
+def format_sample(name, labels, value):
+    """Return one line of exposition."""
+    if labels:
+        name = '{0}{{{1}}}'.format(name, ','.join(
+            '{0}="{1}"'.format(key, escape(label)) for key, label in labels))
+    if isinstance(value, float):
+        value = repr(value)
+    return '{0} {1}\n'.format(name, value)
+
+
+def format_header(name, kind, help, unit=None):
+    """Return metadata lines of metric family."""
+    lines = ['# TYPE {0} {1}\n'.format(name, kind)]
+    if unit is not None:
+        lines.append('# UNIT {0} {1}\n'.format(name, unit))
+    lines.append('# HELP {0} {1}\n'.format(name, help))
+    return ''.join(lines)
+
+
+def method_labels(pid, key):
+    """Split timer key to service and method labels."""
+    service, _, method = key.partition('::')
+    return [('worker', pid), ('service', service), ('method', method)]
+
+
+class MetricsHandler(BaseHandler):
+    """Render counters, timers and state of workers. Output is written
+    and flushed by chunks to avoid building one huge string.
+
+    """
+
+    #: How many lines should be buffered before flushing.
+    chunk_size = 512
+
+    def get(self):
+        self.preflight()
+        self.set_status(200)
+        self.set_header('Content-Type', CONTENT_TYPE)
+        chunk = []
+        for line in self.iter_lines():
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                self.write(''.join(chunk))
+                self.flush()
+                chunk = []
+        chunk.append('# EOF\n')
+        self.write(''.join(chunk))
+
+    def iter_lines(self):
+        """Generate lines of exposition."""
+        processes, stats = self.processes, self.stats
+        pids = sorted(processes.broker.keys())
+
+        execution_timers = stats.gather('execution_timers')
+        yield format_header('thriftpool_requests', 'counter',
+                            'Number of successfully executed requests.')
+        for pid, timers in sorted(iteritems(execution_timers)):
+            for key, timer in sorted(iteritems(timers)):
+                yield format_sample('thriftpool_requests_total',
+                                    method_labels(pid, key), timer['count'])
+
+        for name, help, timers in [
+                ('thriftpool_execution_seconds',
+                 'Time spent in handler methods.', execution_timers),
+                ('thriftpool_dispatching_seconds',
+                 'Time from request receipt to answer.',
+                 stats.gather('dispatching_timers'))]:
+            for line in self.iter_summary(name, help, timers):
+                yield line
+
+        histograms = stats.gather('histograms')
+        for line in self.iter_histograms(histograms):
+            yield line
+
+        for line in self.iter_admissions(stats.gather('admissions')):
+            yield line
+
+        yield format_header('thriftpool_timeouts', 'counter',
+                            'Number of answers that were late.')
+        for pid, timers in sorted(iteritems(stats.gather('timeouts'))):
+            for key, timer in sorted(iteritems(timers)):
+                yield format_sample('thriftpool_timeouts_total',
+                                    method_labels(pid, key), timer['count'])
+
+        now = processes.loop.now()
+        yield format_header('thriftpool_worker_uptime_seconds', 'gauge',
+                            'Time since worker initialization.', 'seconds')
+        for pid in pids:
+            process = processes[pid]
+            if process is None:
+                continue
+            yield format_sample('thriftpool_worker_uptime_seconds',
+                                [('worker', pid)],
+                                (now - process.startup_time) / 1000.0)
+
+        yield format_header('thriftpool_worker_restarts', 'counter',
+                            'Number of workers that exited while running.')
+        yield format_sample('thriftpool_worker_restarts_total', [],
+                            processes.restarts)
+
+        snapshots = [(pid, processes.read_metrics(pid)) for pid in pids]
+        snapshots = [(pid, snapshot) for pid, snapshot in snapshots
+                     if snapshot is not None]
+        for name, key, help in [
+                ('thriftpool_worker_active_requests', 'active',
+                 'Depth of request stack of worker.'),
+                ('thriftpool_worker_queued_requests', 'queued',
+                 'Number of requests waiting for execution.')]:
+            yield format_header(name, 'gauge', help)
+            for pid, snapshot in snapshots:
+                yield format_sample(name, [('worker', pid)], snapshot[key])
+
+    def iter_summary(self, name, help, timers):
+        """Render timers as summary in seconds."""
+        yield format_header(name, 'summary', help, 'seconds')
+        for pid, data in sorted(iteritems(timers)):
+            for key, timer in sorted(iteritems(data)):
+                labels = method_labels(pid, key)
+                yield format_sample(name, labels + [('quantile', '0.95')],
+                                    timer['distribution95'] / 1000.0)
+                yield format_sample(name + '_sum', labels,
+                                    timer['sum'] / 1000.0)
+                yield format_sample(name + '_count', labels, timer['count'])
+
+    def iter_admissions(self, admissions):
+        """Render requests of services rejected by admission control and
+        current number of active and queued requests.
+
+        """
+        for name, key, kind, help in [
+                ('thriftpool_rejected_requests', 'rejected', 'counter',
+                 'Number of requests rejected by admission control.'),
+                ('thriftpool_service_active_requests', 'active', 'gauge',
+                 'Number of executed requests of service.'),
+                ('thriftpool_service_queued_requests', 'queued', 'gauge',
+                 'Number of requests of service waiting for execution.')]:
+            yield format_header(name, kind, help)
+            if kind == 'counter':
+                name += '_total'
+            for pid, data in sorted(iteritems(admissions)):
+                for service, admission in sorted(iteritems(data)):
+                    yield format_sample(name, [('worker', pid),
+                                               ('service', service)],
+                                        admission[key])
+
+    def iter_histograms(self, histograms):
+        """Render latency histograms of handler methods in seconds."""
+        yield format_header('thriftpool_handler_seconds', 'histogram',
+                            'Wall time of handler methods.', 'seconds')
+        for pid, data in sorted(iteritems(histograms)):
+            for key, histogram in sorted(iteritems(data)):
+                labels = method_labels(pid, key)
+                cumulative = 0
+                for upper, count in histogram['buckets']:
+                    cumulative += count
+                    yield format_sample('thriftpool_handler_seconds_bucket',
+                                        labels + [('le', repr(upper / 1000.0))],
+                                        cumulative)
+                yield format_sample('thriftpool_handler_seconds_bucket',
+                                    labels + [('le', '+Inf')],
+                                    histogram['count'])
+                yield format_sample('thriftpool_handler_seconds_sum', labels,
+                                    histogram['sum'] / 1000.0)
+                yield format_sample('thriftpool_handler_seconds_count',
+                                    labels, histogram['count'])
+
+        yield format_header('thriftpool_handler_calls', 'counter',
+                            'Number of handler calls by outcome.')
+        for pid, data in sorted(iteritems(histograms)):
+            for key, histogram in sorted(iteritems(data)):
+                labels = method_labels(pid, key)
+                outcomes = histogram['outcomes']
+                for outcome, count in sorted(iteritems(outcomes)):
+                    yield format_sample('thriftpool_handler_calls_total',
+                                        labels + [('outcome', outcome)],
+                                        count)
@@ -14,12 +14,73 @@ class ClientsHandler(BaseHandler):
         self.write(json.dumps(self.processes.broker.keys()))
 
 
+class AggregatedHandler(BaseHandler):
+    """Abstract handler that merge data of all workers."""
+
+    #: Which section of statistics should be returned.
+    section = None
+
+    def get(self):
+        self.preflight()
+        self.set_status(200)
+        self.write(json.dumps(self.stats.collect(self.section)))
+
+
+class AggregatedCounterHandler(AggregatedHandler):
+    """Provide merged counters."""
+
+    section = 'counters'
+
+
+class AggregatedDispatchingTimerHandler(AggregatedHandler):
+    """Provide merged dispatching timers."""
+
+    section = 'dispatching_timers'
+
+
+class AggregatedExecutionTimerHandler(AggregatedHandler):
+    """Provide merged execution timers."""
+
+    section = 'execution_timers'
+
+
+class AggregatedTimeoutHandler(AggregatedHandler):
+    """Provide merged timeouts."""
+
+    section = 'timeouts'
+
+
+class AggregatedHistogramHandler(AggregatedHandler):
+    """Provide merged latency histograms of handler methods."""
+
+    section = 'histograms'
+
+
+class AggregatedAdmissionHandler(AggregatedHandler):
+    """Provide merged active, queued and rejected requests of services."""
+
+    section = 'admissions'
+
+
 class SpecificClientHandler(BaseHandler):
     """Abstract client handler."""
 
+    #: Section of shared metrics that contains requested data, if it's
+    #: absent data will be requested from worker.
+    section = None
+
     def get_data(self, proxy):
         raise NotImplementedError('subclass responsibility')
 
+    def get_shared_data(self, pid):
+        """Try to read requested data from shared memory."""
+        if self.section is None:
+            return None
+        metrics = self.processes.read_metrics(pid)
+        if metrics is None:
+            return None
+        return metrics[self.section]
+
     def get(self, *args):
         self.preflight()
 
@@ -36,14 +97,18 @@ class SpecificClientHandler(BaseHandler):
             self.set_status(404)
             return
 
-        client = self.processes.broker[pid]
-        data = client.spawn(self.get_data).get()
+        data = self.get_shared_data(pid)
+        if data is None:
+            client = self.processes.broker[pid]
+            data = client.spawn(self.get_data).get()
         self.write(json.dumps(data))
 
 
 class CounterHandler(SpecificClientHandler):
     """Provide information about counters."""
 
+    section = 'counters'
+
     def get_data(self, proxy):
         return proxy.get_counters()
 
@@ -51,6 +116,8 @@ class CounterHandler(SpecificClientHandler):
 class DispatchingTimerHandler(SpecificClientHandler):
     """Provide information about dispatching timers."""
 
+    section = 'dispatching_timers'
+
     def get_data(self, proxy):
         return proxy.get_dispatching_timers()
 
@@ -58,6 +125,8 @@ class DispatchingTimerHandler(SpecificClientHandler):
 class ExecutionTimerHandler(SpecificClientHandler):
     """Provide information about execution timers."""
 
+    section = 'execution_timers'
+
     def get_data(self, proxy):
         return proxy.get_execution_timers()
 
@@ -65,10 +134,26 @@ class ExecutionTimerHandler(SpecificClientHandler):
 class TimeoutHandler(SpecificClientHandler):
     """Provide information about timeouts."""
 
+    section = 'timeouts'
+
     def get_data(self, proxy):
         return proxy.get_timeouts()
 
 
+class HistogramHandler(SpecificClientHandler):
+    """Provide latency histograms of handler methods."""
+
+    def get_data(self, proxy):
+        return proxy.get_histograms()
+
+
+class AdmissionHandler(SpecificClientHandler):
+    """Provide active, queued and rejected requests of services."""
+
+    def get_data(self, proxy):
+        return proxy.get_admissions()
+
+
 class StackHandler(SpecificClientHandler):
     """Provide information about currently running tasks."""
 
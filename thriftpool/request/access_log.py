@@ -0,0 +1,191 @@
+"""Compact binary access log.
+
+Each served request is described by fixed-size record. Names of services
+and methods are stored as CRC32 identifiers, identifiers are resolved
+with companion ``.names`` file.
+
+"""
+from __future__ import absolute_import
+
+import mmap
+import os
+import time
+import zlib
+from collections import namedtuple
+from struct import Struct
+from threading import Lock
+
+__all__ = ['AccessLog', 'AccessLogReader', 'AccessRecord']
+
+#: Request was processed, answer may contain declared exception.
+OK = 0
+#: Application exception was returned to client.
+ERROR = 1
+#: Client called unknown method.
+UNKNOWN_METHOD = 2
+#: Request was rejected by admission control.
+REJECTED = 3
+
+STATUSES = {OK: 'ok', ERROR: 'error', UNKNOWN_METHOD: 'unknown_method',
+            REJECTED: 'rejected'}
+
+#: timestamp, pid, service id, method id, duration in microseconds,
+#: status, request size, response size
+RECORD = Struct('=dIIIIB3xII')
+
+#: Suffix of file that contains names of services and methods.
+NAMES_SUFFIX = '.names'
+
+
+class AccessRecord(namedtuple('AccessRecord', (
+        'timestamp', 'pid', 'service_id', 'method_id', 'duration',
+        'status', 'request_size', 'response_size'))):
+    """Describe one served request."""
+
+
+def name_id(name):
+    """Return identifier of given name."""
+    return zlib.crc32(name) & 0xFFFFFFFF
+
+
+class AccessLog(object):
+    """Append records to access log. Records are buffered and written by
+    whole number of records, so several workers may share one file.
+
+    :param path: path to log file
+    :param buffer_size: how many bytes can be buffered before writing
+
+    """
+
+    def __init__(self, path, buffer_size=64 * 1024):
+        self.path = path
+        self.buffer_size = max(buffer_size, RECORD.size)
+        self.pid = None
+        self._lock = Lock()
+        self._buffer = bytearray()
+        self._names = {}
+        self._fd = None
+        self._names_fd = None
+
+    def open(self):
+        """Open log file and names file for appending."""
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        self.pid = os.getpid()
+        if self._fd is None:
+            self._fd = os.open(self.path, flags, 0o644)
+        if self._names_fd is None:
+            self._names_fd = os.open(self.path + NAMES_SUFFIX, flags, 0o644)
+
+    def _register(self, name):
+        """Return identifier of name, write it to names file if needed."""
+        try:
+            return self._names[name]
+        except KeyError:
+            ident = self._names[name] = name_id(name)
+            os.write(self._names_fd, '{0:d}\t{1}\n'.format(ident, name))
+            return ident
+
+    def write(self, service, method, duration, status, request_size,
+              response_size):
+        """Add record about served request, duration is in seconds."""
+        with self._lock:
+            if self._fd is None:
+                self.open()
+            record = RECORD.pack(
+                time.time(), self.pid, self._register(service),
+                self._register('{0}::{1}'.format(service, method)),
+                min(int(duration * 1e6), 0xFFFFFFFF), status,
+                request_size, response_size)
+            self._buffer.extend(record)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer and self._fd is not None:
+            os.write(self._fd, bytes(self._buffer))
+            del self._buffer[:]
+
+    def flush(self):
+        """Write all buffered records."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush buffer and close files."""
+        with self._lock:
+            self._flush()
+            for fd in (self._fd, self._names_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._fd = self._names_fd = None
+
+
+class AccessLogReader(object):
+    """Read records from access log with memory mapping.
+
+    :param path: path to log file
+
+    """
+
+    Record = AccessRecord
+
+    def __init__(self, path):
+        self.path = path
+        self.names = self._read_names(path + NAMES_SUFFIX)
+
+    @staticmethod
+    def _read_names(path):
+        names = {}
+        if not os.path.exists(path):
+            return names
+        with open(path, 'rb') as f:
+            for line in f:
+                ident, _, name = line.rstrip('\n').partition('\t')
+                if name:
+                    names[int(ident)] = name
+        return names
+
+    def name(self, ident):
+        """Resolve identifier of service or method."""
+        return self.names.get(ident, '#{0:08x}'.format(ident))
+
+    def __iter__(self):
+        size = os.path.getsize(self.path)
+        size -= size % RECORD.size
+        if not size:
+            return
+        with open(self.path, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            try:
+                unpack_from, Record = RECORD.unpack_from, self.Record
+                for offset in xrange(0, size, RECORD.size):
+                    yield Record(*unpack_from(buf, offset))
+            finally:
+                buf.close()
+
+    def filter(self, method=None, since=None, until=None, slower_than=None):
+        """Iterate over records that match all given conditions.
+
+        :param method: name of method in ``Service::method`` format or
+            only name of method
+        :param since: minimal timestamp of record
+        :param until: maximal timestamp of record
+        :param slower_than: minimal duration in milliseconds
+
+        """
+        method_ids = None
+        if method is not None:
+            method_ids = set(ident for ident, name in self.names.items()
+                             if name == method
+                             or name.partition('::')[2] == method)
+        min_duration = None if slower_than is None else slower_than * 1e3
+        for record in self:
+            if method_ids is not None and record.method_id not in method_ids:
+                continue
+            if since is not None and record.timestamp < since:
+                continue
+            if until is not None and record.timestamp > until:
+                continue
+            if min_duration is not None and record.duration < min_duration:
+                continue
+            yield record
@@ -0,0 +1,150 @@
+"""Limit number of executed and queued requests of each service.
+
+Request is counted as queued from its receipt by worker till start of its
+execution. When service already executes ``max_active`` requests or more
+than ``max_queued`` requests of service wait behind started one, request
+is rejected without calling handler, so overloaded worker answers quickly
+instead of letting latency grow.
+
+"""
+from __future__ import absolute_import
+
+from threading import Lock
+
+from thriftworker.utils.atomics import AtomicInteger
+from thriftworker.utils.decorators import cached_property
+from thriftworker.workers.base import Request
+
+__all__ = ['Admission', 'Admissions', 'merge_admissions']
+
+
+class Admission(object):
+    """Counters and limits of one service, :const:`None` means that
+    number of requests isn't limited.
+
+    """
+
+    def __init__(self, max_active=None, max_queued=None):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.active = AtomicInteger(0)
+        self.queued = AtomicInteger(0)
+        self.rejected = AtomicInteger(0)
+
+    def enqueue(self):
+        """New request was received."""
+        self.queued.incr()
+
+    def dequeue(self):
+        """Request is going to be executed."""
+        self.queued.decr()
+
+    def acquire(self):
+        """Try to start request, return :const:`False` if request should
+        be rejected.
+
+        """
+        if self.max_queued is not None and self.queued > self.max_queued:
+            self.rejected.incr()
+            return False
+        active = self.active.incr()
+        if self.max_active is not None and active > self.max_active:
+            self.active.decr()
+            self.rejected.incr()
+            return False
+        return True
+
+    def release(self):
+        """Request was finished."""
+        self.active.decr()
+
+    def to_dict(self):
+        return {'active': int(self.active), 'queued': int(self.queued),
+                'rejected': int(self.rejected),
+                'max_active': self.max_active, 'max_queued': self.max_queued}
+
+
+class AdmittedRequest(Request):
+    """Request that counts itself as queued until it's executed."""
+
+    __slots__ = ()
+
+    #: Admissions of services, set by subclass.
+    admissions = None
+
+    def __init__(self, *args, **kwargs):
+        super(AdmittedRequest, self).__init__(*args, **kwargs)
+        self.admissions[self.service].enqueue()
+
+    def execute(self, processor):
+        self.admissions[self.service].dequeue()
+        return super(AdmittedRequest, self).execute(processor)
+
+
+class Admissions(object):
+    """Store admission of each service by its name.
+
+    :param limits: function that returns maximum number of active and
+        queued requests for given service name
+    :param exception_cls: exception returned to rejected client, created
+        like :class:`thrift.Thrift.TApplicationException`
+
+    """
+
+    Admission = Admission
+
+    def __init__(self, limits, exception_cls):
+        self.limits = limits
+        self.exception_cls = exception_cls
+        self._admissions = {}
+        self._lock = Lock()
+
+    def __getitem__(self, key):
+        try:
+            return self._admissions[key]
+        except KeyError:
+            with self._lock:
+                admission = self._admissions.get(key)
+                if admission is None:
+                    admission = self._admissions[key] = \
+                        self.Admission(*self.limits(key))
+                return admission
+
+    def __iter__(self):
+        return iter(list(self._admissions))
+
+    def __len__(self):
+        return len(self._admissions)
+
+    @cached_property
+    def Request(self):
+        """Request class of :class:`thriftworker.workers.base.BaseWorker`
+        that counts queued requests.
+
+        """
+        return type('Request', (AdmittedRequest,),
+                    dict(__slots__=(), admissions=self))
+
+    def overloaded(self, service_name, method_name):
+        """Return exception for rejected request."""
+        return self.exception_cls(
+            self.exception_cls.INTERNAL_ERROR,
+            'Service {0} is overloaded, {1} rejected'.format(service_name,
+                                                            method_name))
+
+    def to_dict(self):
+        """Convert all admissions to dict."""
+        return {key: admission.to_dict()
+                for key, admission in list(self._admissions.items())}
+
+
+def merge_admissions(items):
+    """Sum counters of several workers (in format returned by
+    :meth:`Admission.to_dict`).
+
+    """
+    merged = {'active': 0, 'queued': 0, 'rejected': 0}
+    for item in items:
+        for key in merged:
+            merged[key] += item[key]
+    return merged
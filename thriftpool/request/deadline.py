@@ -0,0 +1,225 @@
+"""Answer requests that aren't finished before their deadline.
+
+Deadline of request starts when worker receives it and is tracked in loop
+by timing wheel driven by single timer. When deadline expires before
+handler returns, client gets :class:`TApplicationException` at once and
+result of handler is dropped when it's ready.
+
+Handler isn't interrupted: thread of pool stays busy until handler returns.
+Long handlers should check :attr:`current_request.deadline` cooperatively,
+use :meth:`Deadline.remaining` as timeout of blocking calls or call
+:meth:`Deadline.check` between steps of work.
+
+"""
+from __future__ import absolute_import
+
+import logging
+from threading import local
+
+from pyuv import Timer
+from thrift.Thrift import TApplicationException, TMessageType
+from thrift.transport.TTransport import TMemoryBuffer
+from thriftworker.utils.monotime import monotonic
+from thriftworker.workers.base import Request
+
+from thriftpool.exceptions import DeadlineExceeded
+from thriftpool.rpc.wheel import TimingWheel
+
+__all__ = ['Deadline', 'Deadlines', 'DeadlineRequest']
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline(object):
+    """Point of time when request should be finished."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.expires = monotonic() + timeout
+        #: Was client answered with exception?
+        self.fired = False
+
+    def remaining(self):
+        """Return how many seconds left, never negative."""
+        return max(0.0, self.expires - monotonic())
+
+    @property
+    def expired(self):
+        return monotonic() >= self.expires
+
+    def check(self):
+        """Raise :class:`DeadlineExceeded` if deadline expired."""
+        if self.expired:
+            raise DeadlineExceeded()
+
+
+def _skip(message_buffer):
+    """Processor of request which client was already answered."""
+    return None, None
+
+
+class DeadlineRequest(Request):
+    """Request that is answered with exception when its deadline expires
+    and drops result that is ready after that.
+
+    """
+
+    __slots__ = ('deadline',)
+
+    #: Watcher of deadlines, set by subclass.
+    deadlines = None
+
+    def __init__(self, *args, **kwargs):
+        super(DeadlineRequest, self).__init__(*args, **kwargs)
+        self.deadline = None
+        self.deadlines.watch(self)
+
+    def execute(self, processor):
+        deadline = self.deadline
+        if deadline is not None and deadline.fired:
+            # Client already got exception while request was queued, don't
+            # waste thread on handler. Request still leaves queue of
+            # service.
+            super(DeadlineRequest, self).execute(_skip)
+            self.successful = None
+            return False
+        state = self.deadlines._state
+        state.deadline = self.deadline
+        try:
+            return super(DeadlineRequest, self).execute(processor)
+        finally:
+            state.deadline = None
+
+    def dispatch(self):
+        if not self.deadlines.finish(self):
+            # Client already got exception, drop late result.
+            self.dispatch_time = self.loop.now()
+            return False
+        return super(DeadlineRequest, self).dispatch()
+
+    def expire(self, response):
+        """Answer client with given response instead of handler."""
+        self.successful, self.response = True, response
+        return super(DeadlineRequest, self).dispatch()
+
+
+class Deadlines(object):
+    """Watch deadlines of received requests.
+
+    :param get_deadline: function that returns deadline (in seconds) of
+        given service and method or :const:`None`
+    :param has_deadlines: function that returns whether any method of
+        given service may have deadline
+    :param protocol_factory: factory used to read and write messages
+
+    """
+
+    Deadline = Deadline
+
+    #: Duration of timing wheel tick in seconds.
+    wheel_resolution = 0.05
+
+    #: Number of slots in timing wheel.
+    wheel_size = 512
+
+    def __init__(self, get_deadline, has_deadlines, protocol_factory):
+        self.get_deadline = get_deadline
+        self.has_deadlines = has_deadlines
+        self.protocol_factory = protocol_factory
+        self._limited = {}
+        self._wheel = TimingWheel(self.wheel_resolution, self.wheel_size)
+        self._timer = None
+        self._state = local()
+
+    def __len__(self):
+        return len(self._wheel)
+
+    def track(self, base):
+        """Return subclass of given request class that is limited by
+        deadlines stored here.
+
+        """
+        return type('Request', (DeadlineRequest, base),
+                    dict(__slots__=(), deadlines=self))
+
+    def current(self):
+        """Return deadline of request executed in current thread or
+        :const:`None`.
+
+        """
+        return getattr(self._state, 'deadline', None)
+
+    def _is_limited(self, service):
+        try:
+            return self._limited[service]
+        except KeyError:
+            limited = self._limited[service] = self.has_deadlines(service)
+            return limited
+
+    def watch(self, request):
+        """Start deadline of just received request if it has one."""
+        if not self._is_limited(request.service):
+            return
+        transport = TMemoryBuffer(request.message_buffer.getvalue())
+        try:
+            name, _, seqid = self.protocol_factory.getProtocol(transport) \
+                .readMessageBegin()
+        except Exception:
+            # Processor will fail on broken message itself.
+            return
+        timeout = self.get_deadline(request.service, name)
+        if timeout is None:
+            return
+        request.deadline = self.Deadline(timeout)
+        self._wheel.add(request, timeout, (name, seqid))
+        timer = self._timer
+        if timer is None:
+            timer = self._timer = Timer(request.loop)
+        if not timer.active:
+            resolution = self.wheel_resolution
+            timer.start(self._on_tick, resolution, resolution)
+
+    def finish(self, request):
+        """Stop deadline of request. Return :const:`False` if client was
+        already answered with exception.
+
+        """
+        deadline = request.deadline
+        if deadline is None:
+            return True
+        if deadline.fired:
+            return False
+        wheel = self._wheel
+        wheel.remove(request)
+        if not wheel and self._timer is not None:
+            self._timer.stop()
+        return True
+
+    def _on_tick(self, handle):
+        wheel = self._wheel
+        for request, (name, seqid) in wheel.tick():
+            deadline = request.deadline
+            remaining = deadline.remaining()
+            if remaining > 0.0:
+                # Wheel counts partly elapsed tick as whole one, so request
+                # may come out early, wait for the rest.
+                wheel.add(request, remaining, (name, seqid))
+                continue
+            deadline.fired = True
+            logger.warning('%s::%s exceeded deadline of %.3f seconds.',
+                           request.service, name, deadline.timeout)
+            request.expire(self._exception(name, seqid, deadline.timeout))
+        if not wheel:
+            handle.stop()
+
+    def _exception(self, name, seqid, timeout):
+        """Serialize exception sent to client of expired request."""
+        transport = TMemoryBuffer()
+        oprot = self.protocol_factory.getProtocol(transport)
+        oprot.writeMessageBegin(name, TMessageType.EXCEPTION, seqid)
+        TApplicationException(
+            TApplicationException.INTERNAL_ERROR,
+            'Deadline of {0:.3f} seconds exceeded'.format(timeout)
+        ).write(oprot)
+        oprot.writeMessageEnd()
+        return transport.getvalue()
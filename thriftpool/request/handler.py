@@ -6,10 +6,13 @@ from functools import wraps
 
 from thrift.Thrift import TApplicationException, TException
 from thrift.protocol.TBase import TExceptionBase
+from thriftworker.utils.monotime import monotonic
 
 from thriftpool import thriftpool
+from thriftpool.request.histograms import OK, DECLARED, ERROR
+from thriftpool.request.warmup import warming_up
 from thriftpool.signals import handler_method_guarded
-from thriftpool.exceptions import WrappingError
+from thriftpool.exceptions import WrappingError, DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,9 @@ class guarded_method(object):
         service_name = obj._service_name
         method = getattr(handler, self.__name__)
         stack = thriftpool.request_stack
+        deadlines = thriftpool.deadlines
+        histogram = thriftpool.histograms['{0}::{1}'.format(service_name,
+                                                            self.__name__)]
         allowed_exceptions = (TException, TExceptionBase)
 
         # Apply all returned by signal decorators.
@@ -50,19 +56,40 @@ class guarded_method(object):
         @maybe_wraps(method)
         def inner_method(*args, **kwargs):
             """Method that handle unknown exception correctly."""
-            stack.add(handler, method, args, kwargs, service_name)
+            deadline = deadlines.current()
+            stack.add(handler, method, args, kwargs, service_name, deadline)
+            outcome = OK
+            start = monotonic()
             with stack:
                 try:
                     return method(*args, **kwargs)
                 except allowed_exceptions:
+                    outcome = DECLARED
                     raise
+                except DeadlineExceeded:
+                    # Handler checked its deadline and gave up.
+                    outcome = ERROR
+                    timeout = deadline.timeout if deadline is not None \
+                        else 0.0
+                    logger.warning('%s::%s exceeded deadline of %.3f '
+                                   'seconds.', service_name, self.__name__,
+                                   timeout)
+                    raise TApplicationException(
+                        TApplicationException.INTERNAL_ERROR,
+                        'Deadline of {0:.3f} seconds exceeded'.format(
+                            timeout))
                 except Exception as exc:
                     # Catch all exceptions here, process they here. Write
                     # application exception to thrift transport.
+                    outcome = ERROR
                     logger.exception(exc)
                     code = TApplicationException.INTERNAL_ERROR
                     msg = "{0}({1})".format(type(exc).__name__, str(exc))
                     raise TApplicationException(code, msg)
+                finally:
+                    # Replayed requests would skew latency of real ones.
+                    if not warming_up():
+                        histogram.record(monotonic() - start, outcome)
 
         return inner_method
 
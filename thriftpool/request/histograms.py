@@ -0,0 +1,161 @@
+"""Latency histograms of handler methods."""
+from __future__ import absolute_import
+
+from threading import Lock
+
+from six import iteritems
+
+__all__ = ['Histogram', 'Histograms', 'merge_histograms']
+
+#: Outcomes of method call.
+OK = 'ok'
+DECLARED = 'declared'
+ERROR = 'error'
+OUTCOMES = (OK, DECLARED, ERROR)
+
+#: Quantiles computed for each histogram.
+QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p999', 0.999))
+
+
+class Histogram(object):
+    """Log-linear histogram of durations in microseconds. Each power of two
+    is split to ``2 ** sub_bits`` equal buckets, so relative error of
+    recorded value doesn't exceed ``2 ** -sub_bits``.
+
+    """
+
+    #: Number of bits used for linear part of bucket.
+    sub_bits = 3
+
+    #: Values greater than ``2 ** max_bits`` are stored in last bucket.
+    max_bits = 36
+
+    def __init__(self):
+        self._lock = Lock()
+        sub_count = 1 << self.sub_bits
+        self._sub_count = sub_count
+        self._counts = [0] * ((self.max_bits - self.sub_bits + 1) * sub_count)
+        self._outcomes = dict.fromkeys(OUTCOMES, 0)
+        self._count = self._sum = self._min = self._max = 0
+
+    def _index(self, value):
+        """Return index of bucket for given value."""
+        sub_count = self._sub_count
+        if value < sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits - 1
+        return min(sub_count * (shift + 1) + (value >> shift) - sub_count,
+                   len(self._counts) - 1)
+
+    def _upper_bound(self, index):
+        """Return greatest value that falls to bucket with given index."""
+        sub_count = self._sub_count
+        if index < sub_count:
+            return index
+        shift = index // sub_count - 1
+        return ((index % sub_count + sub_count + 1) << shift) - 1
+
+    def record(self, duration, outcome=OK):
+        """Record duration of call (in seconds) with given outcome."""
+        value = max(0, int(duration * 1e6))
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] += 1
+            self._outcomes[outcome] += 1
+            if not self._count or value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+            self._sum += value
+            self._count += 1
+
+    def to_dict(self):
+        """Convert histogram to dict, all values are in milliseconds."""
+        with self._lock:
+            counts = list(self._counts)
+            outcomes = dict(self._outcomes)
+            total, minimum, maximum = self._sum, self._min, self._max
+        buckets = [[(self._upper_bound(index) + 1) / 1e3, count]
+                   for index, count in enumerate(counts) if count]
+        return summarize({'sum': total / 1e3,
+                          'min': minimum / 1e3,
+                          'max': maximum / 1e3,
+                          'outcomes': outcomes,
+                          'buckets': buckets})
+
+
+class Histograms(object):
+    """Store histogram for each method by name in ``Service::method``
+    format.
+
+    """
+
+    Histogram = Histogram
+
+    def __init__(self):
+        self._lock = Lock()
+        self._histograms = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._histograms[key]
+        except KeyError:
+            with self._lock:
+                return self._histograms.setdefault(key, self.Histogram())
+
+    def __iter__(self):
+        return iter(list(self._histograms))
+
+    def __len__(self):
+        return len(self._histograms)
+
+    def to_dict(self):
+        """Convert all histograms to dict."""
+        return {key: histogram.to_dict()
+                for key, histogram in list(self._histograms.items())}
+
+
+def summarize(data):
+    """Add count, mean and quantiles to histogram data. Each quantile is
+    upper bound of bucket where it falls.
+
+    """
+    buckets = data['buckets']
+    count = sum(bucket[1] for bucket in buckets)
+    data['count'] = count
+    data['mean'] = data['sum'] / count if count else 0.0
+    for name, quantile in QUANTILES:
+        rank, seen, value = quantile * count, 0, 0.0
+        for upper, bucket_count in buckets:
+            seen += bucket_count
+            value = upper
+            if seen >= rank:
+                break
+        data[name] = min(value, data['max'])
+    return data
+
+
+def merge_histograms(items):
+    """Merge histograms of several workers (in format returned by
+    ``to_dict``) to one.
+
+    """
+    buckets, outcomes = {}, dict.fromkeys(OUTCOMES, 0)
+    total, minimum, maximum = 0.0, None, 0.0
+    for data in items:
+        if not data['count']:
+            continue
+        for upper, count in data['buckets']:
+            buckets[upper] = buckets.get(upper, 0) + count
+        for outcome, count in iteritems(data['outcomes']):
+            outcomes[outcome] = outcomes.get(outcome, 0) + count
+        total += data['sum']
+        minimum = data['min'] if minimum is None \
+            else min(minimum, data['min'])
+        maximum = max(maximum, data['max'])
+    return summarize({'sum': total,
+                      'min': 0.0 if minimum is None else minimum,
+                      'max': maximum,
+                      'outcomes': outcomes,
+                      'buckets': [list(item)
+                                  for item in sorted(iteritems(buckets))]})
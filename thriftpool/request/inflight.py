@@ -0,0 +1,59 @@
+"""Count requests of each connection that wait for answer.
+
+Request is counted from its receipt by worker till its answer is passed to
+connection, both happen in loop. Connection without such requests is idle
+and can be closed without losing answers.
+
+"""
+from __future__ import absolute_import
+
+from thriftworker.workers.base import Request
+
+__all__ = ['InFlight', 'TrackedRequest']
+
+
+class TrackedRequest(Request):
+    """Request that counts itself as outstanding until it's dispatched."""
+
+    __slots__ = ()
+
+    #: Counter of outstanding requests, set by subclass.
+    inflight = None
+
+    def __init__(self, *args, **kwargs):
+        super(TrackedRequest, self).__init__(*args, **kwargs)
+        self.inflight.add(self.connection)
+
+    def dispatch(self):
+        self.inflight.remove(self.connection)
+        return super(TrackedRequest, self).dispatch()
+
+
+class InFlight(object):
+    """Store number of outstanding requests by connection."""
+
+    def __init__(self):
+        self._requests = {}
+
+    def __len__(self):
+        """Return number of outstanding requests."""
+        return sum(self._requests.values())
+
+    def add(self, connection):
+        self._requests[connection] = self._requests.get(connection, 0) + 1
+
+    def remove(self, connection):
+        count = self._requests.get(connection, 0) - 1
+        if count > 0:
+            self._requests[connection] = count
+        else:
+            self._requests.pop(connection, None)
+
+    def is_idle(self, connection):
+        """Has given connection no outstanding requests?"""
+        return connection not in self._requests
+
+    def track(self, base):
+        """Return subclass of given request class that is counted here."""
+        return type('Request', (TrackedRequest, base),
+                    dict(__slots__=(), inflight=self))
@@ -2,28 +2,76 @@
 from __future__ import absolute_import
 
 from thrift.Thrift import TApplicationException, TMessageType
+from thriftworker.utils.monotime import monotonic
+
+from thriftpool import thriftpool
+from thriftpool.request.access_log import OK, ERROR, UNKNOWN_METHOD, \
+    REJECTED
+from thriftpool.request.warmup import warming_up
 
 
 class ProcessorMixin(object):
     """Process application error if there is one."""
 
-    def process(self, iprot, oprot):
-        name, type, seqid = iprot.readMessageBegin()
+    #: Name of service used in access log.
+    _service_name = None
 
+    def process(self, iprot, oprot):
+        # Warm-up requests aren't limited and logged.
+        warming = warming_up()
+        access_log = None if warming else thriftpool.access_log
+        admissions = thriftpool.admissions
+        admission = admissions[self._service_name]
+        start = monotonic()
+        status = OK
+        name = None
         try:
-            try:
-                fn = self._processMap[name]
-            except KeyError:
-                msg = 'Unknown function %s' % (name)
-                code = TApplicationException.UNKNOWN_METHOD
-                raise TApplicationException(code, msg)
+            name, type, seqid = iprot.readMessageBegin()
+
+            if not warming and not admission.acquire():
+                # Don't read arguments and don't call handler, answer fast.
+                status = REJECTED
+                self._write_exception(
+                    admissions.overloaded(self._service_name, name),
+                    name, seqid, oprot)
             else:
-                fn(self, seqid, iprot, oprot)
+                try:
+                    try:
+                        fn = self._processMap[name]
+                    except KeyError:
+                        msg = 'Unknown function %s' % (name)
+                        code = TApplicationException.UNKNOWN_METHOD
+                        raise TApplicationException(code, msg)
+                    else:
+                        fn(self, seqid, iprot, oprot)
 
-        except TApplicationException as exc:
-            oprot.writeMessageBegin(name, TMessageType.EXCEPTION, seqid)
-            exc.write(oprot)
-            oprot.writeMessageEnd()
-            oprot.trans.flush()
+                except TApplicationException as exc:
+                    status = UNKNOWN_METHOD \
+                        if exc.type == TApplicationException.UNKNOWN_METHOD \
+                        else ERROR
+                    self._write_exception(exc, name, seqid, oprot)
+
+                finally:
+                    if not warming:
+                        admission.release()
+
+        except Exception:
+            # Broken message, for example. Log request before worker
+            # closes connection.
+            status = ERROR
+            raise
+
+        finally:
+            if access_log is not None:
+                access_log.write(self._service_name, name or 'unknown',
+                                 monotonic() - start, status,
+                                 iprot.trans.cstringio_buf.tell(),
+                                 oprot.trans.cstringio_buf.tell())
 
         return name
+
+    def _write_exception(self, exc, name, seqid, oprot):
+        oprot.writeMessageBegin(name, TMessageType.EXCEPTION, seqid)
+        exc.write(oprot)
+        oprot.writeMessageEnd()
+        oprot.trans.flush()
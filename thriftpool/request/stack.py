@@ -10,8 +10,11 @@ from thriftpool.utils.local import LocalStack
 
 
 class Request(namedtuple('Request', ('handler', 'method', 'args',
-                                     'kwargs', 'service_name'))):
-    """Describe thrift request."""
+                                     'kwargs', 'service_name', 'deadline'))):
+    """Describe thrift request. Deadline is :class:`.deadline.Deadline`
+    or :const:`None` if request isn't limited.
+
+    """
 
 
 class RequestStack(object):
@@ -22,9 +25,11 @@ class RequestStack(object):
     def __init__(self):
         self.stack = LocalStack()
 
-    def add(self, handler, method, args, kwargs, service_name):
+    def add(self, handler, method, args, kwargs, service_name,
+            deadline=None):
         """Register new request."""
-        request = self.Request(handler, method, args, kwargs, service_name)
+        request = self.Request(handler, method, args, kwargs, service_name,
+                               deadline)
         self.stack.push(request)
         return request
 
@@ -33,6 +38,10 @@ class RequestStack(object):
         """Return current request."""
         return self.stack.top
 
+    def __len__(self):
+        """Return number of requests executed now in all threads."""
+        return sum(len(d.get('stack', ())) for _, d in self.stack)
+
     def to_dict(self):
         return {ident: [(request.service_name, request.method.__name__,
                          request.args, request.kwargs)
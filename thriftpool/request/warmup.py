@@ -0,0 +1,68 @@
+"""Replay recorded requests to warm up service before it gets clients.
+
+Corpus file contains requests as framed transport sends them: big-endian
+four-byte length followed by message. Responses are discarded. Replayed
+requests aren't counted in latency histograms, access log and admission
+counters, see :func:`warming_up`.
+
+"""
+from __future__ import absolute_import
+
+import logging
+from cStringIO import StringIO
+from struct import Struct
+from threading import local
+
+__all__ = ['read_frames', 'replay', 'warming_up']
+
+logger = logging.getLogger(__name__)
+
+#: Length of frame.
+FRAME_LENGTH = Struct('!i')
+
+_state = local()
+
+
+def warming_up():
+    """Are requests of current thread replayed for warm-up?"""
+    return getattr(_state, 'active', False)
+
+
+def read_frames(path):
+    """Return requests recorded in given corpus file."""
+    frames = []
+    with open(path, 'rb') as fh:
+        while True:
+            header = fh.read(FRAME_LENGTH.size)
+            if not header:
+                break
+            if len(header) < FRAME_LENGTH.size:
+                raise ValueError('Truncated frame length in {0!r}.'
+                                 .format(path))
+            length = FRAME_LENGTH.unpack(header)[0]
+            frame = fh.read(length)
+            if length <= 0 or len(frame) < length:
+                raise ValueError('Truncated frame in {0!r}.'.format(path))
+            frames.append(frame)
+    return frames
+
+
+def replay(processor, frames, rounds=1):
+    """Pass given requests to processor created by
+    :meth:`thriftworker.services.Services.create_processor`, return number
+    of failed requests.
+
+    """
+    failed = 0
+    _state.active = True
+    try:
+        for _ in range(rounds):
+            for frame in frames:
+                try:
+                    processor(StringIO(frame))
+                except Exception as exc:
+                    logger.debug('Warm-up request failed: %r', exc)
+                    failed += 1
+    finally:
+        _state.active = False
+    return failed
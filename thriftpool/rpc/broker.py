@@ -1,5 +1,9 @@
 from __future__ import absolute_import
 
+from functools import partial
+
+from thriftworker.utils.decorators import cached_property
+from thriftworker.utils.imports import instantiate
 from thriftworker.utils.loop import in_loop
 
 from .transport import Producer
@@ -30,12 +34,19 @@ class Broker(object):
     def keys(self):
         return self._clients.keys()
 
+    @cached_property
+    def codec(self):
+        """Codec shared by all producers."""
+        return instantiate(self.app.config.RPC_CODEC)
+
     def register(self, process, callback=None, **kwargs):
         """Create new producer for given process."""
         incoming = process.streams['incoming']
         outgoing = process.streams['outgoing']
         producer = self._producers[process.pid] = \
-            self.Producer(self.app.loop, incoming, outgoing, process)
+            self.Producer(self.app.loop, incoming, outgoing, process,
+                          codec=self.codec,
+                          timeout=self.app.config.RPC_TIMEOUT)
         producer.start()
         client = self._clients[process.pid] = self.Client(self.app, producer)
         if callback is not None:
@@ -53,6 +64,49 @@ class Broker(object):
         for pid in list(self._producers):
             self.unregister(pid)
 
+    def map(self, method, *args, **kwargs):
+        """Call given method on all workers at once and wait for answers.
+        Requests are written to every worker in the same loop iteration.
+        Must be called from greenlet. Return tuple of two dictionaries
+        (results and errors) keyed by process id.
+
+        :keyword timeout: how long (in seconds) we should wait for answers,
+            by default ``RPC_TIMEOUT`` is used.
+        :keyword pids: call only given workers, by default all workers
+            are called.
+
+        """
+        timeout = kwargs.pop('timeout', None)
+        pids = kwargs.pop('pids', None)
+        results, errors = {}, {}
+        producers = self._producers if pids is None else \
+            {pid: self._producers[pid] for pid in pids
+             if pid in self._producers}
+        pending = set(producers)
+        if not pending:
+            return results, errors
+        waiter = self.app.hub.Waiter()
+
+        def on_reply(pid, obj):
+            if isinstance(obj, Exception):
+                errors[pid] = obj
+            else:
+                results[pid] = obj
+            pending.discard(pid)
+            if not pending:
+                waiter.switch(None)
+
+        for pid, producer in list(producers.items()):
+            callback = partial(on_reply, pid)
+            try:
+                producer.apply(method, callback=callback, args=args,
+                               kwargs=kwargs, timeout=timeout)
+            except Exception as exc:
+                callback(exc)
+
+        waiter.get()
+        return results, errors
+
     @in_loop
     def spawn(self, run, *args, **kwargs):
         """Map given function to all clients."""
@@ -0,0 +1,82 @@
+"""Codecs used to serialize messages passed between manager and workers."""
+from __future__ import absolute_import
+
+import cPickle as pickle
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+__all__ = ['Codec', 'PickleCodec', 'MsgpackCodec']
+
+
+def _to_bytes(buf):
+    """Convert given buffer to string. Strings are returned as is, other
+    buffers are copied.
+
+    """
+    if isinstance(buf, memoryview):
+        return buf.tobytes()
+    return bytes(buf)
+
+
+class Codec(object):
+    """Abstract codec. :meth:`decode` must accept any object that support
+    buffer protocol (strings, byte arrays and memory views).
+
+    """
+
+    def encode(self, obj):
+        raise NotImplementedError('subclass responsibility')
+
+    def decode(self, buf):
+        raise NotImplementedError('subclass responsibility')
+
+
+class PickleCodec(Codec):
+    """Serialize objects with binary pickle protocol."""
+
+    protocol = pickle.HIGHEST_PROTOCOL
+
+    def encode(self, obj):
+        return pickle.dumps(obj, self.protocol)
+
+    def decode(self, buf):
+        return pickle.loads(_to_bytes(buf))
+
+
+class MsgpackCodec(Codec):
+    """Serialize objects with :mod:`msgpack`. Objects that can't be packed
+    natively (exceptions returned by workers, for example) are embedded
+    as pickled extension type.
+
+    """
+
+    #: Extension type code used for pickled objects.
+    pickled_type = 1
+
+    #: Options passed to :func:`msgpack.unpackb`.
+    unpack_options = dict(raw=False, use_list=False, strict_map_key=False)
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError('msgpack required by {0}'
+                              .format(type(self).__name__))
+        super(MsgpackCodec, self).__init__()
+
+    def _default(self, obj):
+        return msgpack.ExtType(self.pickled_type,
+                               pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+    def _ext_hook(self, code, data):
+        if code == self.pickled_type:
+            return pickle.loads(data)
+        return msgpack.ExtType(code, data)
+
+    def encode(self, obj):
+        return msgpack.packb(obj, default=self._default, use_bin_type=True)
+
+    def decode(self, buf):
+        return msgpack.unpackb(buf, ext_hook=self._ext_hook,
+                               **self.unpack_options)
@@ -1,16 +1,19 @@
 from __future__ import absolute_import
 
 import logging
-import cPickle as pickle
-from uuid import UUID, uuid4
 from struct import Struct
-from cStringIO import StringIO
 
 from gaffer.events import EventEmitter
+from pyuv import Timer
 
 from thriftworker.utils.decorators import cached_property
 from thriftworker.utils.loop import in_loop
 
+from thriftpool.exceptions import CallTimeout, ChannelClosed
+
+from .codecs import PickleCodec
+from .wheel import TimingWheel
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,84 +21,118 @@ class Proto(object):
     """Mixin that produce *encode* and *decode* methods. Each packet
     represented by simple structure:
 
-        +----------+--------------------+-----------------+
-        | Length   | Request id (UUID)  | Pickled object  |
-        +==========+====================+=================+
-        | 4 bytes  | 32 bytes           | undefined       |
-        +----------+--------------------+-----------------+
+        +----------+--------------+-----------------+
+        | Length   | Request id   | Encoded object  |
+        +==========+==============+=================+
+        | 4 bytes  | 4 bytes      | undefined       |
+        +----------+--------------+-----------------+
+
+    Length and request id are unsigned integers in network byte order,
+    length doesn't include header itself.
 
     """
 
-    @cached_property
-    def _length_struct(self):
-        """Pack and unpack length."""
-        return Struct('I')
+    #: Pack and unpack header.
+    _header_struct = Struct('!II')
+
+    #: Maximum value of request id, after that they wrap around.
+    max_request_id = 0xFFFFFFFF
 
-    def _prepend_length(self, data):
-        """Prepend length to data."""
-        return self._length_struct.pack(len(data)) + data
+    def __init__(self, codec):
+        self.codec = codec
+        super(Proto, self).__init__()
 
     def _encode(self, request_id, obj):
         """Convert given request to packet."""
-        assert isinstance(request_id, UUID), 'wrong request id given'
-        return self._prepend_length(request_id.hex + pickle.dumps(obj))
-
-    def _split_length(self, data):
-        """Return tuple of length and raw data."""
-        assert len(data) >= 4, 'given buffer to small (length)'
-        encoded_length, left_data = data[:4], data[4:]
-        length = self._length_struct.unpack(encoded_length)[0]
-        assert length > 0, 'wrong length provided'
-        return (length, left_data)
-
-    def _split_request_id(self, data):
-        """Return tuple of request id and raw data."""
-        assert len(data) >= 32, 'given buffer to small (request_id)'
-        request_id, left_data = data[:32], data[32:]
-        return (UUID(hex=request_id, version=4), left_data)
+        assert 0 < request_id <= self.max_request_id, \
+            'wrong request id given'
+        data = self.codec.encode(obj)
+        return self._header_struct.pack(len(data), request_id) + data
 
     def _decode_body(self, data):
-        """Unpickle given data."""
-        return pickle.loads(data)
+        """Decode given buffer."""
+        return self.codec.decode(data)
 
 
 class Receiver(Proto):
-    """Receive request from channel."""
+    """Receive request from channel. Incoming data accumulated in
+    preallocated buffer, complete packets decoded straight from it without
+    intermediate copies.
+
+    """
 
-    WAIT_LENGTH = 1
-    WAIT_PAYLOAD = 2
+    #: Initial size of receive buffer in bytes.
+    buffer_size = 64 * 1024
 
-    def __init__(self, stream, emitter):
+    def __init__(self, stream, emitter, codec):
         self.stream = stream
         self.emitter = emitter
-        self._buf = StringIO()
-        self._state = self.WAIT_LENGTH
-        self._received = self._length = 0
-        super(Receiver, self).__init__()
+        self._allocate(self.buffer_size)
+        super(Receiver, self).__init__(codec)
+
+    def _allocate(self, size, pending=None):
+        """Create new buffer, copy pending data to it."""
+        buf = bytearray(size)
+        length = 0
+        if pending is not None:
+            length = len(pending)
+            buf[:length] = pending
+        self._buf = buf
+        self._view = memoryview(buf)
+        self._start, self._end = 0, length
+
+    def _reserve(self, size):
+        """Ensure that buffer can hold given amount of bytes after pending
+        data. Move pending data to the beginning of buffer or grow it.
+
+        """
+        pending = self._end - self._start
+        capacity = len(self._buf)
+        if pending + size > capacity:
+            while capacity < pending + size:
+                capacity *= 2
+            self._allocate(capacity, self._view[self._start:self._end])
+        else:
+            # Source and destination overlap, copy pending data out first.
+            self._buf[:pending] = self._view[self._start:self._end].tobytes()
+            self._start, self._end = 0, pending
 
     def _on_read(self, evtype, info):
         data = info['data']
-        if self._state == self.WAIT_LENGTH:
-            # Try to receive packet length here.
-            self._length, data = self._split_length(data)
-            self._state = self.WAIT_PAYLOAD
-        if self._state == self.WAIT_PAYLOAD:
-            # Write data to buffer.
-            self._received += len(data)
-            self._buf.write(data)
-        if self._received >= self._length:
-            data = self._buf.getvalue()
-            data, left = data[:self._length], data[self._length:]
-            self._on_received(data)
-            self._buf = StringIO()
-            self._received = self._length = 0
-            self._state = self.WAIT_LENGTH
-            if left:
-                self._on_read(evtype, dict(data=left))
-
-    def _on_received(self, data):
-        request_id, data = self._split_request_id(data)
-        obj = self._decode_body(data)
+        size = len(data)
+        if self._end + size > len(self._buf):
+            self._reserve(size)
+        self._buf[self._end:self._end + size] = data
+        self._end += size
+        self._consume()
+
+    def _consume(self):
+        """Decode all complete packets stored in buffer."""
+        header_struct = self._header_struct
+        header_size = header_struct.size
+        while self._end - self._start >= header_size:
+            length, request_id = \
+                header_struct.unpack_from(self._buf, self._start)
+            begin = self._start + header_size
+            end = begin + length
+            if end > self._end:
+                # Wait for rest of packet.
+                break
+            self._start = end
+            self._on_received(request_id, self._view[begin:end])
+        if self._start == self._end:
+            if len(self._buf) > self.buffer_size:
+                # Don't hold memory allocated for huge packet.
+                self._allocate(self.buffer_size)
+            else:
+                self._start = self._end = 0
+
+    def _on_received(self, request_id, data):
+        try:
+            obj = self._decode_body(data)
+        except Exception as exc:
+            logger.exception(exc)
+            return
         self.emitter.publish("received", request_id=request_id, obj=obj)
 
     def start(self):
@@ -106,34 +143,104 @@ class Receiver(Proto):
 
 
 class Transmitter(Proto):
-    """Write request to channel."""
+    """Write request to channel. Calls that wasn't answered in time are
+    failed with :class:`CallTimeout`, deadlines are tracked by timing wheel
+    driven by single timer.
+
+    """
 
-    def __init__(self, stream, emitter):
+    #: Duration of timing wheel tick in seconds.
+    wheel_resolution = 0.1
+
+    #: Number of slots in timing wheel.
+    wheel_size = 512
+
+    def __init__(self, loop, stream, emitter, codec):
+        self.loop = loop
         self.stream = stream
         self.emitter = emitter
         self._requests = {}
-        super(Transmitter, self).__init__()
+        self._last_request_id = 0
+        self._wheel = TimingWheel(self.wheel_resolution, self.wheel_size)
+        super(Transmitter, self).__init__(codec)
 
-    def write(self, obj, callback=None, request_id=None):
-        request_id = request_id or uuid4()
+    def __len__(self):
+        """Return number of pending calls."""
+        return len(self._requests)
+
+    @cached_property
+    def _timer(self):
+        return Timer(self.loop)
+
+    @_timer.deleter
+    def _timer(self, handle):
+        if not handle.closed:
+            handle.close()
+
+    def _next_request_id(self):
+        """Return next request id."""
+        request_id = self._last_request_id % self.max_request_id + 1
+        self._last_request_id = request_id
+        return request_id
+
+    def write(self, obj, callback=None, request_id=None, timeout=None):
+        if request_id is None:
+            request_id = self._next_request_id()
         if callback is not None:
             self._requests[request_id] = callback
+            if timeout is not None:
+                self._schedule(request_id, timeout)
         data = self._encode(request_id, obj)
         self.stream.write(data)
 
+    def _schedule(self, request_id, timeout):
+        """Fail call with given id after timeout."""
+        self._wheel.add(request_id, timeout)
+        timer = self._timer
+        if not timer.active:
+            resolution = self.wheel_resolution
+            timer.start(self._on_tick, resolution, resolution)
+
+    def _unschedule(self, request_id):
+        """Forget deadline of call with given id."""
+        wheel = self._wheel
+        wheel.remove(request_id)
+        if not wheel and '_timer' in self.__dict__:
+            self._timer.stop()
+
+    def _on_tick(self, handle):
+        for request_id, _ in self._wheel.tick():
+            callback = self._requests.pop(request_id, None)
+            if callback is not None:
+                self._execute(callback, CallTimeout(
+                    'Call {0} not answered in time'.format(request_id)))
+        if not self._wheel:
+            handle.stop()
+
+    def _execute(self, callback, obj):
+        try:
+            callback(obj)
+        except Exception as exc:
+            logger.exception(exc)
+
     def _on_received(self, evtype, request_id, obj):
         callback = self._requests.pop(request_id, None)
         if callback is not None:
-            try:
-                callback(obj)
-            except Exception as exc:
-                logger.exception(exc)
+            self._unschedule(request_id)
+            self._execute(callback, obj)
 
     def start(self):
         self.emitter.subscribe('received', self._on_received)
 
     def stop(self):
         self.emitter.unsubscribe('received', self._on_received)
+        # Fail all pending calls, nobody will answer them.
+        requests, self._requests = self._requests, {}
+        self._wheel.clear()
+        del self._timer
+        for request_id, callback in requests.items():
+            self._execute(callback, ChannelClosed(
+                'Channel closed before call {0} answered'.format(request_id)))
 
 
 class Transport(object):
@@ -142,14 +249,19 @@ class Transport(object):
     Receiver = Receiver
     Transmitter = Transmitter
 
-    def __init__(self, loop, incoming, outgoing):
+    #: Default codec used to serialize messages.
+    Codec = PickleCodec
+
+    def __init__(self, loop, incoming, outgoing, codec=None):
         self.loop = loop
+        self.codec = codec if codec is not None else self.Codec()
         self._emitter = EventEmitter(loop)
-        self._receiver = self.Receiver(incoming, self._emitter)
-        self._transmitter = self.Transmitter(outgoing, self._emitter)
+        self._receiver = self.Receiver(incoming, self._emitter, self.codec)
+        self._transmitter = self.Transmitter(loop, outgoing, self._emitter,
+                                             self.codec)
 
-    def write(self, obj, callback=None, request_id=None):
-        self._transmitter.write(obj, callback, request_id)
+    def write(self, obj, callback=None, request_id=None, timeout=None):
+        self._transmitter.write(obj, callback, request_id, timeout)
 
     def subscribe(self, listener):
         self._emitter.subscribe('received', listener)
@@ -170,9 +282,9 @@ class Transport(object):
 class Consumer(Transport):
     """Pull commands from consumer, execute them and return result."""
 
-    def __init__(self, loop, incoming, outgoing, handler):
+    def __init__(self, loop, incoming, outgoing, handler, codec=None):
         self.handler = handler
-        super(Consumer, self).__init__(loop, incoming, outgoing)
+        super(Consumer, self).__init__(loop, incoming, outgoing, codec)
 
     def _on_incoming(self, evtype, request_id, obj):
         method_name, args, kwargs = obj
@@ -197,12 +309,24 @@ class Consumer(Transport):
 class Producer(Transport):
     """Push commands to consumer."""
 
-    def __init__(self, loop, incoming, outgoing, process):
-        super(Producer, self).__init__(loop, incoming, outgoing)
+    def __init__(self, loop, incoming, outgoing, process, codec=None,
+                 timeout=None):
+        super(Producer, self).__init__(loop, incoming, outgoing, codec)
         self.process = process
+        self.timeout = timeout
+
+    def __len__(self):
+        """Return number of pending calls."""
+        return len(self._transmitter)
 
     @in_loop
-    def apply(self, method_name, callback=None, args=None, kwargs=None):
-        """Enqueue new remote procedure call."""
+    def apply(self, method_name, callback=None, args=None, kwargs=None,
+              timeout=None):
+        """Enqueue new remote procedure call. If call not answered in
+        given timeout (in seconds) callback receives :class:`CallTimeout`
+        instance.
+
+        """
         assert self.process.active, 'process not active'
-        self.write((str(method_name), args or [], kwargs or {}), callback)
+        self.write((str(method_name), args or [], kwargs or {}), callback,
+                   timeout=timeout if timeout is not None else self.timeout)
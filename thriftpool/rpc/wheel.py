@@ -0,0 +1,71 @@
+"""Hashed timing wheel used to expire pending calls."""
+from __future__ import absolute_import
+
+import math
+
+__all__ = ['TimingWheel']
+
+
+class TimingWheel(object):
+    """Store keys in slots by their deadline. Each :meth:`tick` moves cursor
+    to next slot and returns keys that expired in it. Adding, removing and
+    expiring keys cost O(1) regardless of number of stored keys.
+
+    :param resolution: duration of one tick in seconds
+    :param size: number of slots in wheel
+
+    """
+
+    def __init__(self, resolution=0.1, size=512):
+        assert resolution > 0, 'resolution must be positive'
+        assert size > 0, 'size must be positive'
+        self.resolution = resolution
+        self.size = size
+        self._slots = [{} for _ in range(size)]
+        self._positions = {}
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def add(self, key, timeout, value=None):
+        """Expire given key after timeout (in seconds) elapsed."""
+        if key in self._positions:
+            self.remove(key)
+        ticks = max(1, int(math.ceil(timeout / self.resolution)))
+        index = (self._cursor + ticks) % self.size
+        self._slots[index][key] = [(ticks - 1) // self.size, value]
+        self._positions[key] = index
+
+    def remove(self, key):
+        """Forget given key. Return stored value or :const:`None`."""
+        index = self._positions.pop(key, None)
+        if index is None:
+            return None
+        return self._slots[index].pop(key)[1]
+
+    def tick(self):
+        """Advance wheel. Return list of expired ``(key, value)`` pairs."""
+        self._cursor = cursor = (self._cursor + 1) % self.size
+        slot = self._slots[cursor]
+        expired = []
+        for key, entry in slot.items():
+            if entry[0] > 0:
+                entry[0] -= 1
+                continue
+            del slot[key]
+            del self._positions[key]
+            expired.append((key, entry[1]))
+        return expired
+
+    def clear(self):
+        """Remove all keys. Return list of removed ``(key, value)`` pairs."""
+        removed = []
+        for slot in self._slots:
+            removed.extend((key, entry[1]) for key, entry in slot.items())
+            slot.clear()
+        self._positions.clear()
+        return removed
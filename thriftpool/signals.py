@@ -48,4 +48,16 @@ app_shutdown = Signal(providing_args=['app'])
 collect_excluded_fds = Signal(providing_args=[])
 
 #: Called after application received signal SIGHUP.
-app_on_hup = Signal(providing_args=['app'])
\ No newline at end of file
+app_on_hup = Signal(providing_args=['app'])
+
+#: Worker process was spawned in given pool, it isn't initialized yet.
+worker_spawned = Signal(providing_args=['process_id', 'pool'])
+
+#: Worker process exited before it was initialized.
+worker_lost = Signal(providing_args=['process_id'])
+
+#: Worker was initialized and accepts connections.
+worker_ready = Signal(providing_args=['process_id'])
+
+#: Initialized worker exited.
+worker_exited = Signal(providing_args=['process_id'])
@@ -16,3 +16,31 @@ class TestApp(TestCase):
         self.assertIn('ThriftPool', app.slots)
         # check configuration serialization
         self.assertEqual(dict(self.app.config), dict(app.config))
+
+    def test_pools(self):
+        slots = self.app.slots
+        processor = 'thriftpool.remote.ThriftPool:Processor'
+        handler = 'thriftpool.remote.handler:Handler'
+        slots.register('Default', processor, handler)
+        slots.register('Batch', processor, handler, pool='batch')
+        self.assertEqual(set([None, 'batch']), slots.pools)
+        batch = slots.in_pool('batch')
+        self.assertIn('Batch', batch)
+        self.assertNotIn('Default', batch)
+        # pool overrides only own settings
+        with self.custom_settings(POOLS={'batch': {'CONCURRENCY': 8}}):
+            config = self.app.pool_config('batch')
+            self.assertEqual(8, config.CONCURRENCY)
+            self.assertEqual(self.app.config.WORKERS, config.WORKERS)
+            self.assertEqual(self.app.config.CONCURRENCY,
+                             self.app.pool_config(None).CONCURRENCY)
+
+    def test_slot_ready(self):
+        processor = 'thriftpool.remote.ThriftPool:Processor'
+        self.app.slots.register('Default', processor,
+                                'thriftpool.remote.handler:Handler')
+        slot = self.app.slots['Default']
+        # handler without hook is always ready
+        self.assertTrue(slot.ready())
+        slot.service.handler.ready = lambda: False
+        self.assertFalse(slot.ready())
@@ -0,0 +1,35 @@
+from __future__ import absolute_import
+
+import socket
+from thread import get_ident
+
+from thriftpool.components.worker.acceptors import Acceptor
+from thriftpool.tests.utils import TestCase
+
+
+class AcceptorTestCase(TestCase):
+
+    def setUp(self):
+        super(AcceptorTestCase, self).setUp()
+        self.app.loop.ident = get_ident()
+        sock = self.sock = socket.socket()
+        self.addCleanup(sock.close)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen(1)
+        self.app.slots.register('ThriftPool',
+                                'thriftpool.remote.ThriftPool:Processor',
+                                'thriftpool.remote.handler:Handler')
+        self.thriftworker.services.register(
+            'ThriftPool', self.app.slots['ThriftPool'].service.processor)
+
+    def test_shutdown(self):
+        acceptor = self.thriftworker.Acceptor('ThriftPool', self.sock.fileno())
+        self.assertIsInstance(acceptor, Acceptor)
+        acceptor.start()
+        self.assertTrue(acceptor.active)
+        acceptor.shutdown()
+        self.assertTrue(acceptor.shut_down)
+        self.assertFalse(acceptor.active)
+        # Worker resumes acceptors after overflow.
+        acceptor.start()
+        self.assertFalse(acceptor.active)
@@ -0,0 +1,219 @@
+from __future__ import absolute_import
+
+from mock import Mock, patch
+
+from thriftpool.components.manager.autoscaler import Autoscaler
+from thriftpool.tests.utils import TestCase
+
+
+class FakeLoop(object):
+
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        return self.time
+
+
+def create_config(**kwargs):
+    settings = dict(AUTOSCALE=True, WORKERS=2, MIN_WORKERS=1,
+                    MAX_WORKERS=3, CONCURRENCY=10,
+                    AUTOSCALE_UP_THRESHOLD=0.8,
+                    AUTOSCALE_DOWN_THRESHOLD=0.3,
+                    AUTOSCALE_LATENCY=None, AUTOSCALE_BACKLOG=None,
+                    AUTOSCALE_UP_COOLDOWN=10.0,
+                    AUTOSCALE_DOWN_COOLDOWN=60.0)
+    settings.update(kwargs)
+    return Mock(**settings)
+
+
+class FakeProcesses(object):
+    """Workers of default pool with gauges and metrics set by test."""
+
+    def __init__(self, config):
+        self.factories = {None: Mock(config=config)}
+        self.gauges = {}
+        self.metrics = {}
+        self.draining = set()
+        self.listeners = []
+        self.grown = []
+        self.shrunk = []
+
+    def __iter__(self):
+        return iter(sorted(self.gauges))
+
+    @property
+    def sizes(self):
+        return {None: len(self.gauges)}
+
+    def is_ready(self):
+        return True
+
+    def members(self, pool):
+        return sorted(self.gauges)
+
+    def read_gauges(self, process_id):
+        return self.gauges[process_id]
+
+    def read_metrics(self, process_id):
+        return self.metrics.get(process_id)
+
+    def listeners_of(self, pool):
+        return self.listeners
+
+    def grow(self, pool):
+        self.grown.append(pool)
+
+    def shrink(self, process_id):
+        self.shrunk.append(process_id)
+
+    def set_load(self, process_id, active, queued=0):
+        self.gauges[process_id] = dict(active=active, queued=queued)
+
+    def set_dispatching(self, process_id, total, count):
+        self.metrics[process_id] = {'dispatching_timers': {
+            'Service::method': {'sum': total, 'count': count, 'min': 0.0,
+                                'max': 0.0, 'squared_sum': 0.0}}}
+
+
+class AutoscalerTestCase(TestCase):
+
+    def setUp(self):
+        super(AutoscalerTestCase, self).setUp()
+        self.loop = FakeLoop()
+        patcher = patch.object(Autoscaler, 'loop', self.loop)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app.config.AUTOSCALE_WINDOW = 3
+
+    def create_autoscaler(self, **kwargs):
+        self.processes = FakeProcesses(create_config(**kwargs))
+        return Autoscaler(self.app, self.processes)
+
+    def tick(self, autoscaler, times=1):
+        for _ in range(times):
+            self.loop.time += 1000
+            autoscaler.scale()
+
+    def test_bounds(self):
+        config = create_config(MIN_WORKERS=None, MAX_WORKERS=None)
+        self.assertEqual((2, 2), Autoscaler.bounds(config))
+        self.assertEqual((1, 3), Autoscaler.bounds(create_config()))
+
+    def test_loads(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 5, 3)
+        processes.set_load(2, 10)
+        processes.set_load(3, 0)
+        processes.gauges[4] = None
+        processes.draining.add(3)
+        self.assertEqual({1: 0.8, 2: 1.0}, autoscaler.loads(None))
+
+    def test_latency(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 0)
+        processes.set_load(2, 0)
+        processes.set_dispatching(1, 100.0, 10)
+        processes.set_dispatching(2, 50.0, 10)
+        self.assertEqual(7.5, autoscaler.latency(None))
+        # Only answers dispatched since previous call are counted.
+        processes.set_dispatching(1, 130.0, 11)
+        self.assertEqual(30.0, autoscaler.latency(None))
+        self.assertEqual(0.0, autoscaler.latency(None))
+
+    def test_grow(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 9)
+        processes.set_load(2, 8)
+        # Decision is made only when window is full.
+        self.tick(autoscaler, 2)
+        self.assertEqual([], processes.grown)
+        self.tick(autoscaler)
+        self.assertEqual([None], processes.grown)
+        # Window is reset and cooldown isn't over.
+        processes.set_load(3, 10)
+        self.tick(autoscaler, 6)
+        self.assertEqual([None], processes.grown)
+
+    def test_max_workers(self):
+        autoscaler = self.create_autoscaler(MAX_WORKERS=2)
+        self.processes.set_load(1, 10)
+        self.processes.set_load(2, 10)
+        self.tick(autoscaler, 5)
+        self.assertEqual([], self.processes.grown)
+
+    def test_min_workers(self):
+        autoscaler = self.create_autoscaler(MIN_WORKERS=2)
+        self.processes.set_load(1, 0)
+        # Pool smaller than bounds is grown regardless of window.
+        self.tick(autoscaler)
+        self.assertEqual([None], self.processes.grown)
+
+    def test_hysteresis(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        # Load between thresholds changes nothing.
+        processes.set_load(1, 5)
+        processes.set_load(2, 5)
+        self.tick(autoscaler, 10)
+        self.assertEqual(([], []), (processes.grown, processes.shrunk))
+
+    def test_shrink_least_loaded(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 2)
+        processes.set_load(2, 1)
+        self.tick(autoscaler, 3)
+        self.assertEqual([2], processes.shrunk)
+
+    def test_down_cooldown(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 9)
+        processes.set_load(2, 9)
+        self.tick(autoscaler, 3)
+        self.assertEqual([None], processes.grown)
+        processes.set_load(1, 0)
+        processes.set_load(2, 0)
+        processes.set_load(3, 0)
+        self.tick(autoscaler, 59)
+        self.assertEqual([], processes.shrunk)
+        self.tick(autoscaler)
+        self.assertEqual([1], processes.shrunk)
+
+    def test_latency_threshold(self):
+        autoscaler = self.create_autoscaler(AUTOSCALE_LATENCY=20.0)
+        processes = self.processes
+        processes.set_load(1, 1)
+        processes.set_load(2, 1)
+        for i in range(1, 4):
+            # Each answer waited 25 ms.
+            processes.set_dispatching(1, i * 250.0, i * 10)
+            self.tick(autoscaler)
+        self.assertEqual([None], processes.grown)
+
+    def test_backlog(self):
+        autoscaler = self.create_autoscaler(AUTOSCALE_BACKLOG=10)
+        processes = self.processes
+        processes.listeners = [Mock(queued=6), Mock(queued=None)]
+        processes.set_load(1, 5)
+        processes.set_load(2, 5)
+        self.assertEqual(6, autoscaler.backlog(None))
+        self.tick(autoscaler, 3)
+        self.assertEqual([], processes.grown)
+        # Connections wait to be accepted, though threads aren't busy.
+        processes.listeners.append(Mock(queued=4))
+        self.tick(autoscaler)
+        self.assertEqual([None], processes.grown)
+
+    def test_not_ready(self):
+        autoscaler = self.create_autoscaler()
+        processes = self.processes
+        processes.set_load(1, 10)
+        processes.set_load(2, 10)
+        processes.draining.add(3)
+        self.tick(autoscaler, 5)
+        self.assertEqual([], processes.grown)
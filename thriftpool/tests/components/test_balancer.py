@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+
+from mock import Mock, patch
+
+from thriftpool.components.manager.balancer import Balancer, overloaded
+from thriftpool.tests.utils import TestCase
+
+
+class FakeProxy(object):
+    """Proxy of worker that records acceptor calls."""
+
+    def __init__(self, calls, pid):
+        self.calls = calls
+        self.pid = pid
+
+    def spawn(self, run):
+        run(self)
+
+    def start_acceptor(self, name):
+        self.calls.append(('start', self.pid, name))
+
+    def stop_acceptor(self, name):
+        self.calls.append(('stop', self.pid, name))
+
+
+class FakeProcesses(object):
+    """Workers of one pool with gauges set by test."""
+
+    def __init__(self):
+        self.factories = {None: Mock()}
+        self.gauges = {}
+        self.draining = set()
+        self.calls = []
+        self.broker = self
+        self.listener = Mock(started=True)
+        self.listener.name = 'Service'
+
+    def __contains__(self, pid):
+        return pid in self.gauges
+
+    def __getitem__(self, pid):
+        return FakeProxy(self.calls, pid)
+
+    def members(self, pool):
+        return sorted(self.gauges)
+
+    def read_gauges(self, pid):
+        return self.gauges[pid]
+
+    def pool_of(self, pid):
+        return None
+
+    def listeners_of(self, pool):
+        return [self.listener]
+
+    def set_load(self, pid, load, accepting=True, updated=0.0):
+        self.gauges[pid] = dict(active=load, queued=0, accepting=accepting,
+                                updated=updated)
+
+
+class OverloadedTestCase(TestCase):
+
+    def test_overloaded(self):
+        self.assertEqual(set(), overloaded({}, 2))
+        self.assertEqual(set(), overloaded({1: 10}, 2))
+        self.assertEqual({2}, overloaded({1: 1, 2: 4, 3: 3}, 2))
+        self.assertEqual(set(), overloaded({1: 1, 2: 3}, 2))
+
+
+class BalancerTestCase(TestCase):
+
+    def setUp(self):
+        super(BalancerTestCase, self).setUp()
+        self.processes = FakeProcesses()
+        self.balancer = Balancer(self.app, [], self.processes)
+        self.time = 100.0
+        patcher = patch('thriftpool.components.manager.balancer.time.time',
+                        lambda: self.time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def balance(self):
+        del self.processes.calls[:]
+        with self.custom_settings(ACCEPT_BALANCE_THRESHOLD=2):
+            self.balancer.balance()
+        return self.processes.calls
+
+    def test_pause_resume(self):
+        processes = self.processes
+        processes.set_load(1, 0)
+        processes.set_load(2, 5)
+        self.assertEqual([('stop', 2, 'Service')], self.balance())
+        self.assertEqual({2: 100.0}, self.balancer.paused)
+        # Worker still doesn't accept, so it isn't paused again.
+        processes.set_load(2, 5, accepting=False, updated=100.5)
+        self.time = 101.0
+        self.assertEqual([], self.balance())
+        # Gauges published before pause are stale.
+        processes.set_load(2, 5, accepting=True, updated=99.0)
+        self.assertEqual([], self.balance())
+        # Worker resumed accepting itself.
+        processes.set_load(2, 5, accepting=True, updated=101.5)
+        self.time = 102.0
+        self.assertEqual([('stop', 2, 'Service')], self.balance())
+        self.assertEqual({2: 102.0}, self.balancer.paused)
+        # Load evened out.
+        processes.set_load(2, 1, accepting=False, updated=102.5)
+        self.assertEqual([('start', 2, 'Service')], self.balance())
+        self.assertEqual({}, self.balancer.paused)
+
+    def test_exited(self):
+        processes = self.processes
+        processes.set_load(1, 0)
+        processes.set_load(2, 5)
+        self.balance()
+        del processes.gauges[2]
+        self.assertEqual([], self.balance())
+        self.assertEqual({}, self.balancer.paused)
+
+    def test_draining(self):
+        processes = self.processes
+        processes.set_load(1, 0)
+        processes.set_load(2, 5)
+        processes.draining.add(2)
+        self.assertEqual([], self.balance())
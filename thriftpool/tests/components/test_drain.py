@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+
+from mock import Mock, patch
+
+from thriftpool.components.manager.processes import ProcessManager
+from thriftpool.controllers.worker import WorkerController
+from thriftpool.tests.utils import TestCase
+
+
+class FakeLoop(object):
+    """Loop which time moves only when manager sleeps."""
+
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        return self.time
+
+
+class FakeProxy(object):
+    """Proxy of worker that has given number of connections left after
+    each drain call.
+
+    """
+
+    def __init__(self, remaining):
+        self.remaining = list(remaining)
+        self.calls = []
+
+    def spawn(self, run):
+        run(self)
+
+    def drain(self, close_idle=False):
+        self.calls.append(close_idle)
+        if len(self.remaining) > 1:
+            return self.remaining.pop(0)
+        return self.remaining[0]
+
+
+class ProcessManagerDrainTestCase(TestCase):
+
+    def setUp(self):
+        super(ProcessManagerDrainTestCase, self).setUp()
+        self.loop = FakeLoop()
+        patcher = patch.object(ProcessManager, 'loop', self.loop)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.processes = ProcessManager(self.app, [], Mock(zygote=None))
+        self.processes._bootstrapped[1] = Mock(pool=None)
+        self.processes._sleep = self.sleep
+        self.processes.broker = self.broker = Mock()
+        self.broker.__contains__ = Mock(return_value=True)
+        self.callback = Mock()
+
+    def sleep(self, seconds):
+        self.loop.time += seconds * 1000
+
+    def drain(self, *remaining):
+        proxy = FakeProxy(remaining)
+        self.broker.__getitem__ = Mock(return_value=proxy)
+        self.processes.drain(1, self.callback)
+        return proxy
+
+    def test_drain(self):
+        with self.custom_settings(WORKER_DRAIN_INTERVAL=0.1,
+                                  WORKER_DRAIN_GRACE=0.2):
+            proxy = self.drain(2, 2, 2, 1, 0)
+        # Idle connections are closed only after grace period.
+        self.assertEqual([False, False, True, True, True], proxy.calls)
+        self.callback.assert_called_once_with()
+        self.broker.unregister.assert_called_once_with(1)
+        self.assertEqual(set(), self.processes.draining)
+
+    def test_timeout(self):
+        with self.custom_settings(WORKER_DRAIN_INTERVAL=0.1,
+                                  WORKER_DRAIN_GRACE=0.2,
+                                  WORKER_DRAIN_TIMEOUT=1.0):
+            proxy = self.drain(1)
+        self.assertEqual(11, len(proxy.calls))
+        self.callback.assert_called_once_with()
+
+    def test_not_registered(self):
+        self.broker.__contains__ = Mock(return_value=False)
+        self.processes.drain(1, self.callback)
+        self.callback.assert_called_once_with()
+        self.assertFalse(self.broker.unregister.called)
+
+
+class WorkerDrainTestCase(TestCase):
+
+    def setUp(self):
+        super(WorkerDrainTestCase, self).setUp()
+        self.controller = WorkerController.__new__(WorkerController)
+        self.controller.app = self.app
+
+    def test_close_idle(self):
+        idle, busy, closed = Mock(), Mock(), Mock()
+        closed.is_ready.return_value = False
+        acceptor = Mock()
+        acceptor.__iter__ = Mock(return_value=iter([idle, busy, closed]))
+        self.controller.acceptors = [acceptor]
+        self.app.inflight.add(busy)
+        self.controller._close_idle()
+        self.assertTrue(idle.close.called)
+        self.assertFalse(busy.close.called)
+        self.assertFalse(closed.close.called)
@@ -0,0 +1,178 @@
+from __future__ import absolute_import
+
+from mock import Mock, patch
+
+import psutil
+
+from thriftpool.components.manager.reaper import Reaper
+from thriftpool.tests.utils import TestCase
+
+
+class FakeLoop(object):
+
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        return self.time
+
+
+def create_config(ttl=None, max_rss=None, max_requests=None):
+    return Mock(WORKER_TTL=ttl, WORKER_MAX_RSS=max_rss,
+                WORKER_MAX_REQUESTS=max_requests)
+
+
+class FakeProcesses(object):
+    """Workers of one pool with usage set by test."""
+
+    def __init__(self, config):
+        self.factories = {None: Mock(config=config)}
+        self.config = config
+        self.workers = {}
+        self.gauges = {}
+        self.metrics = {}
+        self.draining = set()
+        self.eliminated = []
+
+    def __len__(self):
+        return len(self.workers)
+
+    def __iter__(self):
+        return iter(sorted(self.workers))
+
+    def __getitem__(self, process_id):
+        return self.workers[process_id]
+
+    def is_ready(self):
+        return True
+
+    def config_of(self, process_id):
+        return self.config
+
+    def read_gauges(self, process_id):
+        return self.gauges.get(process_id)
+
+    def read_metrics(self, process_id):
+        return self.metrics.get(process_id)
+
+    def eliminate(self, process_id):
+        self.eliminated.append(process_id)
+
+    def add(self, process_id, startup_time=0, os_pid=None, requests=None):
+        self.workers[process_id] = Mock(startup_time=startup_time,
+                                        os_pid=os_pid or process_id + 100)
+        if requests is not None:
+            self.metrics[process_id] = {'counters': {
+                'response_served': {'count': requests}}}
+
+
+class ReaperTestCase(TestCase):
+
+    def setUp(self):
+        super(ReaperTestCase, self).setUp()
+        self.loop = FakeLoop()
+        for patcher in [
+                patch.object(Reaper, 'loop', self.loop),
+                patch('thriftpool.components.manager.reaper.psutil.Process',
+                      self.process),
+                patch('thriftpool.components.manager.reaper.random.uniform',
+                      lambda a, b: b)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.rss = {}
+        self.handle = Mock()
+
+    def process(self, pid):
+        if pid not in self.rss:
+            raise psutil.NoSuchProcess(pid)
+        return Mock(**{'get_memory_info.return_value': Mock(
+            rss=self.rss[pid])})
+
+    def create_reaper(self, config, jitter=0.0):
+        self.processes = FakeProcesses(config)
+        self.app.config.WORKER_REAP_JITTER = jitter
+        self.app.config.WORKER_REAP_DELAY = 10
+        return Reaper(self.app, self.processes)
+
+    def test_enabled(self):
+        self.assertFalse(self.create_reaper(create_config()).enabled)
+        self.assertTrue(self.create_reaper(
+            create_config(max_requests=10)).enabled)
+
+    def test_memory(self):
+        reaper = self.create_reaper(create_config(max_rss=100))
+        self.processes.add(1)
+        self.processes.gauges[1] = {'pid': 5000}
+        self.rss[5000] = 50 * 1024 * 1024
+        # Forked worker is measured by PID that it published.
+        self.assertEqual({'memory': 0.5}, reaper.usage(1))
+        self.processes.add(2)
+        self.rss[102] = 10 * 1024 * 1024
+        self.assertEqual({'memory': 0.1}, reaper.usage(2))
+        # Exited process isn't measured.
+        self.processes.add(3)
+        self.assertEqual({}, reaper.usage(3))
+
+    def test_requests(self):
+        reaper = self.create_reaper(create_config(max_requests=100))
+        self.processes.add(1, requests=30)
+        self.processes.add(2)
+        self.assertEqual({'requests': 0.3}, reaper.usage(1))
+        # Worker hasn't published metrics yet.
+        self.assertEqual({}, reaper.usage(2))
+
+    def test_jitter(self):
+        reaper = self.create_reaper(create_config(max_requests=100),
+                                    jitter=0.2)
+        self.processes.add(1, requests=80)
+        # Limit is lowered by factor of process.
+        self.assertEqual(80 / 80.0, reaper.usage(1)['requests'])
+        self.assertEqual(0.8, reaper._factors[1])
+
+    def test_worst_offender(self):
+        reaper = self.create_reaper(create_config(ttl=100, max_requests=100))
+        self.loop.time = 50 * 1000
+        self.processes.add(1, requests=120)
+        self.processes.add(2, requests=150)
+        self.processes.add(3, requests=10, startup_time=-200 * 1000)
+        reaper._loop_cb(self.handle)
+        # Lifetime of third process is used by 250%.
+        self.assertEqual([3], self.processes.eliminated)
+        self.handle.start.assert_called_once_with(
+            reaper._loop_cb, 10.0, reaper.resolution)
+
+    def test_skip_draining(self):
+        reaper = self.create_reaper(create_config(max_requests=100))
+        self.processes.add(1, requests=150)
+        self.processes.add(2, requests=120)
+        self.processes.draining.add(1)
+        reaper._loop_cb(self.handle)
+        self.assertEqual([2], self.processes.eliminated)
+
+    def test_nothing_exceeded(self):
+        reaper = self.create_reaper(create_config(max_requests=100))
+        self.processes.add(1, requests=99)
+        reaper._loop_cb(self.handle)
+        self.assertEqual([], self.processes.eliminated)
+        self.assertFalse(self.handle.start.called)
+
+    def test_delay_jitter(self):
+        reaper = self.create_reaper(create_config(max_requests=100),
+                                    jitter=0.5)
+        self.processes.add(1, requests=100)
+        reaper._loop_cb(self.handle)
+        self.assertEqual([1], self.processes.eliminated)
+        # Delay is increased by random part of jitter.
+        self.handle.start.assert_called_once_with(
+            reaper._loop_cb, 15.0, reaper.resolution)
+
+    def test_forget_exited(self):
+        reaper = self.create_reaper(create_config(max_requests=100),
+                                    jitter=0.5)
+        self.processes.add(1, requests=0)
+        reaper._loop_cb(self.handle)
+        self.assertIn(1, reaper._factors)
+        del self.processes.workers[1]
+        self.processes.add(2, requests=0)
+        reaper._loop_cb(self.handle)
+        self.assertEqual([2], list(reaper._factors))
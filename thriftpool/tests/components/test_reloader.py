@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+
+from thread import get_ident
+
+from thriftpool.components.manager.reloader import Reloader
+from thriftpool.signals import worker_spawned, worker_lost, \
+    worker_ready, worker_exited
+from thriftpool.tests.utils import TestCase
+
+
+class FakeProcesses(object):
+    """Process manager that only records what reloader asks of it."""
+
+    def __init__(self, pools):
+        #: Pools of initialized workers.
+        self.pools = pools
+        self.scaled = []
+        self.retired = []
+        self.discarded = []
+
+    def __iter__(self):
+        return iter(self.pools)
+
+    def pool_of(self, process_id):
+        return self.pools[process_id]
+
+    def scale(self, pool, n):
+        self.scaled.append((pool, n))
+
+    def retire(self, process_id):
+        self.retired.append(process_id)
+
+    def discard(self, process_id, pool):
+        self.discarded.append((process_id, pool))
+
+    def spawned(self, process_id, pool=None):
+        worker_spawned.send(sender=self, process_id=process_id, pool=pool)
+
+    def lost(self, process_id):
+        worker_lost.send(sender=self, process_id=process_id)
+
+    def ready(self, process_id, pool=None):
+        self.pools[process_id] = pool
+        worker_ready.send(sender=self, process_id=process_id)
+
+    def exited(self, process_id):
+        self.pools.pop(process_id, None)
+        worker_exited.send(sender=self, process_id=process_id)
+
+
+class ReloaderTestCase(TestCase):
+
+    def setUp(self):
+        super(ReloaderTestCase, self).setUp()
+        self.app.loop.ident = get_ident()
+        self.app.config.WORKER_RELOAD_CONCURRENCY = 1
+        self.processes = FakeProcesses({1: None, 2: None})
+        self.reloader = Reloader(self.app, self.processes)
+        self.reloader.start()
+
+    def tearDown(self):
+        self.reloader.stop()
+
+    def test_ready(self):
+        processes = self.processes
+        self.reloader.reload()
+        self.assertEqual([(None, 1)], processes.scaled)
+        processes.spawned(3)
+        processes.ready(3)
+        self.assertEqual([1], processes.retired)
+        self.assertEqual([(None, 1), (None, 1)], processes.scaled)
+        processes.spawned(4)
+        processes.ready(4)
+        self.assertEqual([1, 2], processes.retired)
+        self.assertFalse(self.reloader.reloading)
+        self.assertEqual([], processes.discarded)
+
+    def test_pools(self):
+        processes = self.processes
+        processes.pools = {1: None, 2: 'batch'}
+        self.app.config.WORKER_RELOAD_CONCURRENCY = 2
+        self.reloader.reload()
+        self.assertEqual([(None, 1), ('batch', 1)], processes.scaled)
+        processes.spawned(3, 'batch')
+        processes.ready(3, 'batch')
+        self.assertEqual([2], processes.retired)
+
+    def test_timeout(self):
+        processes = self.processes
+        self.app.config.WORKER_RELOAD_CONCURRENCY = 2
+        self.reloader.reload()
+        processes.spawned(3)
+        self.reloader._on_timeout(None)
+        self.assertFalse(self.reloader.reloading)
+        # Old workers keep serving, only replacements are stopped.
+        self.assertEqual([], processes.retired)
+        self.assertEqual([(3, None)], processes.discarded)
+        self.assertNotIn((None, -1), processes.scaled)
+        # Replacement that wasn't spawned yet is stopped on spawn.
+        processes.spawned(4)
+        self.assertEqual([(3, None), (4, None)], processes.discarded)
+        processes.spawned(5)
+        self.assertEqual(2, len(processes.discarded))
+
+    def test_self_exit(self):
+        processes = self.processes
+        self.reloader.reload()
+        processes.spawned(3)
+        processes.exited(1)
+        # Replacement of exited worker is stopped, next one is started.
+        self.assertEqual([(3, None)], processes.discarded)
+        self.assertEqual([(None, 1), (None, 1)], processes.scaled)
+        processes.spawned(4)
+        processes.ready(4)
+        self.assertEqual([2], processes.retired)
+        self.assertFalse(self.reloader.reloading)
+
+    def test_lost_replacement(self):
+        processes = self.processes
+        self.reloader.reload()
+        processes.spawned(3)
+        # Respawn may be reported before exit of replacement.
+        processes.spawned(4)
+        processes.lost(3)
+        processes.ready(4)
+        self.assertEqual([1], processes.retired)
+        processes.spawned(5)
+        processes.lost(5)
+        processes.spawned(6)
+        processes.ready(6)
+        self.assertEqual([1, 2], processes.retired)
+        self.assertEqual([], processes.discarded)
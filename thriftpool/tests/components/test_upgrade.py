@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+
+import os
+import subprocess
+import sys
+
+from thriftpool.components.manager.upgrade import LISTEN_FDS_ENV, \
+    SUCCESSOR_SCRIPT, encode_fds, decode_fds
+from thriftpool.tests.utils import TestCase
+
+CHECK_SCRIPT = '''
+import os, sys
+def is_open(fd):
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+sys.exit(0 if is_open(int(sys.argv[1])) and not is_open(int(sys.argv[2]))
+         else 1)
+'''
+
+
+class UpgradeTestCase(TestCase):
+
+    def test_encode_fds(self):
+        fds = {'Service': 5, 'http:2:0:localhost:8080': 7}
+        self.assertEqual(fds, decode_fds(encode_fds(fds)))
+        self.assertEqual({}, decode_fds(None))
+
+    def test_successor_closes_fds(self):
+        keep, other = os.pipe()
+        try:
+            env = dict(os.environ)
+            env[LISTEN_FDS_ENV] = encode_fds({'Service': keep})
+            command = [sys.executable, '-c', CHECK_SCRIPT,
+                       str(keep), str(other)]
+            process = subprocess.Popen(
+                [sys.executable, '-c', SUCCESSOR_SCRIPT] + command, env=env)
+            self.assertEqual(0, process.wait())
+        finally:
+            os.close(keep)
+            os.close(other)
@@ -0,0 +1,66 @@
+from __future__ import absolute_import
+
+import os
+import signal
+import socket
+import time
+from thread import get_ident
+
+from pyuv import Timer, UV_RUN_ONCE
+
+from thriftpool.components.manager.zygote import Zygote
+from thriftpool.tests.utils import TestCase
+
+#: Zygote that reports readiness without preloading anything and exits
+#: when manager closes control channel.
+ZYGOTE_SCRIPT = '''
+import os
+from thriftpool.utils.serializers import StreamSerializer
+StreamSerializer().decode_from_stream(3)
+os.write(3, b'1')
+os.read(3, 1)
+'''
+
+
+class ZygoteTestCase(TestCase):
+
+    def setUp(self):
+        super(ZygoteTestCase, self).setUp()
+        self.loop = self.app.loop
+        self.loop.ident = get_ident()
+        self.zygote = Zygote(self.app)
+        self.zygote.initialize_script = ZYGOTE_SCRIPT
+
+    def tearDown(self):
+        self.zygote.abort()
+
+    def run_until(self, condition, timeout=10.0):
+        timer = Timer(self.loop)
+        timer.start(lambda handle: None, 0.01, 0.01)
+        deadline = time.time() + timeout
+        try:
+            while not condition():
+                self.assertLess(time.time(), deadline)
+                self.loop.run(UV_RUN_ONCE)
+        finally:
+            timer.close()
+
+    def test_restart(self):
+        zygote = self.zygote
+        zygote._listen()
+        zygote._spawn()
+        self.run_until(lambda: zygote.ready)
+        first = zygote.process
+        os.kill(first.pid, signal.SIGKILL)
+        # Zygote died, but loop hasn't restarted it yet. Launcher started
+        # meanwhile waits in backlog.
+        time.sleep(0.1)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(sock.close)
+        sock.connect(zygote.path)
+        self.run_until(lambda: zygote.process is not first and zygote.ready)
+        second = zygote.process
+        zygote.stop()
+        self.run_until(lambda: not second.active)
+        self.assertIs(second, zygote.process)
+        self.assertIsNone(zygote.control)
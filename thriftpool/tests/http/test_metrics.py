@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.http.handlers.metrics import MetricsHandler, format_sample
+
+
+class TestMetricsHandler(TestCase):
+
+    def create_handler(self, stats, processes):
+        handler = MetricsHandler.__new__(MetricsHandler)
+        handler.application = Mock(settings=dict(stats=stats,
+                                                 processes=processes))
+        return handler
+
+    def test_format_sample(self):
+        self.assertEqual('requests_total 5\n',
+                         format_sample('requests_total', [], 5))
+        self.assertEqual('time{method="a\\"b\\\\c\\n"} 0.5\n',
+                         format_sample('time', [('method', 'a"b\\c\n')], 0.5))
+        self.assertEqual('time{method="\xd0\xb9"} 1\n',
+                         format_sample('time', [('method', u'\u0439')], 1))
+
+    def test_iter_lines(self):
+        timer = {'count': 4, 'sum': 10.0, 'distribution95': 5.0}
+        histogram = {'count': 4, 'sum': 10.0, 'buckets': [[1.0, 1], [4.0, 3]],
+                     'outcomes': {'ok': 3, 'error': 1}}
+        data = dict(execution_timers=timer, dispatching_timers=timer,
+                    histograms=histogram)
+        stats = Mock()
+        stats.gather.side_effect = lambda section: \
+            {1: {'Service::method': data[section]}} if section in data else {}
+        process = Mock(startup_time=1000)
+        processes = Mock(restarts=2)
+        processes.broker.keys.return_value = [1]
+        processes.loop.now.return_value = 3500
+        processes.__getitem__ = Mock(return_value=process)
+        processes.read_metrics.return_value = {'active': 1, 'queued': 0}
+        output = ''.join(self.create_handler(stats, processes).iter_lines())
+        labels = '{worker="1",service="Service",method="method"}'
+        for line in ['thriftpool_requests_total{0} 4\n'.format(labels),
+                     'thriftpool_execution_seconds_sum{0} 0.01\n'
+                     .format(labels),
+                     'thriftpool_worker_uptime_seconds{worker="1"} 2.5\n',
+                     'thriftpool_worker_restarts_total 2\n',
+                     'thriftpool_handler_seconds_bucket{0} 4\n'.format(
+                         labels[:-1] + ',le="0.004"}'),
+                     'thriftpool_handler_calls_total{0} 1\n'.format(
+                         labels[:-1] + ',outcome="error"}'),
+                     'thriftpool_worker_active_requests{worker="1"} 1\n']:
+            self.assertIn(line, output)
+        self.assertIn('# TYPE thriftpool_dispatching_seconds summary\n',
+                      output)
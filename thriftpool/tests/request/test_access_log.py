@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+from cStringIO import StringIO
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.request.access_log import AccessLog, AccessLogReader, \
+    RECORD, OK, ERROR
+
+
+class TestAccessLog(TestCase):
+
+    def setUp(self):
+        super(TestAccessLog, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'access.log')
+
+    def write(self, *records, **kwargs):
+        log = AccessLog(self.path, **kwargs)
+        for record in records:
+            log.write(*record)
+        return log
+
+    def test_buffering(self):
+        log = self.write(('Service', 'ping', 0.001, OK, 10, 20),
+                         buffer_size=RECORD.size * 2)
+        self.assertEqual(0, os.path.getsize(self.path))
+        log.write('Service', 'ping', 0.001, OK, 10, 20)
+        self.assertEqual(RECORD.size * 2, os.path.getsize(self.path))
+        log.write('Service', 'ping', 0.001, OK, 10, 20)
+        log.close()
+        self.assertEqual(RECORD.size * 3, os.path.getsize(self.path))
+
+    def test_read(self):
+        self.write(('Service', 'ping', 0.0015, OK, 10, 20),
+                   ('Service', 'echo', 0.5, ERROR, 30, 40)).close()
+        reader = AccessLogReader(self.path)
+        records = list(reader)
+        self.assertEqual(2, len(records))
+        record = records[1]
+        self.assertEqual(os.getpid(), record.pid)
+        self.assertEqual('Service', reader.name(record.service_id))
+        self.assertEqual('Service::echo', reader.name(record.method_id))
+        self.assertEqual(500000, record.duration)
+        self.assertEqual(ERROR, record.status)
+        self.assertEqual((30, 40), (record.request_size,
+                                    record.response_size))
+
+    def test_filter(self):
+        self.write(('Service', 'ping', 0.001, OK, 10, 20),
+                   ('Service', 'echo', 0.002, OK, 10, 20),
+                   ('Service', 'echo', 0.020, OK, 10, 20)).close()
+        reader = AccessLogReader(self.path)
+        self.assertEqual(2, len(list(reader.filter(method='echo'))))
+        self.assertEqual(1, len(list(reader.filter(method='Service::ping'))))
+        self.assertEqual(1, len(list(reader.filter(slower_than=10))))
+        self.assertEqual(0, len(list(reader.filter(until=0))))
+        self.assertEqual(3, len(list(reader.filter(since=0))))
+
+    def test_empty(self):
+        open(self.path, 'w').close()
+        self.assertEqual([], list(AccessLogReader(self.path)))
+
+    def test_processor_failed(self):
+        self.app.slots.register('ThriftPool',
+                                'thriftpool.remote.ThriftPool:Processor',
+                                'thriftpool.remote.handler:Handler')
+        services = self.thriftworker.services
+        services.register('ThriftPool',
+                          self.app.slots['ThriftPool'].service.processor)
+        processor = services.create_processor('ThriftPool')
+        with self.custom_settings(ACCESS_LOG=self.path):
+            # Message that can't be decoded is logged too.
+            with self.assertRaises(EOFError):
+                processor(StringIO(b'garbage'))
+            self.app.access_log.close()
+        reader = AccessLogReader(self.path)
+        records = list(reader)
+        self.assertEqual(1, len(records))
+        self.assertEqual(ERROR, records[0].status)
+        self.assertEqual('ThriftPool::unknown',
+                         reader.name(records[0].method_id))
@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+
+from cStringIO import StringIO
+
+from thrift.Thrift import TApplicationException
+from thrift.protocol.TBinaryProtocol import TBinaryProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+from thriftpool.remote.ThriftPool import Client
+from thriftpool.request.admission import Admission, merge_admissions
+from thriftpool.tests.utils import TestCase
+
+
+class AdmissionTestCase(TestCase):
+
+    def test_active(self):
+        admission = Admission(max_active=1)
+        self.assertTrue(admission.acquire())
+        self.assertFalse(admission.acquire())
+        admission.release()
+        self.assertTrue(admission.acquire())
+        self.assertEqual({'active': 1, 'queued': 0, 'rejected': 1,
+                          'max_active': 1, 'max_queued': None},
+                         admission.to_dict())
+
+    def test_queued(self):
+        admission = Admission(max_queued=1)
+        for _ in range(3):
+            admission.enqueue()
+        admission.dequeue()
+        self.assertFalse(admission.acquire())
+        admission.dequeue()
+        self.assertTrue(admission.acquire())
+        self.assertEqual(1, int(admission.rejected))
+
+    def test_merge(self):
+        items = [{'active': 1, 'queued': 2, 'rejected': 3},
+                 {'active': 4, 'queued': 0, 'rejected': 1}]
+        self.assertEqual({'active': 5, 'queued': 2, 'rejected': 4},
+                         merge_admissions(items))
+
+    def test_reject(self):
+        self.app.slots.register('ThriftPool',
+                                'thriftpool.remote.ThriftPool:Processor',
+                                'thriftpool.remote.handler:Handler')
+        services = self.thriftworker.services
+        services.register('ThriftPool',
+                          self.app.slots['ThriftPool'].service.processor)
+        processor = services.create_processor('ThriftPool')
+        buf = TMemoryBuffer()
+        Client(TBinaryProtocol(buf)).send_ping()
+        request = buf.getvalue()
+        limits = {'ThriftPool': {'MAX_ACTIVE_REQUESTS': 0}}
+        with self.custom_settings(REQUEST_LIMITS=limits):
+            method, response = processor(StringIO(request))
+        self.assertEqual('ping', method)
+        client = Client(TBinaryProtocol(TMemoryBuffer(response)))
+        with self.assertRaises(TApplicationException) as cm:
+            client.recv_ping()
+        self.assertIn('overloaded', cm.exception.message)
+        admission = self.app.admissions['ThriftPool']
+        self.assertEqual(1, int(admission.rejected))
+        self.assertEqual(0, int(admission.active))
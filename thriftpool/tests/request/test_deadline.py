@@ -0,0 +1,160 @@
+from __future__ import absolute_import
+
+from cStringIO import StringIO
+
+from mock import Mock, patch
+from pyuv import Loop
+from thrift.Thrift import TApplicationException, TMessageType
+from thrift.protocol.TBinaryProtocol import TBinaryProtocolFactory
+from thrift.transport.TTransport import TMemoryBuffer
+
+from thriftpool.exceptions import DeadlineExceeded
+from thriftpool.request.admission import Admissions
+from thriftpool.request.deadline import Deadlines
+from thriftpool.request.inflight import InFlight
+from thriftpool.tests.utils import TestCase
+
+
+class DeadlinesTestCase(TestCase):
+
+    def setUp(self):
+        super(DeadlinesTestCase, self).setUp()
+        self.loop = Loop()
+        self.protocol_factory = TBinaryProtocolFactory()
+        self.timeouts = {'Batch::run': 0.05}
+        self.deadlines = Deadlines(
+            lambda service, method: self.timeouts.get(
+                '{0}::{1}'.format(service, method)),
+            lambda service: service == 'Batch',
+            self.protocol_factory)
+        self.inflight = InFlight()
+        self.admissions = Admissions(lambda service: (None, None),
+                                     TApplicationException)
+        self.Request = self.deadlines.track(self.inflight.track(
+            self.admissions.Request))
+        self.time = 0.0
+        patcher = patch('thriftpool.request.deadline.monotonic',
+                        lambda: self.time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tick(self, seconds):
+        self.time += seconds
+        handle = Mock()
+        self.deadlines._on_tick(handle)
+        return handle
+
+    def create_request(self, connection, name='run', seqid=7,
+                       service='Batch'):
+        transport = TMemoryBuffer()
+        protocol = self.protocol_factory.getProtocol(transport)
+        protocol.writeMessageBegin(name, TMessageType.CALL, seqid)
+        protocol.writeMessageEnd()
+        return self.Request(self.loop, connection,
+                            StringIO(transport.getvalue()), 1, service)
+
+    def read_exception(self, data):
+        protocol = self.protocol_factory.getProtocol(TMemoryBuffer(data))
+        name, type, seqid = protocol.readMessageBegin()
+        self.assertEqual(TMessageType.EXCEPTION, type)
+        exc = TApplicationException()
+        exc.read(protocol)
+        return name, seqid, exc
+
+    def test_expired(self):
+        connection = Mock()
+        request = self.create_request(connection)
+        self.assertFalse(self.inflight.is_idle(connection))
+        self.assertEqual(1, len(self.deadlines))
+        # Wheel counts partly elapsed tick as whole one, request isn't
+        # answered before its deadline.
+        self.assertFalse(self.tick(0.03).stop.called)
+        self.assertFalse(request.deadline.fired)
+        self.assertEqual(1, len(self.deadlines))
+        self.assertFalse(connection.ready.called)
+        # Timer stops itself when request expired.
+        self.assertTrue(self.tick(0.03).stop.called)
+        self.assertTrue(request.deadline.fired)
+        self.assertTrue(request.deadline.expired)
+        self.assertEqual(0.0, request.deadline.remaining())
+        self.assertTrue(self.inflight.is_idle(connection))
+        self.assertEqual(1, connection.ready.call_count)
+        successful, data, request_id = connection.ready.call_args[0]
+        self.assertTrue(successful)
+        self.assertEqual(1, request_id)
+        name, seqid, exc = self.read_exception(data)
+        self.assertEqual(('run', 7), (name, seqid))
+        self.assertEqual(TApplicationException.INTERNAL_ERROR, exc.type)
+        self.assertIn('Deadline of 0.050 seconds exceeded', exc.message)
+        # Late result of handler is dropped.
+        request.successful, request.response = True, 'late'
+        self.assertFalse(request.dispatch())
+        self.assertEqual(1, connection.ready.call_count)
+        self.assertTrue(self.inflight.is_idle(connection))
+
+    def test_expired_queued(self):
+        connection = Mock()
+        request = self.create_request(connection)
+        admission = self.admissions['Batch']
+        self.assertEqual(1, admission.queued)
+        self.tick(0.06)
+        self.assertTrue(request.deadline.fired)
+        # Handler isn't called, but request leaves queue.
+        processor = Mock()
+        self.assertFalse(request.execute(processor))
+        self.assertFalse(processor.called)
+        self.assertFalse(request.successful)
+        self.assertEqual(0, admission.queued)
+        self.assertFalse(request.dispatch())
+        self.assertEqual(1, connection.ready.call_count)
+
+    def test_finished(self):
+        connection = Mock()
+        request = self.create_request(connection)
+        self.assertGreater(request.deadline.remaining(), 0.0)
+        self.assertFalse(request.deadline.expired)
+        request.successful, request.response = True, 'result'
+        self.assertTrue(request.dispatch())
+        self.assertEqual(0, len(self.deadlines))
+        self.loop.run()
+        self.assertFalse(request.deadline.fired)
+        connection.ready.assert_called_once_with(True, 'result', 1)
+
+    def test_not_limited(self):
+        connection = Mock()
+        for request in (self.create_request(connection, name='ping'),
+                        self.create_request(connection, service='Other')):
+            self.assertIsNone(request.deadline)
+        self.assertEqual(0, len(self.deadlines))
+
+    def test_current(self):
+        request = self.create_request(Mock())
+        seen = []
+
+        def processor(message_buffer):
+            seen.append(self.deadlines.current())
+            return 'run', 'result'
+
+        self.assertTrue(request.execute(processor))
+        self.assertEqual([request.deadline], seen)
+        self.assertIsNone(self.deadlines.current())
+
+    def test_check(self):
+        request = self.create_request(Mock())
+        request.deadline.check()
+        self.time += 0.06
+        with self.assertRaises(DeadlineExceeded):
+            request.deadline.check()
+
+    def test_get_deadline(self):
+        config = self.app.config
+        config.REQUEST_DEADLINES = {'Batch': 30, 'Batch::ping': 0.1,
+                                    'Echo::ping': 1}
+        self.assertFalse(self.app.has_deadlines('Other'))
+        self.assertTrue(self.app.has_deadlines('Batch'))
+        self.assertTrue(self.app.has_deadlines('Echo'))
+        config.REQUEST_DEADLINE = 10
+        self.assertEqual(0.1, self.app.get_deadline('Batch', 'ping'))
+        self.assertEqual(30, self.app.get_deadline('Batch', 'run'))
+        self.assertEqual(10, self.app.get_deadline('Other', 'run'))
+        self.assertTrue(self.app.has_deadlines('Other'))
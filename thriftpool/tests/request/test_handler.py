@@ -5,7 +5,7 @@ from mock import Mock
 from thrift.Thrift import TException, TApplicationException
 
 from thriftpool.tests.utils import TestCase
-from thriftpool.exceptions import WrappingError
+from thriftpool.exceptions import WrappingError, DeadlineExceeded
 from thriftpool.remote.ThriftPool import Iface
 from thriftpool.request.handler import guarded_method, BaseWrappedHandler, \
     WrappedHandlerMeta
@@ -34,13 +34,14 @@ class WrongHandler(object):
 class TestGuardedMethod(TestCase):
 
     def setUp(self):
-        methods = self.methods = {'ping', 'fail', 'not_found'}
+        methods = self.methods = {'ping', 'fail', 'not_found', 'give_up'}
         attrs = {method: guarded_method(method) for method in methods}
         attrs['_wrapped_methods'] = methods
         handler = self.handler = Mock()
         handler.ping.side_effect = lambda value: value
         handler.fail.side_effect = UnknownException()
         handler.not_found.side_effect = NotFound()
+        handler.give_up.side_effect = DeadlineExceeded()
         handler.unknown.side_effect = UnknownException()
         cls = type('GuardedHandler', (BaseWrappedHandler,), attrs)
         self.guarded = cls(handler)
@@ -67,6 +68,10 @@ class TestGuardedMethod(TestCase):
         # ensure that unknown exceptions properly wrapped
         with self.assertRaises(TApplicationException):
             self.guarded.fail()
+        # handler that gave up on its deadline is answered as expired
+        with self.assertRaises(TApplicationException) as cm:
+            self.guarded.give_up()
+        self.assertIn('Deadline', cm.exception.message)
 
 
 class TestHandlerMeta(TestCase):
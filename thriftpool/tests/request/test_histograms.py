@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.request.histograms import Histogram, Histograms, \
+    merge_histograms, DECLARED, ERROR
+
+
+class TestHistogram(TestCase):
+
+    def test_buckets(self):
+        histogram = Histogram()
+        previous = -1
+        for value in range(0, 5000):
+            index = histogram._index(value)
+            self.assertIn(index, (previous, previous + 1))
+            self.assertLessEqual(value, histogram._upper_bound(index))
+            if index:
+                self.assertGreater(value, histogram._upper_bound(index - 1))
+            previous = index
+        # relative error is bounded
+        for value in (100, 1000, 123456, 10 ** 9):
+            upper = histogram._upper_bound(histogram._index(value))
+            self.assertLessEqual(upper - value, value / 8.0)
+
+    def test_record(self):
+        histogram = Histogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1e6)
+        histogram.record(0.5, DECLARED)
+        histogram.record(0.000001, ERROR)
+        data = histogram.to_dict()
+        self.assertEqual(1002, data['count'])
+        self.assertEqual({'ok': 1000, 'declared': 1, 'error': 1},
+                         data['outcomes'])
+        self.assertEqual(0.001, data['min'])
+        self.assertEqual(500.0, data['max'])
+        self.assertAlmostEqual(0.5, data['p50'], delta=0.5 / 8)
+        self.assertAlmostEqual(0.99, data['p99'], delta=0.99 / 8)
+        self.assertAlmostEqual(1.0, data['p999'], delta=1.0 / 8)
+        self.assertEqual(data['count'], sum(c for _, c in data['buckets']))
+
+    def test_merge(self):
+        first, second, merged = Histogram(), Histogram(), Histogram()
+        for i in range(1, 100):
+            (first if i % 2 else second).record(i / 1e4)
+            merged.record(i / 1e4)
+        expected = merged.to_dict()
+        actual = merge_histograms([first.to_dict(), second.to_dict(),
+                                   Histogram().to_dict()])
+        for key in ('count', 'min', 'max', 'buckets', 'outcomes',
+                    'p50', 'p90', 'p99', 'p999'):
+            self.assertEqual(expected[key], actual[key])
+        self.assertAlmostEqual(expected['sum'], actual['sum'])
+
+    def test_histograms(self):
+        histograms = Histograms()
+        histograms['Service::method'].record(0.1)
+        self.assertIs(histograms['Service::method'],
+                      histograms['Service::method'])
+        self.assertEqual(['Service::method'], list(histograms))
+        self.assertEqual(1, histograms.to_dict()['Service::method']['count'])
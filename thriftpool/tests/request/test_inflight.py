@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from thriftworker.workers.base import Request
+
+from thriftpool.request.inflight import InFlight
+from thriftpool.tests.utils import TestCase
+
+
+class InFlightTestCase(TestCase):
+
+    def setUp(self):
+        super(InFlightTestCase, self).setUp()
+        self.inflight = InFlight()
+        self.Request = self.inflight.track(Request)
+
+    def create_request(self, connection):
+        return self.Request(Mock(), connection, None, 1, 'ThriftPool')
+
+    def test_track(self):
+        connection, other = Mock(), Mock()
+        first = self.create_request(connection)
+        second = self.create_request(connection)
+        self.assertFalse(self.inflight.is_idle(connection))
+        self.assertTrue(self.inflight.is_idle(other))
+        self.assertEqual(2, len(self.inflight))
+        first.dispatch()
+        self.assertFalse(self.inflight.is_idle(connection))
+        second.dispatch()
+        self.assertTrue(self.inflight.is_idle(connection))
+        self.assertEqual(0, len(self.inflight))
+
+    def test_closed_connection(self):
+        connection = Mock()
+        connection.is_ready.return_value = False
+        request = self.create_request(connection)
+        # Late answer is dropped, but request isn't outstanding anymore.
+        self.assertFalse(request.dispatch())
+        self.assertTrue(self.inflight.is_idle(connection))
+
+    def test_admissions(self):
+        Request = self.inflight.track(self.app.admissions.Request)
+        request = Request(Mock(), Mock(), None, 1, 'ThriftPool')
+        admission = self.app.admissions['ThriftPool']
+        self.assertEqual(1, int(admission.queued))
+        self.assertEqual(1, len(self.inflight))
+        request.dispatch()
+        self.assertEqual(0, len(self.inflight))
@@ -0,0 +1,71 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+from thrift.protocol.TBinaryProtocol import TBinaryProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+from thriftpool.remote.ThriftPool import Client
+from thriftpool.request.warmup import FRAME_LENGTH, read_frames, replay, \
+    warming_up
+from thriftpool.tests.utils import TestCase
+
+
+def record_call(method, *args):
+    """Return request as client sends it."""
+    buf = TMemoryBuffer()
+    client = Client(TBinaryProtocol(buf))
+    getattr(client, 'send_' + method)(*args)
+    return buf.getvalue()
+
+
+class WarmupTestCase(TestCase):
+
+    def setUp(self):
+        super(WarmupTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ThriftPool.frames')
+        self.frames = [record_call('ping'), record_call('echoString', 'x')]
+        with open(self.path, 'wb') as fh:
+            for frame in self.frames:
+                fh.write(FRAME_LENGTH.pack(len(frame)) + frame)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_frames(self):
+        self.assertEqual(self.frames, read_frames(self.path))
+
+    def test_truncated(self):
+        with open(self.path, 'ab') as fh:
+            fh.write(FRAME_LENGTH.pack(10) + b'short')
+        with self.assertRaises(ValueError):
+            read_frames(self.path)
+
+    def create_processor(self):
+        self.app.slots.register('ThriftPool',
+                                'thriftpool.remote.ThriftPool:Processor',
+                                'thriftpool.remote.handler:Handler')
+        services = self.thriftworker.services
+        services.register('ThriftPool',
+                          self.app.slots['ThriftPool'].service.processor)
+        return services.create_processor('ThriftPool')
+
+    def test_replay(self):
+        processor = self.create_processor()
+        self.assertEqual(0, replay(processor, read_frames(self.path), 2))
+        self.assertEqual(1, replay(processor, [b'garbage']))
+        self.assertFalse(warming_up())
+
+    def test_not_counted(self):
+        processor = self.create_processor()
+        limits = {'ThriftPool': {'MAX_ACTIVE_REQUESTS': 0}}
+        with self.custom_settings(REQUEST_LIMITS=limits):
+            self.assertEqual(0, replay(processor, read_frames(self.path)))
+        admission = self.app.admissions['ThriftPool']
+        self.assertEqual(0, int(admission.rejected))
+        self.assertEqual(0, int(admission.active))
+        for histogram in self.app.histograms.to_dict().values():
+            self.assertEqual(0, histogram['count'])
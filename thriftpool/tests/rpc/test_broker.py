@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.exceptions import CallTimeout
+from thriftpool.rpc.broker import Broker
+
+
+class TestBroker(TestCase):
+
+    def setUp(self):
+        super(TestBroker, self).setUp()
+        self.broker = Broker(self.app)
+
+    def add_producer(self, pid, reply):
+        def apply(method, callback, args, kwargs, timeout):
+            callback(reply(method, *args, **kwargs))
+        producer = Mock()
+        producer.apply.side_effect = apply
+        self.broker._producers[pid] = producer
+        return producer
+
+    def test_empty(self):
+        self.assertEqual(({}, {}), self.broker.map('get_counters'))
+
+    def test_map(self):
+        exc = CallTimeout()
+        self.add_producer(1, lambda method, value: (method, value))
+        self.add_producer(2, lambda method, value: (method, value * 2))
+        self.add_producer(3, lambda method, value: exc)
+        results, errors = self.broker.map('echo', 21, timeout=1.0)
+        self.assertEqual({1: ('echo', 21), 2: ('echo', 42)}, results)
+        self.assertEqual({3: exc}, errors)
+        for producer in self.broker._producers.values():
+            self.assertEqual(1.0, producer.apply.call_args[1]['timeout'])
+
+    def test_failed_apply(self):
+        producer = self.add_producer(1, lambda method: method)
+        producer.apply.side_effect = AssertionError('process not active')
+        results, errors = self.broker.map('ping')
+        self.assertEqual({}, results)
+        self.assertIsInstance(errors[1], AssertionError)
+
+    def test_map_pids(self):
+        self.add_producer(1, lambda method: 1)
+        self.add_producer(2, lambda method: 2)
+        self.assertEqual(({2: 2}, {}), self.broker.map('ping', pids=[2, 3]))
+        self.assertFalse(self.broker._producers[1].apply.called)
@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.exceptions import CallTimeout, ChannelClosed
+from thriftpool.rpc.codecs import PickleCodec, MsgpackCodec, msgpack
+from thriftpool.rpc.transport import Receiver, Transmitter
+
+
+class TestCodecs(TestCase):
+
+    def check_codec(self, codec):
+        obj = ('method', (1, 2.5), {'key': 'value'})
+        data = codec.encode(obj)
+        self.assertEqual(obj, tuple(codec.decode(data)))
+        self.assertEqual(obj, tuple(codec.decode(memoryview(data))))
+
+    def test_pickle(self):
+        self.check_codec(PickleCodec())
+
+    def test_msgpack(self):
+        if msgpack is None:
+            return
+        codec = MsgpackCodec()
+        self.check_codec(codec)
+        exc = codec.decode(codec.encode(ValueError('bad')))
+        self.assertIsInstance(exc, ValueError)
+
+
+class TestTransport(TestCase):
+
+    def setUp(self):
+        super(TestTransport, self).setUp()
+        self.codec = PickleCodec()
+        self.emitter = Mock()
+        self.receiver = Receiver(Mock(), self.emitter, self.codec)
+        self.transmitter = Transmitter(Mock(), Mock(), Mock(), self.codec)
+        self.transmitter._timer = Mock(active=False)
+
+    def encode(self, *objs):
+        write = self.transmitter.stream.write
+        write.reset_mock()
+        for obj in objs:
+            self.transmitter.write(obj)
+        return ''.join(args[0] for args, _ in write.call_args_list)
+
+    def feed(self, data, chunk_size=None):
+        chunk_size = chunk_size or len(data)
+        for i in range(0, len(data), chunk_size):
+            self.receiver._on_read('READ', {'data': data[i:i + chunk_size]})
+
+    def received(self):
+        return [(kwargs['request_id'], kwargs['obj'])
+                for _, kwargs in self.emitter.publish.call_args_list]
+
+    def test_request_ids(self):
+        self.feed(self.encode('a', 'b', 'c'))
+        self.assertEqual([(1, 'a'), (2, 'b'), (3, 'c')], self.received())
+
+    def test_request_id_wraps(self):
+        self.transmitter._last_request_id = Transmitter.max_request_id
+        self.feed(self.encode('a'))
+        self.assertEqual([(1, 'a')], self.received())
+
+    def test_partial_packets(self):
+        objs = [{'n': i, 'data': 'x' * i} for i in range(50)]
+        self.feed(self.encode(*objs), chunk_size=7)
+        self.assertEqual(objs, [obj for _, obj in self.received()])
+        self.assertEqual(self.receiver._start, self.receiver._end)
+
+    def test_many_packets_in_chunk(self):
+        objs = list(range(5000))
+        self.feed(self.encode(*objs))
+        self.assertEqual(objs, [obj for _, obj in self.received()])
+
+    def test_huge_packet(self):
+        obj = 'x' * (Receiver.buffer_size * 3)
+        self.feed(self.encode('small', obj, 'tail'), chunk_size=4096)
+        self.assertEqual(['small', obj, 'tail'],
+                         [obj for _, obj in self.received()])
+        # buffer shrinks back after huge packet processed
+        self.assertEqual(Receiver.buffer_size, len(self.receiver._buf))
+
+    def test_move_pending(self):
+        receiver = self.receiver
+        receiver._allocate(24, b'abcdefghijklmnopqrst')
+        receiver._start = 4
+        # Pending data overlaps its new place at the beginning of buffer.
+        receiver._reserve(8)
+        self.assertEqual((0, 16), (receiver._start, receiver._end))
+        self.assertEqual(b'efghijklmnopqrst', bytes(receiver._buf[:16]))
+        self.assertEqual(24, len(receiver._buf))
+
+    def test_callback(self):
+        callback = Mock()
+        self.transmitter.write('request', callback=callback)
+        self.transmitter._on_received('received', request_id=1, obj='reply')
+        callback.assert_called_once_with('reply')
+        self.assertFalse(self.transmitter._requests)
+
+    def test_timeout(self):
+        transmitter = self.transmitter
+        callback = Mock()
+        transmitter.write('request', callback=callback, timeout=0.25)
+        self.assertTrue(transmitter._timer.start.called)
+        for _ in range(2):
+            transmitter._on_tick(transmitter._timer)
+        self.assertFalse(callback.called)
+        transmitter._on_tick(transmitter._timer)
+        self.assertIsInstance(callback.call_args[0][0], CallTimeout)
+        self.assertFalse(transmitter._requests)
+        self.assertFalse(transmitter._wheel)
+
+    def test_answered_before_timeout(self):
+        transmitter = self.transmitter
+        callback = Mock()
+        transmitter.write('request', callback=callback, timeout=1.0)
+        transmitter._on_received('received', request_id=1, obj='reply')
+        callback.assert_called_once_with('reply')
+        self.assertFalse(transmitter._wheel)
+
+    def test_stop(self):
+        transmitter = self.transmitter
+        callbacks = [Mock(), Mock()]
+        transmitter.write('a', callback=callbacks[0], timeout=1.0)
+        transmitter.write('b', callback=callbacks[1])
+        transmitter.stop()
+        for callback in callbacks:
+            self.assertIsInstance(callback.call_args[0][0], ChannelClosed)
+        self.assertFalse(transmitter._requests)
+        self.assertFalse(transmitter._wheel)
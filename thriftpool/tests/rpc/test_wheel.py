@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.rpc.wheel import TimingWheel
+
+
+class TestTimingWheel(TestCase):
+
+    def setUp(self):
+        super(TestTimingWheel, self).setUp()
+        self.wheel = TimingWheel(resolution=1.0, size=8)
+
+    def ticks_until_expired(self, key, limit=100):
+        for i in range(1, limit):
+            if key in dict(self.wheel.tick()):
+                return i
+
+    def test_expire(self):
+        for timeout in (0.5, 1, 3, 8, 9, 17, 30):
+            self.wheel.add(timeout, timeout)
+            expected = max(1, int(round(timeout + 0.49)))
+            self.assertEqual(expected, self.ticks_until_expired(timeout))
+            self.assertNotIn(timeout, self.wheel)
+
+    def test_value(self):
+        value = object()
+        self.wheel.add('key', 1, value)
+        self.assertEqual([('key', value)], self.wheel.tick())
+
+    def test_remove(self):
+        self.wheel.add('key', 2, 'value')
+        self.assertEqual(1, len(self.wheel))
+        self.assertEqual('value', self.wheel.remove('key'))
+        self.assertIsNone(self.wheel.remove('key'))
+        self.assertEqual(0, len(self.wheel))
+        self.assertIsNone(self.ticks_until_expired('key', 20))
+
+    def test_readd(self):
+        self.wheel.add('key', 1)
+        self.wheel.add('key', 3)
+        self.assertEqual(3, self.ticks_until_expired('key'))
+
+    def test_clear(self):
+        for i in range(20):
+            self.wheel.add(i, i)
+        self.assertEqual(20, len(self.wheel.clear()))
+        self.assertFalse(self.wheel)
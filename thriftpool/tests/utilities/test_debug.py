@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.utils.debug import RequestLogger
+from thriftpool.utils.term import colored
+
+
+class Handler(object):
+
+    def echo(self, value):
+        return value
+
+    def fail(self, value):
+        raise ValueError(value)
+
+
+class TestRequestLogger(TestCase):
+
+    def create_logger(self, name='echo', **kwargs):
+        logger = RequestLogger(Mock(), colored(enabled=False), **kwargs)
+        method = getattr(Handler(), name)
+        decorated = logger.decorate(None, Handler, method)(method)
+        return logger, decorated
+
+    def messages(self, logger):
+        return [args[0] for args, _ in logger.logger.info.call_args_list]
+
+    def test_log(self):
+        logger, echo = self.create_logger()
+        self.assertEqual('x', echo('x'))
+        messages = self.messages(logger)
+        self.assertEqual(2, len(messages))
+        self.assertIn("keywords  = {'value': 'x'}", messages[0])
+        self.assertIn("return 'x'", messages[1])
+
+    def test_log_failed(self):
+        logger, fail = self.create_logger('fail')
+        with self.assertRaises(ValueError):
+            fail('x')
+        messages = self.messages(logger)
+        self.assertEqual(2, len(messages))
+        self.assertIn("keywords  = {'value': 'x'}", messages[0])
+        self.assertIn("raise ValueError('x',)", messages[1])
+
+    def test_repr_limit(self):
+        logger, echo = self.create_logger(repr_limit=20)
+        echo('x' * 1000)
+        for message in self.messages(logger):
+            self.assertNotIn('x' * 21, message)
+
+    def test_sample_rate(self):
+        logger, echo = self.create_logger(sample_rate=0.0)
+        echo('x')
+        self.assertFalse(logger.logger.info.called)
+
+    def test_slow_threshold(self):
+        logger, echo = self.create_logger(slow_threshold=1000)
+        echo('x')
+        self.assertFalse(logger.logger.info.called)
+
+    def test_queue(self):
+        hub, counter = Mock(), Mock()
+        logger, echo = self.create_logger(queue_size=2, hub=hub,
+                                          counter=counter)
+        for value in range(4):
+            echo(value)
+        # Writing scheduled once, records over limit are dropped.
+        hub.callback.assert_called_once_with(logger.drain)
+        self.assertEqual(2, logger.dropped)
+        self.assertEqual(2, counter.add.call_count)
+        self.assertFalse(logger.logger.info.called)
+        logger.drain()
+        self.assertEqual(4, len(self.messages(logger)))
+        echo(5)
+        self.assertEqual(2, hub.callback.call_count)
@@ -0,0 +1,59 @@
+from __future__ import absolute_import
+
+import os
+from threading import Thread
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.utils.handshake import Handshake
+
+
+class HandshakeTestCase(TestCase):
+
+    processor = 'thriftpool.remote.ThriftPool:Processor'
+    handler = 'thriftpool.remote.handler:Handler'
+
+    def setUp(self):
+        super(HandshakeTestCase, self).setUp()
+        self.r, self.w = os.pipe()
+
+    def tearDown(self):
+        for fd in (self.r, self.w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def write(self, data):
+        # Message may be larger than pipe buffer.
+        def inner_write():
+            view = data
+            while view:
+                view = view[os.write(self.w, view):]
+        thread = Thread(target=inner_write)
+        thread.start()
+        return thread
+
+    def test_chunked_slots(self):
+        handshake = Handshake()
+        for i in range(handshake.chunk_size * 40):
+            self.app.slots.register('Service{0}'.format(i),
+                                    self.processor, self.handler,
+                                    pool='batch' if i % 2 else None)
+        self.app.config.CONCURRENCY = 7
+        data = handshake.encode(self.app, 'batch')
+        self.assertGreater(len(data), 65536)
+        thread = self.write(data)
+        app, pool = handshake.decode_from_stream(self.r)
+        thread.join()
+        self.assertEqual('batch', pool)
+        self.assertEqual(7, app.config.CONCURRENCY)
+        self.assertEqual(handshake.chunk_size * 20, len(app.slots))
+        self.assertIn('Service1', app.slots)
+        self.assertNotIn('Service0', app.slots)
+
+    def test_truncated(self):
+        data = Handshake().encode(self.app)
+        os.write(self.w, data[:-1])
+        os.close(self.w)
+        with self.assertRaises(RuntimeError):
+            Handshake().decode_from_stream(self.r)
@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from threading import Thread
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.utils import launcher
+from thriftpool.utils.launcher import send_fds, recv_fds, send_integer, \
+    recv_integer, wait_gone
+
+
+class LauncherTestCase(TestCase):
+
+    def setUp(self):
+        super(LauncherTestCase, self).setUp()
+        self.left, self.right = socket.socketpair()
+
+    def tearDown(self):
+        self.left.close()
+        self.right.close()
+
+    def test_integer(self):
+        send_integer(self.left, -15)
+        self.assertEqual(-15, recv_integer(self.right))
+        self.left.close()
+        self.assertIsNone(recv_integer(self.right))
+
+    def test_pass_fds(self):
+        r, w = os.pipe()
+        try:
+            send_fds(self.left, [r, w])
+            received = recv_fds(self.right)
+        finally:
+            os.close(r)
+            os.close(w)
+        self.assertEqual(2, len(received))
+        os.write(received[1], b'data')
+        self.assertEqual(b'data', os.read(received[0], 4))
+        for fd in received:
+            os.close(fd)
+
+
+class OrphanTestCase(TestCase):
+
+    def setUp(self):
+        super(OrphanTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'zygote')
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen(1)
+
+    def tearDown(self):
+        self.listener.close()
+        shutil.rmtree(self.directory)
+
+    def reap(self, process):
+        thread = Thread(target=process.wait)
+        thread.start()
+        return thread
+
+    def test_wait_gone(self):
+        worker = subprocess.Popen(['sleep', '0.1'])
+        thread = self.reap(worker)
+        wait_gone(worker.pid, 0.01)
+        thread.join()
+        self.assertEqual(0, worker.returncode)
+
+    def test_zygote_exited(self):
+        script = os.path.splitext(launcher.__file__)[0] + '.py'
+        process = subprocess.Popen([sys.executable, script, self.path, '0'])
+        worker = subprocess.Popen(['sleep', '0.3'])
+        thread = self.reap(worker)
+        # Zygote starts worker and exits.
+        conn, _ = self.listener.accept()
+        self.assertEqual([], recv_fds(conn))
+        send_integer(conn, worker.pid)
+        conn.close()
+        # Launcher isn't stopped by zygote exit and doesn't kill worker.
+        self.assertEqual(1, process.wait())
+        thread.join()
+        self.assertEqual(0, worker.returncode)
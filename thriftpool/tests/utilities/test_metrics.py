@@ -0,0 +1,123 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+from thriftworker.utils.stats import Counters, Timers
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.utils.metrics import MetricsRegion, merge_stats
+
+
+class TestMetricsRegion(TestCase):
+
+    def setUp(self):
+        super(TestMetricsRegion, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'worker.metrics')
+        self.region = MetricsRegion.create(self.path, 4)
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(self.region.close)
+
+    def test_empty(self):
+        self.assertIsNone(self.region.read())
+
+    def test_open(self):
+        with self.assertRaises(ValueError):
+            open(self.path + '.bad', 'w').close()
+            MetricsRegion.open(self.path + '.bad')
+        region = MetricsRegion.open(self.path)
+        self.addCleanup(region.close)
+        self.assertEqual(4, region.capacity)
+
+    def test_write_read(self):
+        counters, timers = Counters(), Timers()
+        counters['response_served'].add()
+        for value in (5, 7):
+            timers['Service::method'] += value
+        writer = MetricsRegion.open(self.path)
+        self.addCleanup(writer.close)
+        writer.write(pid=42, queued=3, connections=2, active=1,
+                     sections=dict(counters=counters.to_dict(),
+                                   execution_timers=timers.to_dict()))
+
+        snapshot = self.region.read()
+        self.assertEqual(42, snapshot['pid'])
+        self.assertEqual(3, snapshot['queued'])
+        self.assertEqual(2, snapshot['connections'])
+        self.assertEqual(1, snapshot['active'])
+        self.assertEqual(0, snapshot['dropped'])
+        self.assertEqual(counters.to_dict(), snapshot['counters'])
+        expected = timers.to_dict()['Service::method']
+        actual = snapshot['execution_timers']['Service::method']
+        self.assertEqual(sorted(expected), sorted(actual))
+        for key, value in expected.items():
+            self.assertAlmostEqual(value, actual[key])
+        self.assertEqual({}, snapshot['timeouts'])
+
+    def test_capacity(self):
+        timers = Timers()
+        for i in range(6):
+            timers['method{0}'.format(i)] += i
+        timers['x' * 100] += 1
+        self.region.write(pid=1, queued=0, connections=0, active=0,
+                          sections=dict(timeouts=timers.to_dict()))
+        snapshot = self.region.read()
+        self.assertEqual(4, len(snapshot['timeouts']))
+        self.assertEqual(3, snapshot['dropped'])
+
+    def test_write_gauges(self):
+        self.assertIsNone(self.region.read_gauges())
+        counters = Counters()
+        counters['response_served'].add()
+        writer = MetricsRegion.open(self.path)
+        self.addCleanup(writer.close)
+        writer.write(pid=42, queued=3, connections=2, active=1,
+                     sections=dict(counters=counters.to_dict()))
+        writer.write_gauges(pid=42, queued=0, connections=5, active=4,
+                            accepting=False)
+
+        gauges = self.region.read_gauges()
+        self.assertEqual((42, 0, 5, 4), (gauges['pid'], gauges['queued'],
+                                         gauges['connections'],
+                                         gauges['active']))
+        self.assertFalse(gauges['accepting'])
+        snapshot = self.region.read()
+        self.assertEqual(4, snapshot['active'])
+        self.assertFalse(snapshot['accepting'])
+        self.assertEqual(counters.to_dict(), snapshot['counters'])
+
+    def test_inconsistent(self):
+        self.region.write(pid=1, queued=0, connections=0, active=0,
+                          sections={})
+        # Writer is in the middle of update.
+        self.region._set_sequence(self.region._sequence_value + 1)
+        self.assertIsNone(self.region.read())
+
+
+class TestMergeStats(TestCase):
+
+    def test_merge(self):
+        first, second, merged = Timers(), Timers(), Timers()
+        for i, value in enumerate([1, 5, 3, 8, 2, 9]):
+            (first if i % 2 else second)['method'] += value
+            merged['method'] += value
+        expected = merged.to_dict()['method']
+        actual = merge_stats([first.to_dict()['method'],
+                              second.to_dict()['method']])
+        for key in ('mean', 'stddev', 'sum', 'count', 'squared_sum',
+                    'min', 'max'):
+            self.assertAlmostEqual(expected[key], actual[key])
+        self.assertEqual(9, actual['distribution95'])
+
+    def test_merge_empty(self):
+        timers = Timers()
+        timers['method']
+        counters = Counters()
+        counters['served'].add()
+        self.assertEqual(0.0, merge_stats([timers.to_dict()['method']])['min'])
+        self.assertEqual(0.0, merge_stats(
+            [timers.to_dict()['method']])['distribution95'])
+        served = counters.to_dict()['served']
+        self.assertEqual(2, merge_stats([served, served])['count'])
@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+from thriftpool.tests.utils import TestCase
+from thriftpool.utils.platforms import PIDLock, LockFailed, \
+    parse_cpu_list, get_cpu_set, get_cpu_nodes, accept_queue
+
+
+class PIDLockTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'thriftpool.pid')
+        # Parent of test process surely exists.
+        self.other = os.getppid()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lock_of_running_process(self):
+        PIDLock(self.path).write(self.other)
+        with self.assertRaises(LockFailed):
+            PIDLock(self.path).acquire()
+
+    def test_replace(self):
+        PIDLock(self.path).write(self.other)
+        lock = PIDLock(self.path)
+        lock.acquire(replace=self.other)
+        self.assertEqual(os.getpid(), lock.read())
+        # Replaced process still exists, lock returns back to it.
+        lock.release()
+        self.assertEqual(self.other, lock.read())
+
+    def test_release_taken_lock(self):
+        lock = PIDLock(self.path)
+        lock.acquire()
+        lock.remove()
+        PIDLock(self.path).write(self.other)
+        lock.release()
+        self.assertEqual(self.other, lock.read())
+        lock.remove()
+        lock.release()
+        self.assertFalse(lock.exists())
+
+
+class CPUAffinityTestCase(TestCase):
+
+    nodes = [[0, 1], [2, 3]]
+
+    def test_parse_cpu_list(self):
+        self.assertEqual([0, 1, 2, 3, 8], parse_cpu_list('0-3,8\n'))
+        self.assertEqual([], parse_cpu_list('\n'))
+
+    def test_cores(self):
+        self.assertEqual([[0], [1], [2], [3], [0]],
+                         [get_cpu_set('core', i, self.nodes)
+                          for i in range(5)])
+
+    def test_nodes(self):
+        self.assertEqual([[0, 1], [2, 3], [0, 1]],
+                         [get_cpu_set('node', i, self.nodes)
+                          for i in range(3)])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            get_cpu_set('socket', 0, self.nodes)
+
+    def test_nodes_of_current_process(self):
+        nodes = get_cpu_nodes()
+        self.assertTrue(nodes)
+        self.assertTrue(all(nodes))
+
+
+class AcceptQueueTestCase(TestCase):
+
+    def setUp(self):
+        if not sys.platform.startswith('linux'):
+            self.skipTest('Accept queue is measured only on Linux.')
+
+    def test_accept_queue(self):
+        listener = socket.socket()
+        self.addCleanup(listener.close)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(16)
+        self.assertEqual((0, 16), accept_queue(listener))
+        for _ in range(2):
+            client = socket.create_connection(listener.getsockname())
+            self.addCleanup(client.close)
+        self.assertEqual((2, 16), accept_queue(listener))
+        listener.accept()[0].close()
+        self.assertEqual((1, 16), accept_queue(listener))
+
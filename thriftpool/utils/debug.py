@@ -1,13 +1,18 @@
 """Some useful class for request logging."""
 from __future__ import absolute_import
 
+from collections import deque
 from functools import wraps
+from threading import Lock
 import time
 import sys
 import inspect
 import itertools
-from pprint import pformat
+import random
 
+from six.moves import reprlib
+
+from thriftpool.request.warmup import warming_up
 from thriftpool.signals import handler_method_guarded
 
 if sys.platform == "win32":
@@ -26,6 +31,9 @@ NEW_REQUEST_MESSAGE = \
 SERVED_REQUEST_MESSAGE = \
     """{prefix} return {result} ({took})"""
 
+FAILED_REQUEST_MESSAGE = \
+    """{prefix} raise {result} ({took})"""
+
 
 def qualname(obj):
     if not hasattr(obj, '__name__') and hasattr(obj, '__class__'):
@@ -34,56 +42,165 @@ def qualname(obj):
     return '%s.%s' % (obj.__module__, obj.__name__)
 
 
+class RequestRecord(object):
+    """Describe served request. Arguments and result are rendered only
+    when record is written. Result of failed request is raised exception.
+
+    """
+
+    __slots__ = ('request', 'method_name', 'arguments', 'keywords',
+                 'result', 'duration', 'failed')
+
+    def __init__(self, request, method_name, arguments, keywords, result,
+                 duration, failed=False):
+        self.request = request
+        self.method_name = method_name
+        self.arguments = arguments
+        self.keywords = keywords
+        self.result = result
+        self.duration = duration
+        self.failed = failed
+
+
 class RequestLogger(object):
+    """Log requests to handlers. Requests may be sampled or filtered by
+    duration. Records are put to bounded queue and written from loop
+    by given hub, records that don't fit to queue are dropped.
+
+    :param sample_rate: which part of requests should be logged
+    :param slow_threshold: log only requests that took longer (in ms)
+    :param queue_size: how many records can wait for writing
+    :param repr_limit: maximum length of rendered argument or result
+    :param hub: hub used to write records, if :const:`None` records are
+        written immediately
+    :param counter: counter that should be incremented on drop
 
-    def __init__(self, logger, colored):
+    """
+
+    Record = RequestRecord
+
+    def __init__(self, logger, colored, sample_rate=1.0, slow_threshold=None,
+                 queue_size=10000, repr_limit=1024, hub=None, counter=None):
         self.logger = logger
         self.colored = colored
         self.counter = itertools.cycle(xrange(2 ** 16))
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.queue_size = queue_size
+        self.repr_limit = repr_limit
+        self.hub = hub
+        self.drop_counter = counter
+        self.dropped = 0
+        self._queue = deque()
+        self._lock = Lock()
+        self._scheduled = False
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = self._repr.maxother = repr_limit
 
     def setup(self):
         handler_method_guarded.connect(self.decorate)
 
+    def render(self, obj):
+        """Render given object, result length is limited."""
+        rendered = self._repr.repr(obj)
+        if len(rendered) > self.repr_limit:
+            rendered = rendered[:self.repr_limit - 3] + '...'
+        return rendered
+
+    def write(self, record):
+        """Write given record to log."""
+        blue = self.colored.blue
+        duration = record.duration
+        self.logger.info(NEW_REQUEST_MESSAGE.format(
+            prefix=self.colored.magenta('In [{0}]:'.format(record.request)),
+            method_name=blue(record.method_name),
+            arguments=blue(self.render(record.arguments)),
+            keywords=blue(self.render(record.keywords)),
+        ))
+        message = FAILED_REQUEST_MESSAGE if record.failed \
+            else SERVED_REQUEST_MESSAGE
+        self.logger.info(message.format(
+            prefix=self.colored.black('Out [{0}]:'.format(record.request)),
+            took='{:.3f} ms'.format(duration * 1000)
+                 if duration < 0.001
+                 else '{:.3f} s'.format(duration),
+            result=blue(self.render(record.result)),
+        ))
+
+    def _drop(self):
+        self.dropped += 1
+        if self.drop_counter is not None:
+            self.drop_counter.add()
+
+    def enqueue(self, record):
+        """Put record to queue, drop it if queue is full."""
+        if self.hub is None:
+            self.write(record)
+            return
+        with self._lock:
+            if len(self._queue) >= self.queue_size:
+                self._drop()
+                return
+            self._queue.append(record)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.hub.callback(self.drain)
+
+    def drain(self):
+        """Write all queued records."""
+        queue = self._queue
+        while True:
+            with self._lock:
+                if not queue:
+                    self._scheduled = False
+                    return
+                record = queue.popleft()
+            try:
+                self.write(record)
+            except Exception as exc:
+                self.logger.exception(exc)
+
     def decorate(self, signal, sender, fn):
         method_name = "{0}.{1}".format(qualname(sender), fn.__name__)
         method_args = inspect.getargspec(fn).args
         if inspect.ismethod(fn) and method_args:
             method_args.pop(0)
-        blue = self.colored.blue
-        black = self.colored.black
-        magenta = self.colored.magenta
+        sample_rate = self.sample_rate
+        slow_threshold = self.slow_threshold
+        if slow_threshold is not None:
+            slow_threshold /= 1000.0
 
         def decorator(func):
             @wraps(func)
             def inner(*args, **kwargs):
-                request = self.counter.next()
-                # Log incoming request.
-                arguments = []
-                keywords = {}
-                if method_args:
-                    keywords.update(dict(zip(method_args[:len(args)], args)))
-                else:
-                    arguments = args
-                keywords.update(kwargs)
-                self.logger.info(NEW_REQUEST_MESSAGE.format(
-                    prefix=magenta('In [{0}]:'.format(request)),
-                    method_name=blue(method_name),
-                    arguments=blue(pformat(arguments)),
-                    keywords=blue(pformat(keywords)),
-                ))
+                if warming_up() or \
+                        (sample_rate < 1.0 and random.random() >= sample_rate):
+                    return func(*args, **kwargs)
                 # Measure time.
                 start = default_timer()
-                result = func(*args, **kwargs)
-                duration = default_timer() - start
-                # Log response.
-                self.logger.info(SERVED_REQUEST_MESSAGE.format(
-                    prefix=black('Out [{0}]:'.format(request)),
-                    took='{:.3f} ms'.format(duration * 1000)
-                         if duration < 0.001
-                         else '{:.3f} s'.format(duration),
-                    result=blue(pformat(result)),
-                ))
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as exc:
+                    # Failed calls are logged too, slow ones especially.
+                    log(args, kwargs, exc, default_timer() - start, True)
+                    raise
+                log(args, kwargs, result, default_timer() - start)
                 return result
             return inner
 
+        def log(args, kwargs, result, duration, failed=False):
+            if slow_threshold is not None and duration < slow_threshold:
+                return
+            arguments = []
+            keywords = {}
+            if method_args:
+                keywords.update(dict(zip(method_args[:len(args)], args)))
+            else:
+                arguments = args
+            keywords.update(kwargs)
+            self.enqueue(self.Record(self.counter.next(), method_name,
+                                     arguments, keywords, result,
+                                     duration, failed))
+
         return decorator
@@ -0,0 +1,74 @@
+"""Pass application to worker and report progress of its startup.
+
+Manager sends header with application class, configuration changes and
+number of slots, then slots of worker's pool in chunks. Each message is
+prefixed with its length, worker reads messages fully and checks that
+it got announced number of slots. Worker writes one byte for each startup
+stage back to the same stream.
+
+"""
+from __future__ import absolute_import
+
+from thriftpool.utils.serializers import StreamSerializer
+
+__all__ = ['Handshake', 'STAGE_RECEIVED', 'STAGE_INITIALIZED',
+           'STAGE_STARTED', 'STAGES']
+
+#: Worker rebuilt application.
+STAGE_RECEIVED = b'r'
+
+#: Worker loaded modules and created its components.
+STAGE_INITIALIZED = b'i'
+
+#: Worker started, written by watchdog.
+STAGE_STARTED = b'x'
+
+#: Descriptions of stages.
+STAGES = {STAGE_RECEIVED: 'application received',
+          STAGE_INITIALIZED: 'modules loaded',
+          STAGE_STARTED: 'started'}
+
+
+class Handshake(object):
+    """Encode and decode application for worker of given pool."""
+
+    Serializer = StreamSerializer
+
+    #: How many slots are sent in one message.
+    chunk_size = 64
+
+    def __init__(self):
+        self.serializer = self.Serializer()
+
+    def encode(self, app, pool=None):
+        """Return messages that pass application to worker of given pool."""
+        encode = self.serializer.encode_with_length
+        # Application is pickled as class, changes of configuration and
+        # slots, send slots separately.
+        _, (cls, changes, _) = app.__reduce__()
+        slots = sorted(app.slots.in_pool(pool), key=lambda slot: slot.name)
+        messages = [encode({'cls': cls, 'config': changes, 'pool': pool,
+                            'slots': len(slots)})]
+        for i in range(0, len(slots), self.chunk_size):
+            messages.append(encode(slots[i:i + self.chunk_size]))
+        return b''.join(messages)
+
+    def decode_from_stream(self, fd, timeout=5):
+        """Read application from given stream, return it with name of
+        pool.
+
+        """
+        decode = self.serializer.decode_from_stream
+        header = decode(fd, timeout)
+        slots = []
+        while len(slots) < header['slots']:
+            slots.extend(decode(fd, timeout))
+        if len(slots) != header['slots']:
+            raise RuntimeError('Expected {0} slots, {1} received.'
+                               .format(header['slots'], len(slots)))
+        app = header['cls']()
+        app.config.update(header['config'])
+        for slot in slots:
+            app.slots.add(slot)
+        app.loader.after_unpickling()
+        return app, header['pool']
@@ -0,0 +1,145 @@
+"""Stand-in for worker forked by zygote.
+
+Process manager can only watch processes it spawned itself, so it spawns
+this tiny script instead of worker. Script passes its descriptors to
+zygote, zygote forks worker with them, then script forwards signals to
+worker and exits with its status. When script is killed zygote kills
+worker too. When zygote exits, script keeps forwarding signals and polls
+worker until it exits, so zygote can be restarted without touching
+running workers.
+
+Module is executed by path and must use only standard library, importing
+application would take as long as starting worker.
+
+"""
+from __future__ import absolute_import
+
+import errno
+import os
+import signal
+import socket
+import sys
+import time
+from struct import Struct
+
+try:
+    from _multiprocessing import sendfd, recvfd
+except ImportError:  # pragma: no cover
+    sendfd = recvfd = None
+
+#: Length-prefixed messages: number of descriptors, PID and exit status.
+INTEGER = Struct('!i')
+
+#: Signals that should be delivered to worker.
+FORWARDED_SIGNALS = ('SIGTERM', 'SIGINT', 'SIGQUIT', 'SIGHUP',
+                     'SIGUSR1', 'SIGUSR2')
+
+#: Signals that ask worker to exit.
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT)
+
+#: How often (in seconds) worker is polled when zygote has gone.
+ORPHAN_POLL_INTERVAL = 0.1
+
+
+def recv_exactly(sock, size):
+    """Read given number of bytes, return empty string on EOF."""
+    data = b''
+    while len(data) < size:
+        try:
+            chunk = sock.recv(size - len(data))
+        except socket.error as exc:
+            if exc.args[0] == errno.EINTR:
+                continue
+            raise
+        if not chunk:
+            return b''
+        data += chunk
+    return data
+
+
+def send_integer(sock, value):
+    sock.sendall(INTEGER.pack(value))
+
+
+def recv_integer(sock):
+    """Read integer or return :const:`None` on EOF."""
+    data = recv_exactly(sock, INTEGER.size)
+    return INTEGER.unpack(data)[0] if data else None
+
+
+def send_fds(sock, fds):
+    """Pass given descriptors through unix socket."""
+    send_integer(sock, len(fds))
+    for fd in fds:
+        sendfd(sock.fileno(), fd)
+
+
+def recv_fds(sock):
+    """Receive descriptors passed by :func:`send_fds`."""
+    count = recv_integer(sock)
+    return [recvfd(sock.fileno()) for _ in range(count or 0)]
+
+
+def wait_gone(pid, interval=ORPHAN_POLL_INTERVAL):
+    """Wait until process with given PID exits. Process isn't our child,
+    so its status can't be waited for and it's polled.
+
+    """
+    while True:
+        try:
+            os.kill(pid, 0)
+        except OSError as exc:
+            if exc.errno == errno.ESRCH:
+                return
+            if exc.errno != errno.EPERM:
+                raise
+        time.sleep(interval)
+
+
+def exit_with_status(status):
+    """Exit same way as process with given wait status exited."""
+    if os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+    os._exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    path, count = argv[1], int(argv[2])
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    # Worker gets our standard and custom streams at the same numbers.
+    send_fds(sock, range(count))
+    pid = recv_integer(sock)
+    if pid is None:
+        sys.stderr.write("Zygote {0!r} didn't start worker.\n".format(path))
+        os._exit(1)
+    for fd in range(count):
+        os.close(fd)
+
+    forwarded = []
+
+    def forward(signum, frame):
+        forwarded.append(signum)
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    for name in FORWARDED_SIGNALS:
+        signal.signal(getattr(signal, name), forward)
+    status = recv_integer(sock)
+    if status is None:
+        # Zygote has gone, nobody will report status of worker. Keep
+        # supervising it, manager restarts only zygote.
+        sock.close()
+        wait_gone(pid)
+        stopped = any(signum in STOP_SIGNALS for signum in forwarded)
+        os._exit(0 if stopped else 1)
+    exit_with_status(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""Fixed-layout metrics region shared between worker and manager.
+
+Worker periodically writes snapshot of its counters and timers into
+memory-mapped file, manager reads it without any interaction with worker.
+Consistency is guaranteed by sequence lock: writer makes sequence odd before
+update and even after it, reader retries while sequence is odd or changed
+during copying.
+
+"""
+from __future__ import absolute_import
+
+import math
+import mmap
+import os
+import time
+from struct import Struct
+
+__all__ = ['MetricsRegion', 'merge_stats']
+
+
+class MetricsRegion(object):
+    """Memory-mapped region that holds metrics of one worker.
+
+    :param fd: descriptor of file to map
+    :param capacity: how many entries region can hold
+    :param path: path to mapped file
+
+    """
+
+    magic = 'TPMR'
+    version = 3
+
+    #: Sections stored in region, position in this tuple is section code.
+    sections = ('counters', 'execution_timers',
+                'dispatching_timers', 'timeouts')
+
+    #: Sections which entries have distribution.
+    timer_sections = frozenset(['execution_timers', 'dispatching_timers',
+                                'timeouts'])
+
+    #: magic, version, capacity, sequence, pid, updated, queued,
+    #: connections, active, number of entries, number of dropped entries,
+    #: accepting
+    _header = Struct('=4sHHIIdIIIIII')
+    _sequence = Struct('=I')
+    _sequence_offset = 8
+    #: pid, updated, queued, connections, active
+    _gauges = Struct('=IdIII')
+    _gauges_offset = 12
+    #: accepting
+    _accepting = Struct('=I')
+    _accepting_offset = 44
+    header_size = 64
+
+    #: section, name, count, sum, squared sum, min, max, distribution95
+    _entry = Struct('=B63sQddddd')
+    max_name_length = 63
+
+    #: How many times reader should try to obtain consistent snapshot.
+    read_attempts = 10
+
+    def __init__(self, fd, capacity, path=None):
+        self.capacity = capacity
+        self.path = path
+        self._fd = fd
+        self._mmap = mmap.mmap(fd, self.size_for(capacity))
+        self._sequence_value = 0
+
+    @classmethod
+    def size_for(cls, capacity):
+        """Return size of region in bytes for given capacity."""
+        return cls.header_size + cls._entry.size * capacity
+
+    @classmethod
+    def create(cls, path, capacity):
+        """Create new empty region in given file."""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, cls.size_for(capacity))
+            region = cls(fd, capacity, path)
+        except Exception:
+            os.close(fd)
+            raise
+        cls._header.pack_into(region._mmap, 0, cls.magic, cls.version,
+                              capacity, 0, 0, 0.0, 0, 0, 0, 0, 0, 0)
+        return region
+
+    @classmethod
+    def open(cls, path):
+        """Open existed region."""
+        fd = os.open(path, os.O_RDWR)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(cls._header.size)
+            if len(data) < cls._header.size:
+                raise ValueError('{0!r} is not metrics region'.format(path))
+            magic, version, capacity = cls._header.unpack(data)[:3]
+            if magic != cls.magic or version != cls.version:
+                raise ValueError('{0!r} is not metrics region'.format(path))
+            region = cls(fd, capacity, path)
+        except Exception:
+            os.close(fd)
+            raise
+        region._sequence_value = \
+            cls._sequence.unpack_from(region._mmap, cls._sequence_offset)[0]
+        return region
+
+    @property
+    def closed(self):
+        return self._mmap is None
+
+    def close(self):
+        """Unmap region and close file."""
+        if self._mmap is None:
+            return
+        self._mmap.close()
+        self._mmap = None
+        os.close(self._fd)
+
+    def _set_sequence(self, value):
+        self._sequence_value = value & 0xFFFFFFFF
+        self._sequence.pack_into(self._mmap, self._sequence_offset,
+                                 self._sequence_value)
+
+    def write(self, pid, queued, connections, active, sections,
+              accepting=True):
+        """Write snapshot into region.
+
+        :param sections: dictionary that maps name of section to dictionary
+            in format returned by ``to_dict`` method of counters and timers.
+
+        """
+        entry = self._entry
+        entries = []
+        dropped = 0
+        for code, section in enumerate(self.sections):
+            for key, stats in sections.get(section, {}).items():
+                name = key.encode('utf-8') \
+                    if isinstance(key, unicode) else bytes(key)
+                if len(entries) >= self.capacity \
+                        or len(name) > self.max_name_length:
+                    dropped += 1
+                    continue
+                entries.append(entry.pack(
+                    code, name, stats['count'], stats['sum'],
+                    stats['squared_sum'], stats['min'], stats['max'],
+                    stats.get('distribution95', 0.0)))
+        payload = b''.join(entries)
+
+        self._set_sequence(self._sequence_value + 1)
+        start = self.header_size
+        self._mmap[start:start + len(payload)] = payload
+        self._header.pack_into(
+            self._mmap, 0, self.magic, self.version, self.capacity,
+            self._sequence_value, pid, time.time(), queued, connections,
+            active, len(entries), dropped, int(accepting))
+        self._set_sequence(self._sequence_value + 1)
+
+    def write_gauges(self, pid, queued, connections, active,
+                     accepting=True):
+        """Update only gauges, counters and timers stay untouched."""
+        self._set_sequence(self._sequence_value + 1)
+        self._gauges.pack_into(self._mmap, self._gauges_offset, pid,
+                               time.time(), queued, connections, active)
+        self._accepting.pack_into(self._mmap, self._accepting_offset,
+                                  int(accepting))
+        self._set_sequence(self._sequence_value + 1)
+
+    def _copy(self, entries=True):
+        """Return consistent copy of header and entries or :const:`None`."""
+        header, sequence = self._header, self._sequence
+        for _ in range(self.read_attempts):
+            before = sequence.unpack_from(self._mmap, self._sequence_offset)[0]
+            if before & 1:
+                continue
+            fields = header.unpack_from(self._mmap, 0)
+            end = self.header_size + self._entry.size * \
+                min(fields[9], self.capacity) if entries else self.header_size
+            data = self._mmap[self.header_size:end]
+            after = sequence.unpack_from(self._mmap, self._sequence_offset)[0]
+            if before == after:
+                return fields, data
+        return None
+
+    def read_gauges(self):
+        """Return only gauges or :const:`None` if worker hasn't published
+        anything yet or they can't be read consistently.
+
+        """
+        copied = self._copy(entries=False)
+        if copied is None or not copied[0][5]:
+            return None
+        return self._gauges_dict(copied[0])
+
+    @staticmethod
+    def _gauges_dict(fields):
+        return dict(pid=fields[4], updated=fields[5], queued=fields[6],
+                    connections=fields[7], active=fields[8],
+                    accepting=bool(fields[11]))
+
+    def read(self):
+        """Return snapshot of metrics or :const:`None` if worker hasn't
+        published anything yet or snapshot can't be read consistently.
+
+        """
+        copied = self._copy()
+        if copied is None:
+            return None
+        fields, data = copied
+        if not fields[5]:
+            return None
+        snapshot = self._gauges_dict(fields)
+        snapshot['dropped'] = fields[10]
+        for section in self.sections:
+            snapshot[section] = {}
+        entry, sections = self._entry, self.sections
+        for offset in range(0, len(data), entry.size):
+            code, name, count, total, squared_sum, minimum, maximum, \
+                distribution = entry.unpack_from(data, offset)
+            section = sections[code]
+            stats = {'mean': total / count if count else 0.0,
+                     'stddev': _stddev(count, total, squared_sum),
+                     'sum': total,
+                     'count': count,
+                     'squared_sum': squared_sum,
+                     'min': minimum,
+                     'max': maximum}
+            if section in self.timer_sections:
+                stats['distribution95'] = distribution
+            snapshot[section][name.rstrip(b'\0')] = stats
+        return snapshot
+
+
+def _stddev(count, total, squared_sum):
+    """Compute sample standard deviation from aggregates."""
+    if count < 2:
+        return 0.0
+    variance = (squared_sum - total * total / count) / (count - 1)
+    return math.sqrt(variance) if variance > 0 else 0.0
+
+
+def merge_stats(items):
+    """Merge statistics of several counters or timers (in format returned
+    by ``to_dict``) to one. Distribution can't be merged exactly, so
+    maximum of given distributions used as upper estimate.
+
+    """
+    count = 0
+    total = squared_sum = 0.0
+    minimum = maximum = None
+    distribution = 0.0
+    timer = False
+    for stats in items:
+        timer = timer or 'distribution95' in stats
+        if not stats['count']:
+            continue
+        count += stats['count']
+        total += stats['sum']
+        squared_sum += stats['squared_sum']
+        minimum = stats['min'] if minimum is None \
+            else min(minimum, stats['min'])
+        maximum = stats['max'] if maximum is None \
+            else max(maximum, stats['max'])
+        distribution = max(distribution, stats.get('distribution95', 0.0))
+    merged = {'mean': total / count if count else 0.0,
+              'stddev': _stddev(count, total, squared_sum),
+              'sum': total,
+              'count': count,
+              'squared_sum': squared_sum,
+              'min': 0.0 if minimum is None else minimum,
+              'max': 0.0 if maximum is None else maximum}
+    if timer:
+        merged['distribution95'] = distribution
+    return merged
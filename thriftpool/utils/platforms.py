@@ -2,10 +2,16 @@ from __future__ import absolute_import
 
 import os
 import errno
+import fcntl
 import atexit
 import sys
+import socket
 import resource
 from contextlib import contextmanager
+from glob import glob
+from struct import Struct
+
+import psutil
 
 try:
     import setproctitle
@@ -23,6 +29,22 @@ EX_USAGE = getattr(os, 'EX_USAGE', 64)
 DAEMON_UMASK = 0
 DAEMON_WORKDIR = '/'
 
+#: Where Linux describes NUMA nodes.
+NUMA_NODES_GLOB = '/sys/devices/system/node/node[0-9]*/cpulist'
+
+#: Python 2 doesn't expose this option, value is taken from Linux headers.
+SO_REUSEPORT = getattr(socket, 'SO_REUSEPORT',
+                       15 if sys.platform.startswith('linux') else None)
+
+#: Linux describes state of TCP socket with this option.
+TCP_INFO = getattr(socket, 'TCP_INFO',
+                   11 if sys.platform.startswith('linux') else None)
+
+#: Beginning of Linux ``struct tcp_info``: eight bytes of flags, ``rto``,
+#: ``ato``, ``snd_mss``, ``rcv_mss``, ``unacked`` and ``sacked``. For
+#: listening socket last two are length and limit of accept queue.
+TCP_INFO_HEAD = Struct('=8xIIIIII')
+
 
 def set_process_title(name):
     """Change process title."""
@@ -38,6 +60,42 @@ def fileno(f):
         return f
 
 
+def reuseport_socket():
+    """Create TCP socket that can be bound to the same address as other
+    sockets with ``SO_REUSEPORT`` option. Kernel distributes incoming
+    connections among all such sockets.
+
+    """
+    if SO_REUSEPORT is None:
+        raise RuntimeError('SO_REUSEPORT is not supported on this platform')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, SO_REUSEPORT, 1)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def accept_queue(sock):
+    """Return number of connections that wait in accept queue of given
+    listening socket and size of queue, or :const:`None` if platform
+    doesn't report it.
+
+    """
+    if TCP_INFO is None:
+        return None
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, TCP_INFO,
+                               TCP_INFO_HEAD.size)
+    except socket.error:
+        return None
+    if len(info) < TCP_INFO_HEAD.size:
+        return None
+    return TCP_INFO_HEAD.unpack(info)[4:]
+
+
 def get_fdmax(default=None):
     """Returns the maximum number of open file descriptors
     on this system.
@@ -52,6 +110,83 @@ def get_fdmax(default=None):
     return fdmax
 
 
+def inherit(fd):
+    """Allow child process to inherit given descriptor."""
+    try:
+        flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    except IOError:
+        return
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags & ~fcntl.FD_CLOEXEC)
+
+
+def close_fds(keep=()):
+    """Close all descriptors except standard streams and given ones."""
+    low = 3
+    for fd in sorted(keep):
+        if fd >= low:
+            os.closerange(low, fd)
+            low = fd + 1
+    os.closerange(low, get_fdmax(default=2048))
+
+
+def parse_cpu_list(value):
+    """Parse list of CPUs in kernel format, like ``0-3,8``."""
+    cpus = []
+    for part in value.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def get_cpu_nodes():
+    """Return CPUs available for current process grouped by NUMA nodes.
+    All CPUs are treated as one node when topology is unknown.
+
+    """
+    process = psutil.Process(os.getpid())
+    allowed = set(process.get_cpu_affinity())
+    nodes = []
+    for path in sorted(glob(NUMA_NODES_GLOB),
+                       key=lambda path: int(path.split('/')[-2][4:])):
+        with open(path) as fh:
+            cpus = [cpu for cpu in parse_cpu_list(fh.read())
+                    if cpu in allowed]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(allowed)]
+
+
+def get_cpu_set(mode, index, nodes=None):
+    """Return CPUs that worker with given index should be pinned to.
+
+    :param mode: ``core`` pins workers to single cores round-robin, cores
+        of one NUMA node go before cores of next one, ``node`` pins
+        workers to all cores of NUMA nodes round-robin
+    :param index: number of worker, starting from zero
+
+    """
+    nodes = get_cpu_nodes() if nodes is None else nodes
+    if mode == 'core':
+        cpus = [cpu for node in nodes for cpu in node]
+        return [cpus[index % len(cpus)]]
+    elif mode == 'node':
+        return list(nodes[index % len(nodes)])
+    raise ValueError('unknown CPU affinity mode {0!r}'.format(mode))
+
+
+def set_cpu_affinity(cpus):
+    """Pin all threads of current process to given CPUs."""
+    process = psutil.Process(os.getpid())
+    for thread in process.get_threads():
+        try:
+            psutil.Process(thread.id).set_cpu_affinity(cpus)
+        except psutil.NoSuchProcess:
+            # Thread has finished already.
+            pass
+
+
 @contextmanager
 def ignore_EBADF():
     try:
@@ -73,6 +208,8 @@ class PIDLock(object):
 
     def __init__(self, path):
         self.path = os.path.abspath(path)
+        self.pid = None
+        self.replaced = None
 
     def read(self):
         """Reads and returns the writed PID lock."""
@@ -138,8 +275,11 @@ class PIDLock(object):
                 return False
         return True
 
-    def maybe_remove(self):
-        """Remove existed PID lock if we can."""
+    def maybe_remove(self, replace=None):
+        """Remove existed PID lock if we can. Lock of process with
+        ``replace`` PID is removed even if process still exists.
+
+        """
         if not self.exists():
             # No PID exists, return.
             return
@@ -149,26 +289,42 @@ class PIDLock(object):
             # No PID found.
             return
 
-        if self.process_exists(pid):
+        if pid != replace and self.process_exists(pid):
             raise LockFailed('PID lock exists.')
 
         self.remove()
 
-    def acquire(self):
+    def acquire(self, replace=None):
         """Try to write PID lock."""
-        self.maybe_remove()
-        self.write(os.getpid())
+        self.maybe_remove(replace)
+        self.pid = os.getpid()
+        self.replaced = replace
+        self.write(self.pid)
 
     def release(self, *args):
-        """Try to remove PID lock."""
+        """Try to remove PID lock if it wasn't taken by other process. If
+        replaced process still exists give lock back to it.
+
+        """
+        try:
+            pid = self.read()
+        except ValueError:
+            pid = None
+        if pid is not None and pid != self.pid:
+            return
         self.remove()
+        if self.replaced is not None and self.process_exists(self.replaced):
+            self.write(self.replaced)
 
 
-def create_pidlock(pidfile):
-    """Create PID lock, exit if fail."""
+def create_pidlock(pidfile, replace=None):
+    """Create PID lock, exit if fail. Lock of process with ``replace``
+    PID is taken over.
+
+    """
     pid = PIDLock(pidfile)
     try:
-        pid.acquire()
+        pid.acquire(replace)
     except LockFailed:
         raise SystemExit("Error: PID file ({0}) exists.".format(pidfile))
     atexit.register(pid.release)
@@ -28,11 +28,32 @@ class StreamSerializer(object):
         message = self.encode(obj)
         return self.length_struct.pack(len(message)) + message
 
+    @staticmethod
+    def read_exactly(fd, size, timeout=5):
+        """Read given number of bytes from stream. Timeout limits time of
+        waiting for each chunk, so large message isn't limited by it.
+
+        """
+        chunks = []
+        remaining = size
+        while remaining:
+            rlist, _, _ = select([fd], [], [], timeout)
+            if not rlist:
+                raise RuntimeError("Can't read object from {0!r}, {1} of {2}"
+                                   " bytes received.".format(
+                                       fd, size - remaining, size))
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                raise RuntimeError("Stream {0!r} closed, {1} of {2} bytes"
+                                   " received.".format(
+                                       fd, size - remaining, size))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
     def decode_from_stream(self, fd, timeout=5):
         """Read object from given stream and return it."""
-        rlist, _, _ = select([fd], [], [], timeout)
-        if not rlist:
-            raise RuntimeError("Can't read object from {0!r}.".format(fd))
-        message_length = self.length_struct.unpack(os.read(fd, self.length))[0]
+        message_length = self.length_struct.unpack(
+            self.read_exactly(fd, self.length, timeout))[0]
         assert message_length > 0, 'wrong message length provided'
-        return self.decode(os.read(fd, message_length))
+        return self.decode(self.read_exactly(fd, message_length, timeout))
@@ -0,0 +1,164 @@
+"""Fork workers from process with preloaded application.
+
+Zygote imports application modules once and then forks worker for each
+launcher connected to it, so workers start without importing anything and
+share unchanged memory pages with zygote.
+
+"""
+from __future__ import absolute_import
+
+import errno
+import fcntl
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import traceback
+from select import select, error as select_error
+
+from thriftpool.utils.launcher import recv_fds, send_integer
+from thriftpool.utils.platforms import get_fdmax
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['Zygote', 'ZYGOTE_FDS_ENV']
+
+#: Environment variable that contains descriptors of control and
+#: listening sockets in ``control,listener`` format.
+ZYGOTE_FDS_ENV = 'THRIFTPOOL_ZYGOTE_FDS'
+
+
+class Zygote(object):
+    """Serve requests of launchers to fork workers.
+
+    :param control: socket connected to manager, zygote exits when
+        manager closes it and all workers exited
+    :param listener: unix socket listened for launchers
+    :param target: function that runs worker in forked process
+
+    """
+
+    def __init__(self, control, listener, target):
+        self.control = control
+        self.listener = listener
+        self.target = target
+        #: Map launcher connections to PIDs of their workers.
+        self.workers = {}
+        self.closing = False
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        for fd in (self._wakeup_r, self._wakeup_w):
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+    def _fork(self, fds):
+        """Fork worker that uses given descriptors as its first ones."""
+        count = len(fds)
+        # Move descriptors above their targets before placing them.
+        moved = [fcntl.fcntl(fd, fcntl.F_DUPFD, count) for fd in fds]
+        for fd in fds:
+            os.close(fd)
+        pid = os.fork()
+        if pid:
+            for fd in moved:
+                os.close(fd)
+            return pid
+        status = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            for target, fd in enumerate(moved):
+                os.dup2(fd, target)
+            os.closerange(count, get_fdmax(default=2048))
+            random.seed()
+            gc.enable()
+            self.target()
+            status = 0
+        except SystemExit as exc:
+            status = exc.code if isinstance(exc.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def _accept(self):
+        try:
+            conn, _ = self.listener.accept()
+        except socket.error as exc:
+            if exc.args[0] in (errno.EINTR, errno.EAGAIN):
+                return
+            raise
+        fds = recv_fds(conn)
+        if not fds:
+            conn.close()
+            return
+        pid = self._fork(fds)
+        self.workers[conn] = pid
+        send_integer(conn, pid)
+
+    def _reap(self):
+        """Report exit status of finished workers to their launchers."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as exc:
+                if exc.errno == errno.EINTR:
+                    continue
+                if exc.errno == errno.ECHILD:
+                    return
+                raise
+            if not pid:
+                return
+            for conn, worker_pid in list(self.workers.items()):
+                if worker_pid == pid:
+                    del self.workers[conn]
+                    try:
+                        send_integer(conn, status)
+                    except socket.error:
+                        pass
+                    conn.close()
+
+    def _abandon(self, conn):
+        """Launcher exited, so kill its worker."""
+        pid = self.workers.pop(conn)
+        conn.close()
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def serve(self):
+        # Wake up select when worker exits.
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.set_wakeup_fd(self._wakeup_w)
+        # Collect garbage of preloaded modules and stop collector, so
+        # workers don't touch shared pages to collect it later.
+        gc.collect()
+        gc.disable()
+        while not self.closing or self.workers:
+            watched = [self._wakeup_r] + list(self.workers)
+            if not self.closing:
+                watched.extend([self.control, self.listener])
+            try:
+                readable, _, _ = select(watched, [], [])
+            except select_error as exc:
+                if exc.args[0] == errno.EINTR:
+                    continue
+                raise
+            for obj in readable:
+                if obj is self._wakeup_r:
+                    try:
+                        os.read(self._wakeup_r, 4096)
+                    except OSError:
+                        pass
+                elif obj is self.control:
+                    if not self.control.recv(4096):
+                        # Manager is stopping, wait for workers.
+                        self.closing = True
+                        self.listener.close()
+                elif obj is self.listener:
+                    self._accept()
+                elif obj in self.workers and not obj.recv(1):
+                    self._abandon(obj)
+            self._reap()